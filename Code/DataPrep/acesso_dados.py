@@ -0,0 +1,168 @@
+"""
+Acesso colunar às bases parquet do projeto via `pyarrow.dataset`.
+
+As leituras selecionam apenas as colunas necessárias (projeção) e aplicam os filtros no
+scanner do Arrow (predicate pushdown): row groups cujas estatísticas não atendem ao filtro
+nem são lidos, e as linhas restantes são filtradas antes da conversão para pandas. O índice
+pandas gravado no arquivo é preservado, de modo que os DataFrames resultantes são idênticos
+aos obtidos com `pd.read_parquet` seguido de seleção de colunas e filtragem.
+
+Os DataFrames podem ser devolvidos com tipos NumPy padrão, com tipos numéricos reduzidos
+("compacto") ou com colunas apoiadas em Arrow ("arrow").
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+
+def abrir_dataset(caminho):
+    """
+    Abre um arquivo (ou diretório) parquet como dataset, sem ler os dados.
+
+    Args:
+        caminho (str): Caminho do arquivo ou diretório .parquet.
+
+    Returns:
+        ds.Dataset: Dataset do PyArrow.
+    """
+    return ds.dataset(caminho, format="parquet")
+
+
+def colunas_disponiveis(caminho):
+    """
+    Lista as colunas de um arquivo parquet a partir do schema (sem ler os dados).
+
+    Args:
+        caminho (str): Caminho do arquivo .parquet.
+
+    Returns:
+        list[str]: Nomes das colunas.
+    """
+    return abrir_dataset(caminho).schema.names
+
+
+def montar_filtro(nao_nulos=(), limites=None, valores=None):
+    """
+    Monta uma expressão de filtro do Arrow a partir de regras simples.
+
+    Args:
+        nao_nulos (list[str], opcional): Colunas que não podem ser nulas.
+        limites (dict, opcional): {"coluna": (min, max)}, inclusivos; None deixa o lado aberto.
+        valores (dict, opcional): {"coluna": lista de valores aceitos}.
+
+    Returns:
+        pc.Expression ou None: Expressão combinada com AND, ou None se não houver regras.
+    """
+    condicoes = [pc.field(coluna).is_valid() for coluna in nao_nulos]
+    for coluna, (minimo, maximo) in (limites or {}).items():
+        if minimo is not None:
+            condicoes.append(pc.field(coluna) >= minimo)
+        if maximo is not None:
+            condicoes.append(pc.field(coluna) <= maximo)
+    for coluna, aceitos in (valores or {}).items():
+        condicoes.append(pc.field(coluna).isin(list(aceitos)))
+
+    filtro = None
+    for condicao in condicoes:
+        filtro = condicao if filtro is None else filtro & condicao
+    return filtro
+
+
+def _colunas_indice(dataset):
+    """Colunas físicas do índice pandas gravado no arquivo (vazio se não houver)."""
+    metadados = dataset.schema.pandas_metadata or {}
+    return [c for c in metadados.get("index_columns", []) if isinstance(c, str) and c in dataset.schema.names]
+
+
+def _reduzir_tipos(df):
+    """Converte inteiros para o menor tipo que comporta os valores e floats para float32."""
+    for coluna in df.columns:
+        if pd.api.types.is_integer_dtype(df[coluna]):
+            df[coluna] = pd.to_numeric(df[coluna], downcast="integer")
+        elif pd.api.types.is_float_dtype(df[coluna]):
+            df[coluna] = df[coluna].astype("float32")
+    return df
+
+
+def ler_colunas(caminho, colunas, nao_nulos=(), limites=None, valores=None, tipos="numpy"):
+    """
+    Lê apenas as colunas e linhas necessárias de um parquet.
+
+    Args:
+        caminho (str): Caminho do arquivo .parquet.
+        colunas (list[str]): Colunas a ler.
+        nao_nulos (list[str], opcional): Colunas que não podem ser nulas (filtro aplicado na leitura).
+        limites (dict, opcional): {"coluna": (min, max)} aplicados na leitura.
+        valores (dict, opcional): {"coluna": valores aceitos} aplicados na leitura.
+        tipos (str, opcional): "numpy" (padrão), "compacto" (tipos numéricos reduzidos),
+            "arrow" (colunas `pd.ArrowDtype`) ou "tabela" (`pa.Table`, sem conversão para pandas).
+
+    Returns:
+        pd.DataFrame ou pa.Table: Colunas solicitadas, com o índice original do arquivo.
+
+    Raises:
+        ValueError: Se alguma coluna solicitada não existir no arquivo.
+    """
+    dataset = abrir_dataset(caminho)
+    ausentes = [c for c in colunas if c not in dataset.schema.names]
+    if ausentes:
+        raise ValueError(f"❌ Colunas ausentes em {caminho}: {ausentes}")
+
+    tabela = dataset.to_table(
+        columns=list(colunas) + _colunas_indice(dataset),
+        filter=montar_filtro(nao_nulos, limites, valores)
+    )
+
+    if tipos == "tabela":
+        return tabela
+    if tipos == "arrow":
+        return tabela.to_pandas(types_mapper=pd.ArrowDtype)
+    df = tabela.to_pandas()
+    return _reduzir_tipos(df) if tipos == "compacto" else df
+
+
+def esquema_colunas(caminho, colunas):
+    """
+    Schema Arrow das colunas selecionadas (mais as do índice pandas), como devolvido por `ler_lotes`.
+
+    Args:
+        caminho (str): Caminho do arquivo .parquet.
+        colunas (list[str]): Colunas a ler.
+
+    Returns:
+        pa.Schema: Schema projetado, com os metadados pandas do arquivo.
+    """
+    dataset = abrir_dataset(caminho)
+    nomes = list(colunas) + _colunas_indice(dataset)
+    return pa.schema([dataset.schema.field(nome) for nome in nomes], metadata=dataset.schema.metadata)
+
+
+def ler_lotes(caminho, colunas, tamanho_lote, nao_nulos=(), limites=None, valores=None):
+    """
+    Itera sobre um parquet em lotes, lendo apenas as colunas e linhas necessárias.
+
+    Args:
+        caminho (str): Caminho do arquivo .parquet.
+        colunas (list[str]): Colunas a ler.
+        tamanho_lote (int): Quantidade máxima de linhas por lote.
+        nao_nulos (list[str], opcional): Colunas que não podem ser nulas.
+        limites (dict, opcional): {"coluna": (min, max)} aplicados na leitura.
+        valores (dict, opcional): {"coluna": valores aceitos} aplicados na leitura.
+
+    Returns:
+        Iterator[pa.Table]: Lotes com as colunas solicitadas (e as do índice pandas), na ordem
+        do arquivo e com o schema de `esquema_colunas`.
+    """
+    dataset = abrir_dataset(caminho)
+    esquema = esquema_colunas(caminho, colunas)
+    # Sem leitura antecipada: com threads ou com o pre-buffer do parquet, o scanner continua
+    # lendo e decodificando row groups enquanto o consumidor processa o lote atual, e a
+    # memória passa a crescer com o tamanho do arquivo em vez do tamanho do lote
+    scanner = dataset.scanner(
+        columns=esquema.names, filter=montar_filtro(nao_nulos, limites, valores), batch_size=tamanho_lote,
+        batch_readahead=1, fragment_readahead=1, use_threads=False,
+        fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=False)
+    )
+    return (pa.Table.from_batches([lote]).cast(esquema) for lote in scanner.to_batches() if lote.num_rows)
@@ -0,0 +1,175 @@
+"""
+Benchmark da troca de dados entre as etapas: formato original x schema compacto.
+
+A base de desenvolvimento filtrada (replicada `escala` vezes, para tempos mensuráveis) passa
+pelo mesmo caminho do pipeline em três formatos:
+- `original`: DataFrames float64/int64 gravados com `to_parquet` (índice preservado) e lidos
+  com `pd.read_parquet`.
+- `compacto_parquet`: schema compacto (float32/int8) lido do parquet.
+- `compacto_arrow`: schema compacto lido do Arrow IPC com memory-map (cópia para arrays graváveis,
+  como no treinamento).
+- `compacto_arrow_sem_copia`: idem, com as colunas como views somente leitura do arquivo.
+
+Para cada formato são medidos: gravação das saídas da preparação, carga das bases de treino e
+teste (entrada do treinamento), pontuação da base de teste com o kernel NumPy (se exportado),
+o tempo total, o tamanho em disco e a memória ocupada pelos DataFrames carregados.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import psutil
+import pyarrow.parquet as pq
+from sklearn.model_selection import train_test_split
+
+from acesso_dados import ler_colunas
+from data_preparation import COLUNAS, LIMITES_FEATURES
+from esquema_arremessos import gravar_compacta, ler_compacta_pandas, validar_tabela
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Model"))
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SAIDAS = ["data_filtered.parquet", "base_train.parquet", "base_test.parquet"]
+
+
+def _aplicar_clipping_legado(df, limites):
+    """Clipping coluna a coluna com pandas, como na preparação anterior ao `motor_preparacao`."""
+    for col, (min_val, max_val) in limites.items():
+        df[col] = df[col].clip(lower=min_val, upper=max_val)
+    return df
+
+
+def _gravar_original(df, caminho):
+    df.to_parquet(caminho)
+
+
+def _ler_original(caminho):
+    return pd.read_parquet(caminho)
+
+
+def _ler_compacto_parquet(caminho):
+    return validar_tabela(pq.read_table(caminho), caminho).to_pandas(split_blocks=True)
+
+
+FORMATOS = {
+    "original": (_gravar_original, _ler_original),
+    "compacto_parquet": (gravar_compacta, _ler_compacto_parquet),
+    "compacto_arrow": (gravar_compacta, ler_compacta_pandas),
+    "compacto_arrow_sem_copia": (gravar_compacta, lambda caminho: ler_compacta_pandas(caminho, somente_leitura=True)),
+}
+
+
+def _medir_formato(gravar, ler, bases, diretorio, preditor):
+    """
+    Mede gravação, carga e pontuação de um formato.
+
+    Args:
+        gravar (callable): Função (DataFrame, caminho) que grava uma base.
+        ler (callable): Função (caminho) que lê uma base como DataFrame.
+        bases (dict): {nome do arquivo: DataFrame} com as saídas da preparação.
+        diretorio (str): Diretório temporário das saídas.
+        preditor (PreditorNumpy ou None): Kernel usado na pontuação.
+
+    Returns:
+        dict: Tempos (s), tamanho em disco e memória (bytes).
+    """
+    inicio = time.perf_counter()
+    for nome, df in bases.items():
+        gravar(df, os.path.join(diretorio, nome))
+    tempo_gravacao = time.perf_counter() - inicio
+
+    processo = psutil.Process()
+    rss_antes = processo.memory_info().rss
+    inicio = time.perf_counter()
+    df_train = ler(os.path.join(diretorio, "base_train.parquet"))
+    df_test = ler(os.path.join(diretorio, "base_test.parquet"))
+    tempo_carga = time.perf_counter() - inicio
+    rss_carga = processo.memory_info().rss - rss_antes
+
+    tempo_pontuacao = None
+    if preditor is not None:
+        inicio = time.perf_counter()
+        preditor.predict_proba(df_test.drop(columns="shot_made_flag"))
+        tempo_pontuacao = time.perf_counter() - inicio
+
+    arquivos = [os.path.join(diretorio, nome) for nome in os.listdir(diretorio)]
+    return {
+        "tempo_gravacao_s": tempo_gravacao,
+        "tempo_carga_treino_teste_s": tempo_carga,
+        "tempo_pontuacao_teste_s": tempo_pontuacao,
+        "tempo_total_s": tempo_gravacao + tempo_carga + (tempo_pontuacao or 0.0),
+        "disco_bytes": sum(os.path.getsize(arquivo) for arquivo in arquivos),
+        "disco_parquet_bytes": sum(os.path.getsize(a) for a in arquivos if a.endswith(".parquet")),
+        "memoria_dataframes_bytes": int(df_train.memory_usage(deep=True).sum() + df_test.memory_usage(deep=True).sum()),
+        "rss_carga_bytes": int(rss_carga),
+    }
+
+
+def executar_benchmark(caminho_base_dev, caminho_modelo_numpy, caminho_saida, escala=20):
+    """
+    Executa o benchmark dos três formatos e grava o resultado em JSON.
+
+    Args:
+        caminho_base_dev (str): Caminho para o arquivo .parquet com a base de desenvolvimento.
+        caminho_modelo_numpy (str): Kernel NumPy (.npz) usado na pontuação; ignorado se não existir.
+        caminho_saida (str): Arquivo .json de saída.
+        escala (int, opcional): Quantidade de réplicas da base filtrada (default: 20).
+
+    Returns:
+        dict: Resultados por formato.
+    """
+    df = _aplicar_clipping_legado(ler_colunas(caminho_base_dev, COLUNAS, nao_nulos=COLUNAS), LIMITES_FEATURES)
+    df = pd.concat([df] * escala, ignore_index=True)
+    X_train, X_test, y_train, y_test = train_test_split(
+        df.drop("shot_made_flag", axis=1), df["shot_made_flag"], test_size=0.2, stratify=df["shot_made_flag"],
+        random_state=42
+    )
+    bases = dict(zip(SAIDAS, [df, X_train.join(y_train), X_test.join(y_test)]))
+    logging.info(f"📐 Base filtrada replicada {escala}x: {len(df):,} linhas")
+
+    preditor = None
+    if os.path.exists(caminho_modelo_numpy):
+        from kernel_numpy import carregar_preditor_numpy
+        preditor = carregar_preditor_numpy(caminho_modelo_numpy)
+
+    resultados = {"linhas": len(df), "escala": escala}
+    for nome, (gravar, ler) in FORMATOS.items():
+        diretorio = tempfile.mkdtemp(prefix=f"benchmark_{nome}_")
+        try:
+            resultados[nome] = _medir_formato(gravar, ler, bases, diretorio, preditor)
+        finally:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+        r = resultados[nome]
+        logging.info(f"⏱️ {nome:<24} | gravação: {r['tempo_gravacao_s']:6.3f} s | "
+                     f"carga: {r['tempo_carga_treino_teste_s']:6.3f} s | total: {r['tempo_total_s']:6.3f} s | "
+                     f"parquet: {r['disco_parquet_bytes'] / 2**20:5.1f} MiB (total em disco: "
+                     f"{r['disco_bytes'] / 2**20:5.1f} MiB) | memória: {r['memoria_dataframes_bytes'] / 2**20:6.1f} MiB")
+
+    os.makedirs(os.path.dirname(caminho_saida), exist_ok=True)
+    with open(caminho_saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultados, arquivo, indent=2)
+    logging.info(f"💾 Resultado salvo em {caminho_saida}")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do formato de troca de dados entre as etapas.")
+    parser.add_argument("--escala", type=int, default=20)
+    args = parser.parse_args()
+
+    executar_benchmark(
+        caminho_base_dev="../../Data/Raw/dataset_kobe_dev.parquet",
+        caminho_modelo_numpy="../../Data/Modeling/modelo_final_numpy.npz",
+        caminho_saida="../../Data/Logs/benchmark_esquema.json",
+        escala=args.escala
+    )
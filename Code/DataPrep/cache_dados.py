@@ -0,0 +1,116 @@
+"""
+Módulo de cache endereçado por conteúdo para as saídas da preparação de dados.
+
+A chave do cache combina o hash xxHash (xxh3_64) do conteúdo dos arquivos de entrada com
+os parâmetros que influenciam o resultado. Um manifesto JSON, gravado junto às saídas,
+guarda a chave, o hash de cada arquivo gerado e os parâmetros/métricas registrados no
+MLflow, permitindo pular a etapa quando nada mudou e reproduzir o registro da rodada.
+"""
+
+import json
+import os
+
+import xxhash
+
+TAMANHO_BLOCO = 1 << 20
+
+
+def calcular_hash_arquivo(caminho):
+    """
+    Calcula o hash xxh3_64 do conteúdo de um arquivo, lendo-o em blocos de 1 MiB.
+
+    Args:
+        caminho (str): Caminho do arquivo.
+
+    Returns:
+        str: Hash hexadecimal do conteúdo.
+    """
+    hasher = xxhash.xxh3_64()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO), b""):
+            hasher.update(bloco)
+    return hasher.hexdigest()
+
+
+def calcular_chave_cache(caminhos_entrada, parametros):
+    """
+    Calcula a chave do cache a partir do conteúdo das entradas e dos parâmetros.
+
+    Args:
+        caminhos_entrada (list[str]): Arquivos de entrada da etapa.
+        parametros (dict): Parâmetros serializáveis em JSON que afetam as saídas.
+
+    Returns:
+        str: Chave hexadecimal do cache.
+    """
+    hasher = xxhash.xxh3_64()
+    for caminho in caminhos_entrada:
+        hasher.update(calcular_hash_arquivo(caminho).encode())
+    hasher.update(json.dumps(parametros, sort_keys=True, default=list).encode())
+    return hasher.hexdigest()
+
+
+def ler_manifesto(caminho_manifesto):
+    """
+    Lê o manifesto do cache, se existir.
+
+    Args:
+        caminho_manifesto (str): Caminho do arquivo .json do manifesto.
+
+    Returns:
+        dict ou None: Conteúdo do manifesto, ou None se ausente ou inválido.
+    """
+    try:
+        with open(caminho_manifesto, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def gravar_manifesto(caminho_manifesto, chave, diretorio_saidas, saidas, params, metricas):
+    """
+    Grava o manifesto do cache de forma atômica (arquivo temporário + rename).
+
+    Args:
+        caminho_manifesto (str): Caminho do arquivo .json do manifesto.
+        chave (str): Chave do cache calculada para as entradas.
+        diretorio_saidas (str): Diretório onde estão os arquivos gerados.
+        saidas (list[str]): Nomes dos arquivos gerados pela etapa.
+        params (dict): Parâmetros registrados no MLflow.
+        metricas (dict): Métricas registradas no MLflow.
+
+    Returns:
+        None
+    """
+    manifesto = {
+        "chave": chave,
+        "saidas": {nome: calcular_hash_arquivo(os.path.join(diretorio_saidas, nome)) for nome in saidas},
+        "params": params,
+        "metricas": metricas,
+    }
+    temporario = f"{caminho_manifesto}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, indent=2)
+    os.replace(temporario, caminho_manifesto)
+
+
+def cache_valido(manifesto, chave, diretorio_saidas):
+    """
+    Verifica se o manifesto corresponde à chave atual e se as saídas continuam intactas.
+
+    Args:
+        manifesto (dict ou None): Manifesto lido com `ler_manifesto`.
+        chave (str): Chave do cache calculada para as entradas atuais.
+        diretorio_saidas (str): Diretório onde estão os arquivos gerados.
+
+    Returns:
+        bool: True se as saídas armazenadas podem ser reutilizadas.
+    """
+    if not manifesto or manifesto.get("chave") != chave:
+        return False
+
+    for nome, hash_saida in manifesto["saidas"].items():
+        caminho = os.path.join(diretorio_saidas, nome)
+        if not os.path.exists(caminho) or calcular_hash_arquivo(caminho) != hash_saida:
+            return False
+    return True
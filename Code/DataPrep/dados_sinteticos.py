@@ -0,0 +1,114 @@
+"""
+Geração de bases sintéticas de arremessos em escala, com o schema e as faixas de valores da base real.
+
+Cada linha sintética é uma linha da base de origem sorteada com reposição (bootstrap), o que
+preserva o schema completo, as categorias, os nulos de `shot_made_flag` e a relação entre as
+colunas (ex.: `loc_x`/`lon`, `loc_y`/`lat`, `shot_distance`). Sobre o sorteio:
+- `lat` e `lon` recebem um ruído uniforme de meio passo da grade de valores da origem (0,001),
+  limitado ao mínimo e ao máximo observados, para que as features contínuas não sejam apenas
+  valores repetidos;
+- `shot_id` e o índice pandas são renumerados, mantendo-os únicos.
+
+As bases são geradas e gravadas em lotes (sem manter a base inteira em memória), de forma
+determinística: o lote `i` usa a semente `[random_state, i]`. A chave (hash da origem, linhas e
+semente) fica nos metadados do parquet, e uma base já gerada com a mesma chave é reaproveitada.
+"""
+
+import json
+import logging
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cache_dados import calcular_chave_cache
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+COLUNAS_COM_RUIDO = ("lat", "lon")
+COLUNAS_SEQUENCIAIS = ("shot_id",)
+CHAVE_METADADOS = b"base_sintetica"
+
+
+def _ruido(valores, rng, minimo, maximo, passo):
+    """Soma ruído uniforme de meio passo aos valores, limitado à faixa observada na origem."""
+    return np.clip(valores + rng.uniform(-passo / 2, passo / 2, len(valores)), minimo, maximo)
+
+
+def _passo(valores):
+    """Menor diferença entre valores distintos (passo da grade de valores da coluna)."""
+    distintos = np.unique(valores[~np.isnan(valores)])
+    return float(np.diff(distintos).min()) if len(distintos) > 1 else 0.0
+
+
+def chave_base_sintetica(caminho_origem, linhas, random_state):
+    """
+    Chave de uma base sintética: conteúdo da origem, quantidade de linhas e semente.
+
+    Args:
+        caminho_origem (str): Base real usada como origem.
+        linhas (int): Quantidade de linhas da base sintética.
+        random_state (int): Semente do sorteio.
+
+    Returns:
+        str: Chave hexadecimal.
+    """
+    return calcular_chave_cache([caminho_origem], {"linhas": linhas, "random_state": random_state})
+
+
+def gerar_base_sintetica(caminho_origem, caminho_saida, linhas, random_state=42, tamanho_lote=1_000_000):
+    """
+    Gera uma base sintética com `linhas` linhas a partir de uma base real de arremessos.
+
+    Args:
+        caminho_origem (str): Base real (.parquet), ex.: `dataset_kobe_dev.parquet`.
+        caminho_saida (str): Arquivo .parquet de saída (gravação atômica).
+        linhas (int): Quantidade de linhas da base sintética.
+        random_state (int, opcional): Semente do sorteio (default: 42).
+        tamanho_lote (int, opcional): Linhas geradas e gravadas por vez, também usadas como
+            tamanho do row group (default: 1.000.000).
+
+    Returns:
+        bool: True se a base foi gerada, False se uma base com a mesma chave foi reaproveitada.
+    """
+    chave = chave_base_sintetica(caminho_origem, linhas, random_state)
+    if os.path.exists(caminho_saida):
+        metadados = pq.read_schema(caminho_saida).metadata or {}
+        if metadados.get(CHAVE_METADADOS, b"").decode() == chave:
+            logging.info(f"♻️ Base sintética reaproveitada: {caminho_saida}")
+            return False
+
+    origem = pq.read_table(caminho_origem)
+    indice_pandas = [c for c in json.loads(origem.schema.metadata[b"pandas"])["index_columns"]
+                     if isinstance(c, str)] if b"pandas" in origem.schema.metadata else []
+    continuas = {}
+    for coluna in COLUNAS_COM_RUIDO:
+        valores = origem.column(coluna).to_numpy(zero_copy_only=False).astype(np.float64)
+        continuas[coluna] = (np.nanmin(valores), np.nanmax(valores), _passo(valores))
+
+    esquema = origem.schema.with_metadata({**origem.schema.metadata, CHAVE_METADADOS: chave.encode()})
+    os.makedirs(os.path.dirname(os.path.abspath(caminho_saida)), exist_ok=True)
+    temporario = f"{caminho_saida}.tmp"
+
+    logging.info(f"🧪 Gerando base sintética com {linhas:,} linhas a partir de {caminho_origem}...")
+    with pq.ParquetWriter(temporario, esquema) as escritor:
+        for indice_lote, inicio in enumerate(range(0, linhas, tamanho_lote)):
+            n = min(tamanho_lote, linhas - inicio)
+            rng = np.random.default_rng([random_state, indice_lote])
+            lote = origem.take(pa.array(rng.integers(0, origem.num_rows, n)))
+
+            for coluna, (minimo, maximo, passo) in continuas.items():
+                valores = _ruido(lote.column(coluna).to_numpy(zero_copy_only=False), rng, minimo, maximo, passo)
+                lote = lote.set_column(lote.schema.get_field_index(coluna), coluna, pa.array(valores))
+            sequencia = np.arange(inicio, inicio + n, dtype=np.int64)
+            for coluna in COLUNAS_SEQUENCIAIS:
+                lote = lote.set_column(lote.schema.get_field_index(coluna), coluna, pa.array(sequencia + 1))
+            for coluna in indice_pandas:
+                lote = lote.set_column(lote.schema.get_field_index(coluna), coluna, pa.array(sequencia))
+
+            escritor.write_table(lote.cast(esquema), row_group_size=tamanho_lote)
+
+    os.replace(temporario, caminho_saida)
+    return True
@@ -4,19 +4,35 @@ do projeto de predição de arremessos de Kobe Bryant.
 
 Etapas realizadas:
 - Leitura das bases de desenvolvimento e produção
-- Filtragem de colunas e remoção de valores ausentes
-- Aplicação de limites (clipping) em features selecionadas
+- Leitura apenas das colunas usadas (ver `acesso_dados.py`)
+- Remoção de valores ausentes, clipping e validação das features em uma passada vetorizada
+  sobre as duas bases, em memória ou em lotes (ver `motor_preparacao.py`)
 - Divisão da base de desenvolvimento em treino e teste
+- Gravação das saídas no schema compacto, em parquet e Arrow IPC (ver `esquema_arremessos.py`)
+- Referência das features da base de treino para o monitoramento de drift na produção
+  (ver `perfil_features.py`)
 - Registro de parâmetros e métricas no MLflow
+- Medição dos trechos críticos (leitura, motor, gravação, MLflow), registrada na rodada e
+  em trace local (ver `instrumentacao.py`)
+- Cache das saídas, evitando reprocessar quando entradas e parâmetros não mudaram
 """
 
-import pandas as pd
+import argparse
 import mlflow
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 from sklearn.model_selection import train_test_split
-from collections import Counter
 import os
 import logging
 
+from acesso_dados import ler_colunas, ler_lotes
+from esquema_arremessos import ESQUEMA_ARREMESSOS, EscritorCompacto, gravar_compacta, ler_compacta
+from motor_preparacao import Throughput, preparar_lotes, preparar_tabelas
+from perfil_features import calcular_referencia, gravar_referencia
+from cache_dados import calcular_chave_cache, ler_manifesto, gravar_manifesto, cache_valido
+from instrumentacao import gravar_trace, medir, medir_lotes, registrar_log, registrar_mlflow
+
 # Configuração do logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -27,91 +43,221 @@ LIMITES_FEATURES = {
     "lon": (-118.52, -118.02)
 }
 
-def aplicar_clipping(df, limites):
+COLUNAS = ['lat', 'lon', 'minutes_remaining', 'period', 'playoffs', 'shot_distance', 'shot_made_flag']
+SAIDAS = [
+    "data_filtered.parquet", "base_train.parquet", "base_test.parquet",
+    "data_filtered.arrow", "base_train.arrow", "base_test.arrow", "referencia_monitoramento.json",
+]
+
+
+def _registrar_mlflow(params, metricas, origem):
     """
-    Aplica limites mínimos e máximos (clipping) para colunas específicas de um DataFrame.
+    Registra a rodada "PreparacaoDados" no MLflow.
 
     Args:
-        df (pd.DataFrame): DataFrame de entrada com as colunas a serem ajustadas.
-        limites (dict): Dicionário com os limites no formato {"coluna": (min, max)}.
+        params (dict): Parâmetros da preparação.
+        metricas (dict): Métricas da preparação.
+        origem (str): "processamento" ou "cache", registrado como tag da rodada.
+
+    Returns:
+        None
+    """
+    logging.info("📊 Registrando parâmetros e métricas no MLflow...")
+    mlflow.set_experiment("PreparacaoDados")
+
+    with mlflow.start_run(run_name="PreparacaoDados"):
+        mlflow.set_tag("origem_saidas", origem)
+        mlflow.log_params(params)
+        mlflow.log_metrics(metricas)
+        registrar_mlflow("preparacao")
+
+
+def _preparar_em_memoria(caminho_base_dev, caminho_base_prod, caminho_saida, test_size, random_state):
+    """
+    Prepara as bases inteiras em memória, com dev e prod processadas juntas pelo motor vetorizado.
+
+    Returns:
+        tuple: (tamanhos de treino e teste, contagem por classe, linhas filtradas, Throughput)
+    """
+    logging.info("🔍 Lendo os dados de desenvolvimento e produção (apenas as colunas usadas)...")
+    bases = {}
+    for nome, caminho in (("dev", caminho_base_dev), ("prod", caminho_base_prod)):
+        with medir("ler_parquet") as trecho:
+            bases[nome] = ler_colunas(caminho, COLUNAS, tipos="tabela")
+            trecho.linhas = bases[nome].num_rows
+    with medir("motor", linhas=sum(t.num_rows for t in bases.values())):
+        tabelas, throughput = preparar_tabelas(bases, COLUNAS, LIMITES_FEATURES)
+    df_dev_filtered = tabelas["dev"].to_pandas()
+    logging.info(f"✅ Dimensão do dataset filtrado (dev): {df_dev_filtered.shape}")
+
+    with medir("gravar_parquet", linhas=len(df_dev_filtered)):
+        gravar_compacta(tabelas["dev"], os.path.join(caminho_saida, "data_filtered.parquet"))
+
+    X = df_dev_filtered.drop('shot_made_flag', axis=1)
+    y = df_dev_filtered['shot_made_flag']
+
+    with medir("divisao_treino_teste", linhas=len(y)):
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, stratify=y, random_state=random_state
+        )
+
+    logging.info("💾 Salvando bases de treino e teste...")
+    with medir("gravar_parquet", linhas=len(y)):
+        gravar_compacta(X_train.join(y_train), os.path.join(caminho_saida, "base_train.parquet"))
+        gravar_compacta(X_test.join(y_test), os.path.join(caminho_saida, "base_test.parquet"))
+
+    return (len(X_train), len(X_test)), np.bincount(y, minlength=2), len(df_dev_filtered), throughput
+
+
+def _preparar_em_lotes(caminho_base_dev, caminho_base_prod, caminho_saida, test_size, random_state, tamanho_lote):
+    """
+    Prepara as bases em lotes, sem carregá-las inteiras em memória.
+
+    A base filtrada é gravada lote a lote; apenas a coluna alvo (int8) fica em memória para a
+    divisão estratificada. Em seguida, a base filtrada é relida em lotes (Arrow IPC com
+    memory-map) e cada linha é enviada para o treino ou o teste. Diferente do modo em memória,
+    as bases de treino e teste mantêm a ordem original das linhas.
 
     Returns:
-        pd.DataFrame: DataFrame com os valores limitados conforme especificado.
+        tuple: (tamanhos de treino e teste, contagem por classe, linhas filtradas, Throughput)
     """
-    for col, (min_val, max_val) in limites.items():
-        df[col] = df[col].clip(lower=min_val, upper=max_val)
-    return df
+    throughput = Throughput()
+    caminho_filtrado = os.path.join(caminho_saida, "data_filtered.parquet")
 
+    logging.info(f"🔍 Processando as bases em lotes de até {tamanho_lote:,} linhas...")
+    alvos = []
+    with EscritorCompacto(caminho_filtrado, COLUNAS) as escritor:
+        for tabela in medir_lotes("motor", preparar_lotes(
+                medir_lotes("ler_parquet", ler_lotes(caminho_base_dev, COLUNAS, tamanho_lote)),
+                COLUNAS, LIMITES_FEATURES, throughput)):
+            with medir("gravar_parquet", linhas=tabela.num_rows):
+                escritor.gravar(tabela)
+            alvos.append(tabela.column("shot_made_flag").to_numpy())
 
-def preparar_dados(caminho_base_dev, caminho_base_prod, caminho_saida):
+    # A base de produção passa pela mesma validação e clipping, sem gerar saída
+    for _ in medir_lotes("motor", preparar_lotes(
+            medir_lotes("ler_parquet", ler_lotes(caminho_base_prod, COLUNAS, tamanho_lote)),
+            COLUNAS, LIMITES_FEATURES, throughput)):
+        pass
+
+    y = np.concatenate(alvos) if alvos else np.empty(0, dtype=np.int8)
+    logging.info(f"✅ Linhas filtradas (dev): {len(y):,}")
+    with medir("divisao_treino_teste", linhas=len(y)):
+        _, indices_teste = train_test_split(
+            np.arange(len(y)), test_size=test_size, stratify=y, random_state=random_state
+        )
+    teste = np.zeros(len(y), dtype=bool)
+    teste[indices_teste] = True
+
+    logging.info("💾 Salvando bases de treino e teste...")
+    with EscritorCompacto(os.path.join(caminho_saida, "base_train.parquet"), COLUNAS) as treino, \
+            EscritorCompacto(os.path.join(caminho_saida, "base_test.parquet"), COLUNAS) as base_teste:
+        inicio = 0
+        for lote in ler_compacta(caminho_filtrado).to_batches(max_chunksize=tamanho_lote):
+            mascara = pa.array(teste[inicio:inicio + lote.num_rows])
+            with medir("gravar_parquet", linhas=lote.num_rows):
+                treino.gravar(pa.Table.from_batches([lote.filter(pc.invert(mascara))]))
+                base_teste.gravar(pa.Table.from_batches([lote.filter(mascara)]))
+            inicio += lote.num_rows
+
+    return (treino.linhas, base_teste.linhas), np.bincount(y, minlength=2), len(y), throughput
+
+
+@medir("preparacao")
+def preparar_dados(caminho_base_dev, caminho_base_prod, caminho_saida,
+                   test_size=0.2, random_state=42, usar_cache=True, tamanho_lote=None):
     """
     Realiza o pipeline de preparação de dados:
     - Carrega dados das bases de desenvolvimento e produção
-    - Remove valores nulos e seleciona colunas relevantes
-    - Aplica clipping nas features numéricas
+    - Remove valores nulos, aplica clipping nas features numéricas e valida o schema, em uma
+      única passada vetorizada sobre as duas bases (ver `motor_preparacao.py`)
     - Salva base filtrada
     - Divide a base de desenvolvimento em treino/teste
-    - Registra parâmetros e métricas no MLflow
+    - Grava a referência das features de treino para o monitoramento (`referencia_monitoramento.json`)
+    - Registra parâmetros e métricas no MLflow, com os tempos dos trechos medidos (trecho raiz "preparacao")
+
+    As saídas são armazenadas em cache: se o conteúdo das bases brutas, os limites de clipping,
+    as colunas, `test_size`, `random_state` e `tamanho_lote` forem os mesmos da última execução
+    (e as saídas estiverem intactas), o processamento é pulado e as métricas são reproduzidas
+    a partir do manifesto `manifesto_preparacao.json`.
 
     Args:
         caminho_base_dev (str): Caminho para o arquivo .parquet com a base de desenvolvimento.
         caminho_base_prod (str): Caminho para o arquivo .parquet com a base de produção.
         caminho_saida (str): Caminho do diretório para salvar os dados processados.
+        test_size (float, opcional): Proporção da base de teste (default: 0.2).
+        random_state (int, opcional): Semente da divisão treino/teste (default: 42).
+        usar_cache (bool, opcional): Se False, ignora o cache e reprocessa (default: True).
+        tamanho_lote (int, opcional): Se informado, processa as bases em lotes desse tamanho,
+            sem carregá-las inteiras em memória (default: None, bases inteiras em memória).
 
     Returns:
         None
     """
-    logging.info("🔍 Lendo os dados de desenvolvimento e produção...")
-    df_dev = pd.read_parquet(caminho_base_dev)
-    df_prod = pd.read_parquet(caminho_base_prod)
-
-    cols = ['lat', 'lon', 'minutes_remaining', 'period', 'playoffs', 'shot_distance', 'shot_made_flag']
-    logging.info("🧹 Filtrando colunas e removendo valores nulos...")
-    df_dev_filtered = df_dev[cols].dropna()
-    df_prod_filtered = df_prod[cols].dropna()
-
-    logging.info(f"✅ Dimensão do dataset filtrado (dev): {df_dev_filtered.shape}")
+    caminho_manifesto = os.path.join(caminho_saida, "manifesto_preparacao.json")
+    chave = calcular_chave_cache(
+        [caminho_base_dev, caminho_base_prod],
+        {"limites": LIMITES_FEATURES, "colunas": COLUNAS, "esquema": ESQUEMA_ARREMESSOS.to_string(),
+         "test_size": test_size, "random_state": random_state, "tamanho_lote": tamanho_lote, "saidas": SAIDAS}
+    )
 
-    df_dev_filtered = aplicar_clipping(df_dev_filtered, LIMITES_FEATURES)
-    df_prod_filtered = aplicar_clipping(df_prod_filtered, LIMITES_FEATURES)
+    manifesto = ler_manifesto(caminho_manifesto)
+    if usar_cache and cache_valido(manifesto, chave, caminho_saida):
+        logging.info("♻️ Entradas e parâmetros inalterados: reutilizando as saídas em cache.")
+        _registrar_mlflow(manifesto["params"], manifesto["metricas"], origem="cache")
+        logging.info("✅ Pipeline de preparação de dados finalizado com sucesso.")
+        return
 
+    # Saídas no schema compacto (float32/int8), em parquet e Arrow IPC
     os.makedirs(caminho_saida, exist_ok=True)
-    df_dev_filtered.to_parquet(os.path.join(caminho_saida, "data_filtered.parquet"))
+    if tamanho_lote is None:
+        tamanhos, contagem_classes, linhas_filtradas, throughput = _preparar_em_memoria(
+            caminho_base_dev, caminho_base_prod, caminho_saida, test_size, random_state
+        )
+    else:
+        tamanhos, contagem_classes, linhas_filtradas, throughput = _preparar_em_lotes(
+            caminho_base_dev, caminho_base_prod, caminho_saida, test_size, random_state, tamanho_lote
+        )
+    throughput.registrar_log("Motor de preparação (dev + prod)")
 
-    X = df_dev_filtered.drop('shot_made_flag', axis=1)
-    y = df_dev_filtered['shot_made_flag']
+    logging.info("📏 Calculando a referência de monitoramento da base de treino...")
+    with medir("referencia_monitoramento", linhas=tamanhos[0]):
+        referencia = calcular_referencia(
+            ler_compacta(os.path.join(caminho_saida, "base_train.parquet")).to_batches(),
+            [c for c in COLUNAS if c != "shot_made_flag"], LIMITES_FEATURES
+        )
+    gravar_referencia(referencia, os.path.join(caminho_saida, "referencia_monitoramento.json"))
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, stratify=y, random_state=42
-    )
+    params = {"test_size": test_size}
+    for col, (min_val, max_val) in LIMITES_FEATURES.items():
+        params[f"{col}_min_clip"] = min_val
+        params[f"{col}_max_clip"] = max_val
 
-    logging.info("💾 Salvando bases de treino e teste...")
-    X_train.join(y_train).to_parquet(os.path.join(caminho_saida, "base_train.parquet"))
-    X_test.join(y_test).to_parquet(os.path.join(caminho_saida, "base_test.parquet"))
+    metricas = {
+        "train_size": tamanhos[0],
+        "test_size": tamanhos[1],
+        "filtered_rows": linhas_filtradas,
+        "class_0_count": int(contagem_classes[0]),
+        "class_1_count": int(contagem_classes[1]),
+    }
 
-    logging.info("📊 Registrando parâmetros e métricas no MLflow...")
-    mlflow.set_experiment("PreparacaoDados")
-
-    with mlflow.start_run(run_name="PreparacaoDados"):
-        mlflow.log_param("test_size", 0.2)
-        mlflow.log_metric("train_size", X_train.shape[0])
-        mlflow.log_metric("test_size", X_test.shape[0])
-        mlflow.log_metric("filtered_rows", df_dev_filtered.shape[0])
-
-        for col, (min_val, max_val) in LIMITES_FEATURES.items():
-            mlflow.log_param(f"{col}_min_clip", min_val)
-            mlflow.log_param(f"{col}_max_clip", max_val)
-
-        class_counts = Counter(y)
-        mlflow.log_metric("class_0_count", class_counts.get(0, 0))
-        mlflow.log_metric("class_1_count", class_counts.get(1, 0))
+    registrar_log("preparacao")
+    _registrar_mlflow(params, metricas, origem="processamento")
+    gravar_manifesto(caminho_manifesto, chave, caminho_saida, SAIDAS, params, metricas)
 
     logging.info("✅ Pipeline de preparação de dados finalizado com sucesso.")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preparação das bases de arremessos.")
+    parser.add_argument("--tamanho-lote", type=int, default=None,
+                        help="Processa as bases em lotes deste tamanho, sem carregá-las inteiras em memória.")
+    args = parser.parse_args()
+
     preparar_dados(
         caminho_base_dev="../../Data/Raw/dataset_kobe_dev.parquet",
         caminho_base_prod="../../Data/Raw/dataset_kobe_prod.parquet",
-        caminho_saida="../../Data/Processed"
+        caminho_saida="../../Data/Processed",
+        tamanho_lote=args.tamanho_lote
     )
+    gravar_trace("../../Data/Logs/trace_preparacao.json", raiz="preparacao")
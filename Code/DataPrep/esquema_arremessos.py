@@ -0,0 +1,222 @@
+"""
+Schema compacto da tabela de arremessos trocada entre as etapas do pipeline.
+
+As features cabem em tipos bem menores que os float64/int64 do pandas: coordenadas e
+probabilidade prevista em float32 e contadores/indicadores (período, minutos, playoffs,
+distância, alvo e predição) em int8; o identificador `shot_id`, que liga as predições aos
+arremessos da base bruta, em int32. O schema é aplicado na gravação (conversão segura: valores fora do intervalo do
+tipo geram erro em vez de serem truncados) e validado na leitura.
+
+As bases geradas pela preparação são gravadas em parquet (para inspeção e versionamento) e
+em um arquivo Arrow IPC ao lado (`.arrow`, sem compressão). As etapas seguintes abrem o
+`.arrow` com memory-map: as colunas vêm direto do arquivo, sem decodificação do parquet, e
+podem ser usadas sem cópia (somente leitura) ou copiadas uma vez para arrays graváveis.
+"""
+
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+ESQUEMA_ARREMESSOS = pa.schema([
+    ("shot_id", pa.int32()),
+    ("lat", pa.float32()),
+    ("lon", pa.float32()),
+    ("minutes_remaining", pa.int8()),
+    ("period", pa.int8()),
+    ("playoffs", pa.int8()),
+    ("shot_distance", pa.int8()),
+    ("shot_made_flag", pa.int8()),
+    ("proba", pa.float32()),
+    ("prediction", pa.int8()),
+])
+
+
+def esquema_para(colunas):
+    """
+    Schema compacto restrito às colunas informadas, na ordem informada.
+
+    Args:
+        colunas (list[str]): Colunas da tabela.
+
+    Returns:
+        pa.Schema: Schema com os tipos de `ESQUEMA_ARREMESSOS`.
+
+    Raises:
+        ValueError: Se alguma coluna não fizer parte do schema compacto.
+    """
+    desconhecidas = [c for c in colunas if c not in ESQUEMA_ARREMESSOS.names]
+    if desconhecidas:
+        raise ValueError(f"❌ Colunas fora do schema de arremessos: {desconhecidas}")
+    return pa.schema([ESQUEMA_ARREMESSOS.field(c) for c in colunas])
+
+
+def tabela_compacta(dados):
+    """
+    Converte um DataFrame ou tabela Arrow para o schema compacto.
+
+    O índice pandas e as colunas fora do schema são descartados.
+
+    Args:
+        dados (pd.DataFrame ou pa.Table): Dados com colunas do schema de arremessos.
+
+    Returns:
+        pa.Table: Tabela com os tipos de `ESQUEMA_ARREMESSOS`.
+    """
+    tabela = dados if isinstance(dados, pa.Table) else pa.Table.from_pandas(dados, preserve_index=False)
+    colunas = [c for c in tabela.column_names if c in ESQUEMA_ARREMESSOS.names]
+    return tabela.select(colunas).cast(esquema_para(colunas))
+
+
+def validar_tabela(tabela, origem):
+    """
+    Verifica se a tabela lida segue o schema compacto.
+
+    Args:
+        tabela (pa.Table): Tabela lida.
+        origem (str): Arquivo de origem (usado na mensagem de erro).
+
+    Returns:
+        pa.Table: A própria tabela.
+
+    Raises:
+        ValueError: Se alguma coluna não existir no schema ou tiver tipo diferente.
+    """
+    esperado = esquema_para(tabela.column_names)
+    if not tabela.schema.equals(esperado, check_metadata=False):
+        raise ValueError(f"❌ {origem} não segue o schema de arremessos:\n{tabela.schema}\nesperado:\n{esperado}")
+    return tabela
+
+
+def caminho_ipc(caminho_parquet):
+    """Caminho do arquivo Arrow IPC gravado ao lado do parquet."""
+    return os.path.splitext(caminho_parquet)[0] + ".arrow"
+
+
+def gravar_compacta(dados, caminho_parquet):
+    """
+    Grava a tabela no schema compacto em parquet e em Arrow IPC (gravações atômicas).
+
+    Args:
+        dados (pd.DataFrame ou pa.Table): Dados com colunas do schema de arremessos.
+        caminho_parquet (str): Caminho do arquivo .parquet; o .arrow é gravado ao lado.
+
+    Returns:
+        pa.Table: Tabela gravada.
+    """
+    tabela = tabela_compacta(dados)
+
+    temporario = f"{caminho_parquet}.tmp"
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, caminho_parquet)
+
+    caminho_arrow = caminho_ipc(caminho_parquet)
+    with pa.OSFile(f"{caminho_arrow}.tmp", "wb") as arquivo, ipc.new_file(arquivo, tabela.schema) as writer:
+        writer.write_table(tabela)
+    os.replace(f"{caminho_arrow}.tmp", caminho_arrow)
+    return tabela
+
+
+class EscritorCompacto:
+    """
+    Grava uma tabela de arremessos em partes (parquet + Arrow IPC), para bases maiores que a memória.
+
+    Os arquivos são escritos em temporários e publicados juntos ao sair do bloco `with`; se
+    ocorrer um erro, os temporários são descartados e os arquivos anteriores permanecem.
+    """
+
+    def __init__(self, caminho_parquet, colunas):
+        self.caminho_parquet = caminho_parquet
+        self.caminho_arrow = caminho_ipc(caminho_parquet)
+        self.esquema = esquema_para(colunas)
+        self.linhas = 0
+
+    def __enter__(self):
+        self._parquet = pq.ParquetWriter(f"{self.caminho_parquet}.tmp", self.esquema)
+        self._arquivo_arrow = pa.OSFile(f"{self.caminho_arrow}.tmp", "wb")
+        self._arrow = ipc.new_file(self._arquivo_arrow, self.esquema)
+        return self
+
+    def gravar(self, tabela):
+        """
+        Acrescenta uma parte da tabela.
+
+        Args:
+            tabela (pa.Table): Parte no schema compacto.
+
+        Returns:
+            None
+        """
+        self._parquet.write_table(tabela)
+        self._arrow.write_table(tabela)
+        self.linhas += tabela.num_rows
+
+    def __exit__(self, tipo_excecao, excecao, rastreamento):
+        self._parquet.close()
+        self._arrow.close()
+        self._arquivo_arrow.close()
+        if tipo_excecao is None:
+            os.replace(f"{self.caminho_parquet}.tmp", self.caminho_parquet)
+            os.replace(f"{self.caminho_arrow}.tmp", self.caminho_arrow)
+        else:
+            os.remove(f"{self.caminho_parquet}.tmp")
+            os.remove(f"{self.caminho_arrow}.tmp")
+        return False
+
+
+def _sem_indice_pandas(tabela):
+    """Remove as colunas do índice pandas (ex.: `__index_level_0__`) gravadas por `DataFrame.to_parquet`."""
+    metadados = tabela.schema.metadata or {}
+    if b"pandas" not in metadados:
+        return tabela
+    indice = [c for c in json.loads(metadados[b"pandas"])["index_columns"] if isinstance(c, str)]
+    return tabela.drop([c for c in indice if c in tabela.column_names])
+
+
+def ler_compacta(caminho_parquet, colunas=None):
+    """
+    Lê uma tabela de arremessos, preferindo o Arrow IPC memory-mapped gravado ao lado do parquet.
+
+    O `.arrow` só é usado se não for mais antigo que o parquet; caso contrário (ou se não
+    existir), o parquet é lido. Colunas do índice pandas são descartadas antes da validação.
+
+    Args:
+        caminho_parquet (str): Caminho do arquivo .parquet.
+        colunas (list[str], opcional): Colunas a selecionar (default: todas).
+
+    Returns:
+        pa.Table: Tabela validada contra o schema compacto.
+    """
+    caminho_arrow = caminho_ipc(caminho_parquet)
+    if os.path.exists(caminho_arrow) and os.path.getmtime(caminho_arrow) >= os.path.getmtime(caminho_parquet):
+        tabela = ipc.open_file(pa.memory_map(caminho_arrow, "r")).read_all()
+        origem = caminho_arrow
+    else:
+        tabela = pq.read_table(caminho_parquet)
+        origem = caminho_parquet
+
+    tabela = _sem_indice_pandas(tabela)
+    if colunas is not None:
+        tabela = tabela.select(colunas)
+    return validar_tabela(tabela, origem)
+
+
+def ler_compacta_pandas(caminho_parquet, colunas=None, somente_leitura=False):
+    """
+    Lê uma tabela de arremessos como DataFrame.
+
+    Args:
+        caminho_parquet (str): Caminho do arquivo .parquet.
+        colunas (list[str], opcional): Colunas a selecionar (default: todas).
+        somente_leitura (bool, opcional): Se True, as colunas são views dos buffers Arrow (sem
+            cópia, mas não graváveis, o que o scikit-learn recusa em algumas validações); se
+            False, cada coluna é copiada uma única vez para arrays graváveis (default: False).
+
+    Returns:
+        pd.DataFrame: Dados com os tipos compactos (float32/int8).
+    """
+    # split_blocks evita consolidar as colunas em um único bloco (e a cópia que isso exige)
+    df = ler_compacta(caminho_parquet, colunas).to_pandas(split_blocks=True)
+    return df if somente_leitura else df.copy()
@@ -0,0 +1,382 @@
+"""
+Instrumentação dos trechos críticos do projeto: tempo de parede, tempo de CPU, pico de memória e vazão.
+
+`medir(nome, linhas=None)` funciona como context manager e como decorador. Cada trecho medido
+guarda o tempo de parede, o tempo de CPU do processo, o pico de RSS enquanto esteve aberto
+(amostrado em uma thread auxiliar, como o `MonitorMemoria` do `main_pipeline.py`) e, quando
+informada a quantidade de linhas, a vazão em linhas/s. Trechos aninhados formam um caminho
+("treinamento/create_model"), e o nome pode conter "/" para agrupar trechos sem um trecho pai.
+
+Os trechos concluídos ficam no `RASTREADOR` do processo e são exportados ao fim de cada etapa:
+- `resumo(raiz)`: agregação por caminho (chamadas, tempos, pico de RSS e linhas/s);
+- `registrar_mlflow(raiz)`: resumo como métricas da rodada ativa e trace como artefato JSON;
+- `gravar_trace(caminho, raiz)`: trace local em JSON no formato Trace Event (abre no
+  Perfetto ou em chrome://tracing, com os trechos aninhados como um flame chart).
+
+`perfilar(caminho_base, modo)` perfila o código executado dentro do bloco, na thread atual:
+- "cprofile": estatísticas do cProfile em `<caminho_base>.prof` (snakeviz, flameprof, gprof2dot);
+- "amostragem": amostras da pilha Python a cada `intervalo_s`, gravadas como pilhas colapsadas em
+  `<caminho_base>.folded` (entrada do flamegraph.pl, speedscope e inferno).
+"""
+
+import cProfile
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+import psutil
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+MODOS_PERFIL = ("cprofile", "amostragem")
+
+
+class Trecho:
+    """
+    Trecho medido; usado como context manager (`with medir(...) as trecho`) ou decorador.
+
+    Attributes:
+        nome (str): Nome do trecho.
+        linhas (int ou None): Linhas processadas no trecho (pode ser definido dentro do bloco).
+        caminho (str): Nomes dos trechos abertos na mesma thread, do mais externo a este.
+        tempo_s (float): Tempo de parede.
+        cpu_s (float): Tempo de CPU do processo (inclui threads do Arrow, BLAS etc.).
+        pico_rss (int): Maior RSS do processo observado enquanto o trecho esteve aberto.
+    """
+
+    def __init__(self, nome, linhas=None, rastreador=None):
+        self.nome = nome
+        self.linhas = linhas
+        self.caminho = nome
+        self.tempo_s = 0.0
+        self.cpu_s = 0.0
+        self.pico_rss = 0
+        self._rastreador = rastreador
+        self._inicio_epoca = 0.0
+        self._inicio = 0.0
+        self._inicio_cpu = 0.0
+
+    def __enter__(self):
+        (self._rastreador or RASTREADOR).abrir(self)
+        self._inicio_epoca = time.time()
+        self._inicio_cpu = time.process_time()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tempo_s = time.perf_counter() - self._inicio
+        self.cpu_s = time.process_time() - self._inicio_cpu
+        (self._rastreador or RASTREADOR).fechar(self)
+        return False
+
+    def __call__(self, funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            # Um trecho novo a cada chamada: o decorador pode ser usado em várias threads ao mesmo tempo
+            with Trecho(self.nome, self.linhas, self._rastreador):
+                return funcao(*args, **kwargs)
+        return medida
+
+    def evento(self):
+        """Registro do trecho no formato Trace Event (evento completo, "ph": "X")."""
+        args = {"cpu_s": self.cpu_s, "pico_rss_mb": self.pico_rss / 2**20}
+        if self.linhas is not None:
+            args["linhas"] = int(self.linhas)
+        return {
+            "name": self.nome, "cat": self.caminho, "ph": "X",
+            "ts": self._inicio_epoca * 1e6, "dur": self.tempo_s * 1e6,
+            "pid": os.getpid(), "tid": threading.get_ident(), "args": args,
+        }
+
+
+class Rastreador:
+    """
+    Acumula os trechos medidos no processo e amostra o RSS enquanto há trechos abertos.
+
+    Args:
+        intervalo_memoria_s (float, opcional): Intervalo de amostragem do RSS (default: 0.02 s).
+        max_trechos (int, opcional): Quantidade máxima de trechos concluídos mantidos; os mais
+            antigos são descartados primeiro (default: 100.000).
+    """
+
+    def __init__(self, intervalo_memoria_s=0.02, max_trechos=100_000):
+        self.intervalo_memoria_s = intervalo_memoria_s
+        self._concluidos = deque(maxlen=max_trechos)
+        self._abertos = []
+        self._local = threading.local()
+        self._trava = threading.Lock()
+        self._ha_abertos = threading.Event()
+        self._processo = psutil.Process()
+        self._thread = None
+
+    def _pilha(self):
+        if not hasattr(self._local, "pilha"):
+            self._local.pilha = []
+        return self._local.pilha
+
+    def _amostrar(self):
+        while self._ha_abertos.wait():
+            rss = self._processo.memory_info().rss
+            with self._trava:
+                for trecho in self._abertos:
+                    trecho.pico_rss = max(trecho.pico_rss, rss)
+            time.sleep(self.intervalo_memoria_s)
+
+    def abrir(self, trecho):
+        """Registra a abertura de um trecho na thread atual."""
+        pilha = self._pilha()
+        if pilha:
+            trecho.caminho = f"{pilha[-1].caminho}/{trecho.nome}"
+        pilha.append(trecho)
+        trecho.pico_rss = self._processo.memory_info().rss
+        with self._trava:
+            self._abertos.append(trecho)
+            self._ha_abertos.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._amostrar, name="instrumentacao-rss", daemon=True)
+                self._thread.start()
+
+    def fechar(self, trecho):
+        """Registra o fechamento de um trecho aberto na thread atual."""
+        trecho.pico_rss = max(trecho.pico_rss, self._processo.memory_info().rss)
+        pilha = self._pilha()
+        if trecho in pilha:
+            pilha.remove(trecho)
+        with self._trava:
+            self._abertos.remove(trecho)
+            if not self._abertos:
+                self._ha_abertos.clear()
+            self._concluidos.append(trecho)
+
+    def trechos(self, raiz=None):
+        """
+        Trechos concluídos, opcionalmente apenas os de uma raiz.
+
+        Args:
+            raiz (str, opcional): Nome do trecho raiz (ou prefixo de nome com "/"); seleciona os
+                trechos cujo caminho começa por ela.
+
+        Returns:
+            list[Trecho]: Trechos na ordem de conclusão.
+        """
+        with self._trava:
+            trechos = list(self._concluidos)
+        if raiz is None:
+            return trechos
+        return [t for t in trechos if t.caminho == raiz or t.caminho.startswith(f"{raiz}/")]
+
+    def descartar(self, raiz=None):
+        """Remove os trechos concluídos (todos ou apenas os de uma raiz)."""
+        removidos = {id(t) for t in self.trechos(raiz)}
+        manter = [t for t in self.trechos() if id(t) not in removidos]
+        with self._trava:
+            self._concluidos.clear()
+            self._concluidos.extend(manter)
+
+
+RASTREADOR = Rastreador()
+
+
+def medir(nome, linhas=None):
+    """
+    Mede um trecho de código (context manager) ou cada chamada de uma função (decorador).
+
+    Args:
+        nome (str): Nome do trecho.
+        linhas (int, opcional): Linhas processadas, para o cálculo de linhas/s; também pode ser
+            definido dentro do bloco (`trecho.linhas = ...`).
+
+    Returns:
+        Trecho: Trecho a ser aberto com `with` ou aplicado como decorador.
+    """
+    return Trecho(nome, linhas)
+
+
+def medir_lotes(nome, lotes):
+    """
+    Mede a produção de cada lote de um iterador (ex.: leitura de parquet em lotes).
+
+    Args:
+        nome (str): Nome dos trechos, um por lote produzido.
+        lotes (Iterable): Lotes com `num_rows` ou `len`.
+
+    Returns:
+        Iterator: Os mesmos lotes, na mesma ordem.
+    """
+    iterador = iter(lotes)
+    while True:
+        with medir(nome) as trecho:
+            lote = next(iterador, None)
+            if lote is not None:
+                trecho.linhas = lote.num_rows if hasattr(lote, "num_rows") else len(lote)
+        if lote is None:
+            return
+        yield lote
+
+
+def resumo(raiz=None):
+    """
+    Agrega os trechos concluídos por caminho.
+
+    Args:
+        raiz (str, opcional): Considera apenas os trechos da raiz; os caminhos ficam relativos a
+            ela e o próprio trecho raiz aparece como "total".
+
+    Returns:
+        dict: {caminho: {"chamadas", "tempo_s", "cpu_s", "pico_rss_mb", "linhas", "linhas_por_s"}}
+    """
+    agregado = {}
+    for trecho in RASTREADOR.trechos(raiz):
+        caminho = trecho.caminho if raiz is None else (trecho.caminho[len(raiz) + 1:] or "total")
+        item = agregado.setdefault(caminho, {"chamadas": 0, "tempo_s": 0.0, "cpu_s": 0.0,
+                                             "pico_rss_mb": 0.0, "linhas": None})
+        item["chamadas"] += 1
+        item["tempo_s"] += trecho.tempo_s
+        item["cpu_s"] += trecho.cpu_s
+        item["pico_rss_mb"] = max(item["pico_rss_mb"], trecho.pico_rss / 2**20)
+        if trecho.linhas is not None:
+            item["linhas"] = (item["linhas"] or 0) + int(trecho.linhas)
+    for item in agregado.values():
+        item["linhas_por_s"] = item["linhas"] / max(item["tempo_s"], 1e-9) if item["linhas"] else None
+    return agregado
+
+
+def metricas_mlflow(agregado):
+    """
+    Converte um resumo em métricas do MLflow ("perf/<caminho>/<medida>").
+
+    Args:
+        agregado (dict): Resultado de `resumo`.
+
+    Returns:
+        dict: Métricas numéricas (linhas/s apenas para trechos com linhas informadas).
+    """
+    metricas = {}
+    for caminho, item in agregado.items():
+        for medida in ("tempo_s", "cpu_s", "pico_rss_mb", "linhas_por_s"):
+            if item[medida] is not None:
+                metricas[f"perf/{caminho}/{medida}"] = item[medida]
+    return metricas
+
+
+def trace(raiz=None):
+    """Trace dos trechos concluídos no formato Trace Event, com o resumo agregado."""
+    return {
+        "traceEvents": [t.evento() for t in RASTREADOR.trechos(raiz)],
+        "displayTimeUnit": "ms",
+        "resumo": resumo(raiz),
+    }
+
+
+def registrar_mlflow(raiz):
+    """
+    Registra o resumo de uma raiz na rodada ativa do MLflow (métricas e `instrumentacao.json`).
+
+    Deve ser chamado dentro de um `mlflow.start_run`; os trechos ainda abertos (como a própria
+    raiz) não entram no resumo.
+
+    Args:
+        raiz (str): Nome do trecho raiz da etapa.
+
+    Returns:
+        None
+    """
+    import mlflow
+
+    mlflow.log_metrics(metricas_mlflow(resumo(raiz)))
+    mlflow.log_dict(trace(raiz), "instrumentacao.json")
+
+
+def gravar_trace(caminho, raiz=None):
+    """
+    Grava o trace em JSON (gravação atômica).
+
+    Args:
+        caminho (str): Arquivo .json de saída.
+        raiz (str, opcional): Grava apenas os trechos da raiz.
+
+    Returns:
+        None
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(trace(raiz), arquivo)
+    os.replace(temporario, caminho)
+
+
+def registrar_log(raiz=None):
+    """Exibe no log os trechos agregados, do mais demorado ao mais rápido."""
+    for caminho, item in sorted(resumo(raiz).items(), key=lambda par: -par[1]["tempo_s"]):
+        vazao = f" | {item['linhas_por_s']:,.0f} linhas/s" if item["linhas_por_s"] else ""
+        logging.info(f"⏱️ {caminho}: {item['tempo_s']:.3f} s ({item['chamadas']}x) | CPU {item['cpu_s']:.3f} s | "
+                     f"pico RSS {item['pico_rss_mb']:,.1f} MB{vazao}")
+
+
+def _rotulo_quadro(quadro):
+    codigo = quadro.f_code
+    return f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+
+
+def _amostrar_pilhas(id_thread, intervalo_s, parar, contagens):
+    """Conta as pilhas Python da thread `id_thread`, da raiz à folha, até `parar` ser sinalizado."""
+    while not parar.wait(intervalo_s):
+        quadro = sys._current_frames().get(id_thread)
+        pilha = []
+        while quadro is not None:
+            pilha.append(_rotulo_quadro(quadro))
+            quadro = quadro.f_back
+        if pilha:
+            contagens[";".join(reversed(pilha))] += 1
+
+
+@contextmanager
+def perfilar(caminho_base, modo="cprofile", intervalo_s=0.005):
+    """
+    Perfila o bloco na thread atual, gravando uma saída pronta para flame graphs.
+
+    Args:
+        caminho_base (str): Caminho de saída, sem extensão (".prof" ou ".folded" é acrescentado).
+        modo (str, opcional): "cprofile" (determinístico) ou "amostragem" (default: "cprofile").
+        intervalo_s (float, opcional): Intervalo entre amostras no modo "amostragem" (default: 0.005 s).
+
+    Yields:
+        str: Caminho do arquivo que será gravado ao fim do bloco.
+
+    Raises:
+        ValueError: Se o modo não for um de `MODOS_PERFIL`.
+    """
+    if modo not in MODOS_PERFIL:
+        raise ValueError(f"❌ Modo de perfil inválido: {modo} (use um de {MODOS_PERFIL})")
+    os.makedirs(os.path.dirname(os.path.abspath(caminho_base)), exist_ok=True)
+
+    if modo == "cprofile":
+        caminho = f"{caminho_base}.prof"
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+        try:
+            yield caminho
+        finally:
+            perfilador.disable()
+            perfilador.dump_stats(caminho)
+    else:
+        caminho = f"{caminho_base}.folded"
+        contagens, parar = Counter(), threading.Event()
+        amostrador = threading.Thread(target=_amostrar_pilhas, name="instrumentacao-perfil", daemon=True,
+                                      args=(threading.get_ident(), intervalo_s, parar, contagens))
+        amostrador.start()
+        try:
+            yield caminho
+        finally:
+            parar.set()
+            amostrador.join()
+            with open(caminho, "w", encoding="utf-8") as arquivo:
+                arquivo.writelines(f"{pilha} {n}\n" for pilha, n in contagens.most_common())
+    logging.info(f"🔥 Perfil ({modo}) gravado em {caminho}")
@@ -0,0 +1,195 @@
+"""
+Motor vetorizado da preparação de dados: filtro de nulos, clipping e validação em uma passada.
+
+As colunas de cada lote são copiadas uma única vez para uma matriz float64 contígua por
+coluna (ordem Fortran). Sobre essa matriz, em uma única passada NumPy:
+- as linhas com algum valor nulo (NaN) são marcadas;
+- os limites de `LIMITES_FEATURES` são aplicados no lugar (`np.clip(..., out=...)`);
+- as linhas válidas são conferidas contra o schema compacto (inteiros exatos e dentro do
+  intervalo do tipo, alvo em {0, 1}).
+
+As bases de desenvolvimento e produção são empilhadas na mesma matriz e processadas juntas
+(`preparar_tabelas`). Para bases maiores que a memória, `preparar_lotes` aplica a mesma
+passada lote a lote (usado por `data_preparation.preparar_dados` com `tamanho_lote`).
+"""
+
+import logging
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from esquema_arremessos import esquema_para
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+LIMITES_INTEIROS = {pa.int8(): (-128, 127)}
+
+
+class Throughput:
+    """
+    Acumula linhas e bytes processados pelo motor e o tempo gasto.
+
+    Attributes:
+        linhas_lidas (int): Linhas recebidas.
+        linhas_validas (int): Linhas mantidas após o filtro de nulos.
+        bytes_lidos (int): Tamanho dos lotes Arrow recebidos.
+        segundos (float): Tempo de processamento (sem leitura e gravação).
+    """
+
+    def __init__(self):
+        self.linhas_lidas = 0
+        self.linhas_validas = 0
+        self.bytes_lidos = 0
+        self.segundos = 0.0
+
+    def resumo(self):
+        """
+        Calcula as taxas de processamento.
+
+        Returns:
+            dict: Linhas lidas/válidas, linhas por segundo e MB por segundo.
+        """
+        segundos = max(self.segundos, 1e-9)
+        return {
+            "linhas_lidas": self.linhas_lidas,
+            "linhas_validas": self.linhas_validas,
+            "linhas_por_s": self.linhas_lidas / segundos,
+            "mb_por_s": self.bytes_lidos / segundos / 2**20,
+        }
+
+    def registrar_log(self, rotulo):
+        r = self.resumo()
+        logging.info(f"⚡ {rotulo}: {r['linhas_lidas']:,} linhas ({r['linhas_validas']:,} válidas) | "
+                     f"{r['linhas_por_s']:,.0f} linhas/s | {r['mb_por_s']:,.1f} MB/s")
+
+
+def montar_matriz(tabelas, colunas):
+    """
+    Copia as colunas de uma ou mais tabelas Arrow, empilhadas, para uma matriz contígua por coluna.
+
+    Args:
+        tabelas (list[pa.Table]): Tabelas com as colunas informadas.
+        colunas (list[str]): Colunas, na ordem das colunas da matriz.
+
+    Returns:
+        np.ndarray: Matriz float64 (linhas × colunas) em ordem Fortran, com nulos como NaN.
+    """
+    matriz = np.empty((sum(t.num_rows for t in tabelas), len(colunas)), dtype=np.float64, order="F")
+    for j, coluna in enumerate(colunas):
+        inicio = 0
+        for tabela in tabelas:
+            fim = inicio + tabela.num_rows
+            matriz[inicio:fim, j] = tabela.column(coluna).to_numpy()
+            inicio = fim
+    return matriz
+
+
+def processar_matriz(matriz, colunas, limites):
+    """
+    Marca as linhas sem nulos, aplica o clipping no lugar e valida as linhas mantidas.
+
+    Args:
+        matriz (np.ndarray): Matriz de `montar_matriz` (alterada no lugar).
+        colunas (list[str]): Colunas da matriz.
+        limites (dict): {"coluna": (min, max)} do clipping.
+
+    Returns:
+        np.ndarray: Máscara booleana das linhas válidas.
+
+    Raises:
+        ValueError: Se alguma linha válida não couber no schema compacto.
+    """
+    validos = ~np.isnan(matriz).any(axis=1)
+
+    for coluna, (minimo, maximo) in limites.items():
+        j = colunas.index(coluna)
+        np.clip(matriz[:, j], minimo, maximo, out=matriz[:, j])
+
+    problemas = []
+    for j, campo in enumerate(esquema_para(colunas)):
+        if campo.type not in LIMITES_INTEIROS:
+            continue
+        valores = matriz[validos, j]
+        minimo, maximo = (0, 1) if campo.name == "shot_made_flag" else LIMITES_INTEIROS[campo.type]
+        invalidos = int(np.count_nonzero((valores != np.floor(valores)) | (valores < minimo) | (valores > maximo)))
+        if invalidos:
+            problemas.append(f"{campo.name}: {invalidos} valores fora de {campo.type} [{minimo}, {maximo}]")
+    if problemas:
+        raise ValueError("❌ Features inválidas na preparação:\n" + "\n".join(problemas))
+    return validos
+
+
+def tabela_de_matriz(matriz, colunas):
+    """
+    Converte as linhas de uma matriz processada em tabela Arrow no schema compacto.
+
+    Args:
+        matriz (np.ndarray): Matriz apenas com linhas válidas.
+        colunas (list[str]): Colunas da matriz.
+
+    Returns:
+        pa.Table: Tabela com os tipos de `ESQUEMA_ARREMESSOS`.
+    """
+    esquema = esquema_para(colunas)
+    return pa.table(
+        [pa.array(matriz[:, j].astype(campo.type.to_pandas_dtype())) for j, campo in enumerate(esquema)],
+        schema=esquema
+    )
+
+
+def preparar_tabelas(tabelas, colunas, limites):
+    """
+    Processa várias tabelas (ex.: desenvolvimento e produção) em uma única passada vetorizada.
+
+    Args:
+        tabelas (dict): {nome: pa.Table} com as colunas informadas.
+        colunas (list[str]): Colunas a processar.
+        limites (dict): {"coluna": (min, max)} do clipping.
+
+    Returns:
+        tuple: ({nome: pa.Table no schema compacto, sem nulos e com clipping}, Throughput)
+    """
+    throughput = Throughput()
+    inicio = time.perf_counter()
+
+    matriz = montar_matriz(list(tabelas.values()), colunas)
+    validos = processar_matriz(matriz, colunas, limites)
+
+    resultado, linha = {}, 0
+    for nome, tabela in tabelas.items():
+        fatia = slice(linha, linha + tabela.num_rows)
+        resultado[nome] = tabela_de_matriz(matriz[fatia][validos[fatia]], colunas)
+        linha += tabela.num_rows
+
+    throughput.segundos = time.perf_counter() - inicio
+    throughput.linhas_lidas = matriz.shape[0]
+    throughput.linhas_validas = int(validos.sum())
+    throughput.bytes_lidos = sum(t.nbytes for t in tabelas.values())
+    return resultado, throughput
+
+
+def preparar_lotes(lotes, colunas, limites, throughput):
+    """
+    Processa lotes de um arquivo, um a um, devolvendo as tabelas compactas.
+
+    Args:
+        lotes (Iterable[pa.Table]): Lotes com as colunas informadas (ex.: `acesso_dados.ler_lotes`).
+        colunas (list[str]): Colunas a processar.
+        limites (dict): {"coluna": (min, max)} do clipping.
+        throughput (Throughput): Acumulador das estatísticas de processamento.
+
+    Returns:
+        Iterator[pa.Table]: Lotes no schema compacto, sem nulos e com clipping.
+    """
+    for lote in lotes:
+        inicio = time.perf_counter()
+        matriz = montar_matriz([lote], colunas)
+        validos = processar_matriz(matriz, colunas, limites)
+        tabela = tabela_de_matriz(matriz[validos], colunas)
+        throughput.segundos += time.perf_counter() - inicio
+        throughput.linhas_lidas += matriz.shape[0]
+        throughput.linhas_validas += tabela.num_rows
+        throughput.bytes_lidos += lote.nbytes
+        yield tabela
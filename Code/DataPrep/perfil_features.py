@@ -0,0 +1,286 @@
+"""
+Perfil das features para monitoramento de drift: digestos de quantis e referência de PSI.
+
+Cada feature é resumida por um `DigestoQuantis`, um histograma sobre uma grade fixa (com
+células extras para valores abaixo e acima da grade), que pode ser atualizado lote a lote e
+consultado para quantis aproximados:
+- features int8 do schema compacto: uma célula por valor inteiro (contagens exatas);
+- features float: `CELULAS_CONTINUAS` células entre os limites de clipping da preparação.
+
+A referência (`calcular_referencia`) é calculada sobre a base de treino gerada pela
+preparação e gravada em `referencia_monitoramento.json`. Para cada feature ela guarda a
+grade, o digesto e as faixas do PSI: um valor por faixa nas features discretas e decis nas
+contínuas, sempre com limites nas fronteiras das células, de modo que o PSI da produção é
+obtido direto das contagens do digesto (ver `Operationalization/monitoramento.py`).
+"""
+
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+
+from esquema_arremessos import esquema_para
+
+CELULAS_CONTINUAS = 1000
+QUANTIS_RESUMO = (0.05, 0.25, 0.5, 0.75, 0.95)
+EPSILON_PSI = 1e-4
+
+
+class DigestoQuantis:
+    """
+    Histograma de grade fixa com mínimo, máximo e nulos, para quantis e PSI em fluxo.
+
+    As contagens têm `n_celulas + 2` posições: a primeira acumula os valores abaixo de
+    `inicio` e a última os valores a partir de `fim`.
+
+    Args:
+        inicio (float): Limite inferior da grade.
+        fim (float): Limite superior da grade.
+        n_celulas (int): Quantidade de células de mesma largura entre `inicio` e `fim`.
+        discreta (bool, opcional): Se True, cada célula representa um único valor inteiro (o
+            centro; grade de largura 1 com limites em meio inteiro), e os quantis não são
+            interpolados (default: False).
+    """
+
+    def __init__(self, inicio, fim, n_celulas, discreta=False):
+        self.inicio = float(inicio)
+        self.fim = float(fim)
+        self.n_celulas = int(n_celulas)
+        self.discreta = bool(discreta)
+        self.largura = (self.fim - self.inicio) / self.n_celulas
+        self.contagens = np.zeros(self.n_celulas + 2, dtype=np.int64)
+        self.nulos = 0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+
+    @property
+    def total(self):
+        """Quantidade de valores não nulos."""
+        return int(self.contagens.sum())
+
+    def celulas(self, valores):
+        """Índice da célula de cada valor (0 = abaixo da grade, `n_celulas + 1` = acima)."""
+        # Com o clipping antes da conversão os índices são não negativos, e truncar equivale a floor
+        indices = (valores - self.inicio) / self.largura + 1
+        return np.clip(indices, 0, self.n_celulas + 1, out=indices).astype(np.int64)
+
+    def atualizar(self, valores):
+        """
+        Incorpora um lote de valores.
+
+        Args:
+            valores (np.ndarray): Valores da feature (NaN é contado como nulo).
+
+        Returns:
+            None
+        """
+        valores = np.asarray(valores)
+        if not valores.size:
+            return
+        if valores.dtype == np.int8 and (self.inicio, self.n_celulas) == (-128.5, 256):
+            # int8 na grade de todos os valores do tipo: conta os bytes e gira a contagem para
+            # a ordem de -128 a 127 (os negativos aparecem como 128..255 sem sinal)
+            self.contagens[1:-1] += np.roll(np.bincount(valores.view(np.uint8), minlength=256), 128)
+        else:
+            if valores.dtype.kind == "f":
+                nulos = np.isnan(valores)
+                quantidade_nulos = int(np.count_nonzero(nulos))
+                if quantidade_nulos:
+                    self.nulos += quantidade_nulos
+                    valores = valores[~nulos]
+                if not valores.size:
+                    return
+            celulas = self.celulas(valores.astype(np.float64))
+            self.contagens += np.bincount(celulas, minlength=self.n_celulas + 2)
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+
+    def fronteiras(self):
+        """Limites de cada célula, incluindo as extremidades abertas (limitadas a mínimo e máximo)."""
+        grade = self.inicio + self.largura * np.arange(self.n_celulas + 1)
+        return np.concatenate([[min(self.minimo, self.inicio)], grade, [max(self.maximo, self.fim)]])
+
+    def quantil(self, q):
+        """
+        Quantil aproximado, com interpolação linear dentro da célula (ou o valor da célula,
+        nos digestos discretos).
+
+        Args:
+            q (float): Quantil entre 0 e 1.
+
+        Returns:
+            float: Valor do quantil (NaN se o digesto estiver vazio).
+        """
+        total = self.total
+        if not total:
+            return float("nan")
+        acumulado = np.cumsum(self.contagens)
+        alvo = q * total
+        celula = int(np.searchsorted(acumulado, alvo, side="left"))
+        if self.discreta and 0 < celula <= self.n_celulas:
+            return self.inicio + self.largura * (celula - 0.5)
+        anterior = acumulado[celula - 1] if celula else 0
+        fronteiras = self.fronteiras()
+        fracao = (alvo - anterior) / self.contagens[celula] if self.contagens[celula] else 0.0
+        valor = fronteiras[celula] + fracao * (fronteiras[celula + 1] - fronteiras[celula])
+        return float(np.clip(valor, self.minimo, self.maximo))
+
+    def para_dict(self):
+        """Representação serializável em JSON."""
+        return {
+            "inicio": self.inicio, "fim": self.fim, "n_celulas": self.n_celulas, "discreta": self.discreta,
+            "contagens": self.contagens.tolist(), "nulos": self.nulos,
+            "minimo": None if np.isinf(self.minimo) else self.minimo,
+            "maximo": None if np.isinf(self.maximo) else self.maximo,
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Reconstrói um digesto gravado com `para_dict`."""
+        digesto = cls(dados["inicio"], dados["fim"], dados["n_celulas"], dados["discreta"])
+        digesto.contagens = np.asarray(dados["contagens"], dtype=np.int64)
+        digesto.nulos = dados["nulos"]
+        digesto.minimo = np.inf if dados["minimo"] is None else dados["minimo"]
+        digesto.maximo = -np.inf if dados["maximo"] is None else dados["maximo"]
+        return digesto
+
+    def vazio(self):
+        """Novo digesto, sem valores, com a mesma grade."""
+        return DigestoQuantis(self.inicio, self.fim, self.n_celulas, self.discreta)
+
+
+def grade_feature(coluna, limites):
+    """
+    Grade do digesto de uma feature do schema compacto.
+
+    Args:
+        coluna (str): Nome da feature.
+        limites (dict): {"coluna": (min, max)} do clipping da preparação.
+
+    Returns:
+        tuple: (inicio, fim, n_celulas, tipo), com tipo "discreta" ou "continua".
+
+    Raises:
+        ValueError: Se a feature for contínua e não tiver limites de clipping.
+    """
+    tipo = esquema_para([coluna]).field(coluna).type
+    if pa.types.is_integer(tipo):
+        return -128.5, 127.5, 256, "discreta"
+    if coluna not in limites:
+        raise ValueError(f"❌ Feature contínua sem limites de clipping para o digesto: {coluna}")
+    minimo, maximo = limites[coluna]
+    return minimo, maximo, CELULAS_CONTINUAS, "continua"
+
+
+def faixas_psi(digesto, tipo, n_faixas=10):
+    """
+    Define as faixas do PSI como grupos de células do digesto de referência.
+
+    Args:
+        digesto (DigestoQuantis): Digesto da base de treino.
+        tipo (str): "discreta" (uma faixa por valor observado) ou "continua" (quantis).
+        n_faixas (int, opcional): Quantidade de faixas das features contínuas (default: 10).
+
+    Returns:
+        list[int]: Índices das células onde começa cada faixa, a partir da segunda (a primeira
+        faixa sempre inclui a célula dos valores abaixo da grade, e a última a dos valores acima).
+    """
+    ocupadas = np.flatnonzero(digesto.contagens)
+    if tipo == "discreta":
+        return ocupadas[1:].tolist()
+    acumulado = np.cumsum(digesto.contagens) / max(digesto.total, 1)
+    cortes = np.searchsorted(acumulado, np.arange(1, n_faixas) / n_faixas, side="left") + 1
+    return sorted(set(int(c) for c in cortes if 0 < c < len(digesto.contagens)))
+
+
+def contagens_faixas(digesto, inicios):
+    """Soma as contagens do digesto em cada faixa do PSI."""
+    return np.add.reduceat(digesto.contagens, np.concatenate([[0], inicios]).astype(np.int64))
+
+
+def psi(contagens_referencia, contagens_atuais, epsilon=EPSILON_PSI):
+    """
+    Population Stability Index entre duas distribuições sobre as mesmas faixas.
+
+    Args:
+        contagens_referencia (np.ndarray): Contagens da base de referência.
+        contagens_atuais (np.ndarray): Contagens da base monitorada.
+        epsilon (float, opcional): Proporção mínima por faixa, evitando log(0) (default: 1e-4).
+
+    Returns:
+        float: PSI (NaN se alguma das bases estiver vazia).
+    """
+    if not contagens_referencia.sum() or not contagens_atuais.sum():
+        return float("nan")
+    esperado = np.maximum(contagens_referencia / contagens_referencia.sum(), epsilon)
+    observado = np.maximum(contagens_atuais / contagens_atuais.sum(), epsilon)
+    return float(np.sum((observado - esperado) * np.log(observado / esperado)))
+
+
+def calcular_referencia(lotes, features, limites):
+    """
+    Calcula a referência de monitoramento a partir de lotes da base de treino.
+
+    Args:
+        lotes (Iterable[pa.Table ou pa.RecordBatch]): Lotes com as features no schema compacto.
+        features (list[str]): Features monitoradas.
+        limites (dict): {"coluna": (min, max)} do clipping da preparação.
+
+    Returns:
+        dict: {"linhas": ..., "features": {feature: {"tipo", "digesto", "faixas_psi", "quantis"}}}
+    """
+    grades = {f: grade_feature(f, limites) for f in features}
+    digestos = {f: DigestoQuantis(*grades[f][:3], discreta=grades[f][3] == "discreta") for f in features}
+    linhas = 0
+    for lote in lotes:
+        linhas += lote.num_rows
+        for feature in features:
+            digestos[feature].atualizar(lote.column(feature).to_numpy(zero_copy_only=False))
+
+    return {
+        "linhas": linhas,
+        "features": {
+            feature: {
+                "tipo": grades[feature][3],
+                "digesto": digesto.para_dict(),
+                "faixas_psi": faixas_psi(digesto, grades[feature][3]),
+                "quantis": {f"p{int(q * 100):02d}": digesto.quantil(q) for q in QUANTIS_RESUMO},
+            }
+            for feature, digesto in digestos.items()
+        },
+    }
+
+
+def gravar_referencia(referencia, caminho):
+    """
+    Grava a referência em JSON (gravação atômica).
+
+    Args:
+        referencia (dict): Referência de `calcular_referencia`.
+        caminho (str): Arquivo .json de saída.
+
+    Returns:
+        None
+    """
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(referencia, arquivo)
+    os.replace(temporario, caminho)
+
+
+def ler_referencia(caminho):
+    """
+    Lê a referência gravada por `gravar_referencia`.
+
+    Args:
+        caminho (str): Arquivo .json da referência.
+
+    Returns:
+        dict: Referência com os digestos reconstruídos (`DigestoQuantis`).
+    """
+    with open(caminho, "r", encoding="utf-8") as arquivo:
+        referencia = json.load(arquivo)
+    for perfil in referencia["features"].values():
+        perfil["digesto"] = DigestoQuantis.de_dict(perfil["digesto"])
+    return referencia
@@ -0,0 +1,226 @@
+"""
+Análise do threshold de decisão: métricas para todos os thresholds candidatos e escolha do ponto de operação.
+
+Uma varredura calcula, para cada threshold candidato `t` (arremesso previsto como acerto se
+`proba >= t`), as contagens da matriz de confusão, precisão, recall, F1 e o custo esperado por
+arremesso (`custo_fp * FP + custo_fn * FN`, dividido pelo total de linhas). Há dois modos:
+- `varrer_thresholds`: exato. As probabilidades são ordenadas uma única vez (decrescente) e as
+  contagens de todos os thresholds saem de uma soma acumulada; os candidatos são os valores
+  distintos de probabilidade.
+- `varrer_histogramas`: a partir das contagens por faixa de probabilidade de cada classe real,
+  acumuladas em streaming (ex.: `MetricasIncrementais` da aplicação). Os candidatos são os
+  limites inferiores das faixas, e o custo não depende do tamanho da base.
+
+A primeira linha de toda varredura é o threshold `inf` (nenhum acerto previsto), de modo que
+qualquer threshold tem um ponto correspondente em `ponto_operacao`.
+
+Sem restrições, o maior F1 tende ao threshold que prevê quase tudo como acerto (recall 1 e
+precisão igual à taxa de acertos da base). `escolher_threshold` aceita uma fração mínima de
+linhas em cada classe prevista (`FRACAO_MINIMA_CLASSE` no treinamento), que descarta esses
+pontos degenerados; a aplicação avisa quando a pontuação da produção sai desse intervalo.
+
+O threshold escolhido no treinamento é gravado ao lado do modelo (`<modelo>_threshold.json`) e
+lido pela aplicação quando nenhum threshold é informado.
+"""
+
+import json
+import logging
+import os
+
+import numpy as np
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+CRITERIOS = ("f1", "custo")
+
+# Fração mínima das linhas em cada classe prevista (acerto e erro) no ponto de operação
+FRACAO_MINIMA_CLASSE = 0.05
+
+
+def _metricas(thresholds, vp, fp, positivos, negativos, custo_fp, custo_fn):
+    """Métricas de cada threshold a partir das contagens acumuladas de verdadeiros e falsos positivos."""
+    vp = np.asarray(vp, dtype=np.int64)
+    fp = np.asarray(fp, dtype=np.int64)
+    fn = positivos - vp
+    previstos = vp + fp
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precisao = np.where(previstos > 0, vp / previstos, 0.0)
+        recall = np.where(positivos > 0, vp / max(positivos, 1), 0.0)
+        f1 = np.where(2 * vp + fp + fn > 0, 2 * vp / (2 * vp + fp + fn), 0.0)
+    return {
+        "threshold": np.asarray(thresholds, dtype=np.float64),
+        "vp": vp,
+        "fp": fp,
+        "fn": fn,
+        "vn": negativos - fp,
+        "precision": precisao,
+        "recall": recall,
+        "f1": f1,
+        "custo": (custo_fp * fp + custo_fn * fn) / max(positivos + negativos, 1),
+    }
+
+
+def varrer_thresholds(y_true, proba, custo_fp=1.0, custo_fn=1.0):
+    """
+    Varredura exata: métricas para cada valor distinto de probabilidade usado como threshold.
+
+    Args:
+        y_true (array-like): Classes reais (0/1); linhas nulas são ignoradas.
+        proba (array-like): Probabilidades previstas da classe 1.
+        custo_fp (float, opcional): Custo de um falso positivo (default: 1.0).
+        custo_fn (float, opcional): Custo de um falso negativo (default: 1.0).
+
+    Returns:
+        dict: Arrays "threshold" (decrescente, começando em inf), "vp", "fp", "fn", "vn",
+        "precision", "recall", "f1" e "custo".
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    proba = np.asarray(proba, dtype=np.float64)
+    validos = ~np.isnan(y_true)
+    y_true, proba = y_true[validos], proba[validos]
+
+    ordem = np.argsort(-proba, kind="stable")
+    proba_ordenada = proba[ordem]
+    acertos = np.cumsum(y_true[ordem] == 1)
+    # Último índice de cada grupo de probabilidades iguais: todas entram juntas no threshold
+    fim_grupo = np.flatnonzero(np.diff(proba_ordenada, append=-np.inf) != 0)
+
+    positivos = int(acertos[-1]) if len(acertos) else 0
+    negativos = len(y_true) - positivos
+    vp = np.concatenate([[0], acertos[fim_grupo]])
+    fp = np.concatenate([[0], fim_grupo + 1 - acertos[fim_grupo]])
+    thresholds = np.concatenate([[np.inf], proba_ordenada[fim_grupo]])
+    return _metricas(thresholds, vp, fp, positivos, negativos, custo_fp, custo_fn)
+
+
+def varrer_histogramas(contagens_negativos, contagens_positivos, limites, custo_fp=1.0, custo_fn=1.0):
+    """
+    Varredura a partir dos histogramas das probabilidades por classe real (modo streaming).
+
+    Args:
+        contagens_negativos (array-like): Linhas com classe real 0 em cada faixa de probabilidade.
+        contagens_positivos (array-like): Linhas com classe real 1 em cada faixa de probabilidade.
+        limites (array-like): Limites das faixas (uma posição a mais que as contagens), crescentes.
+        custo_fp (float, opcional): Custo de um falso positivo (default: 1.0).
+        custo_fn (float, opcional): Custo de um falso negativo (default: 1.0).
+
+    Returns:
+        dict: Mesmo formato de `varrer_thresholds`, com os limites inferiores das faixas como thresholds.
+    """
+    negativos_faixa = np.asarray(contagens_negativos, dtype=np.int64)
+    positivos_faixa = np.asarray(contagens_positivos, dtype=np.int64)
+    limites = np.asarray(limites, dtype=np.float64)
+
+    # Soma acumulada da faixa mais alta para a mais baixa: linhas com proba >= limite inferior
+    vp = np.concatenate([[0], np.cumsum(positivos_faixa[::-1])])
+    fp = np.concatenate([[0], np.cumsum(negativos_faixa[::-1])])
+    thresholds = np.concatenate([[np.inf], limites[:-1][::-1]])
+    return _metricas(thresholds, vp, fp, int(positivos_faixa.sum()), int(negativos_faixa.sum()),
+                     custo_fp, custo_fn)
+
+
+def ponto_operacao(varredura, threshold):
+    """
+    Métricas de um threshold qualquer, lidas da varredura.
+
+    Usa o menor candidato maior ou igual a `threshold`, que separa as mesmas linhas com
+    `proba >= threshold` (no modo por histogramas, aproximado pela faixa que contém o threshold).
+
+    Args:
+        varredura (dict): Resultado de `varrer_thresholds` ou `varrer_histogramas`.
+        threshold (float): Threshold de decisão.
+
+    Returns:
+        dict: Threshold candidato e suas métricas, como números Python.
+    """
+    # Candidatos em ordem decrescente (o primeiro é inf): último candidato >= threshold
+    indice = int(np.searchsorted(-varredura["threshold"], -threshold, side="right")) - 1
+    return {chave: valores[indice].item() for chave, valores in varredura.items()}
+
+
+def escolher_threshold(varredura, criterio="f1", fracao_minima=0.0):
+    """
+    Escolhe o ponto de operação: maior F1 ou menor custo esperado, entre os thresholds elegíveis.
+
+    Args:
+        varredura (dict): Resultado de `varrer_thresholds` ou `varrer_histogramas`.
+        criterio (str, opcional): "f1" ou "custo" (default: "f1").
+        fracao_minima (float, opcional): Fração mínima das linhas em cada classe prevista, acerto e
+            erro (default: 0.0, sem restrição).
+
+    Returns:
+        dict: Threshold escolhido, suas métricas e o critério.
+
+    Raises:
+        ValueError: Se o critério não for suportado ou se nenhum threshold atender à fração mínima.
+    """
+    if criterio not in CRITERIOS:
+        raise ValueError(f"❌ Critério '{criterio}' não suportado. Use um de {CRITERIOS}.")
+
+    total = max(int(varredura["vp"][0] + varredura["fp"][0] + varredura["fn"][0] + varredura["vn"][0]), 1)
+    previstos_acerto = (varredura["vp"] + varredura["fp"]) / total
+    elegiveis = np.flatnonzero((previstos_acerto >= fracao_minima) & (1.0 - previstos_acerto >= fracao_minima))
+    if len(elegiveis) == 0:
+        raise ValueError(f"❌ Nenhum threshold com ao menos {fracao_minima:.1%} das linhas em cada classe prevista.")
+
+    objetivo = varredura["f1"][elegiveis] if criterio == "f1" else -varredura["custo"][elegiveis]
+    indice = int(elegiveis[np.argmax(objetivo)])
+    ponto = {chave: valores[indice].item() for chave, valores in varredura.items()}
+    ponto["criterio"] = criterio
+    return ponto
+
+
+def caminho_threshold(caminho_modelo):
+    """
+    Arquivo do threshold gravado ao lado do modelo.
+
+    O pipeline do PyCaret (`modelo_final`) e o kernel NumPy exportado dele
+    (`modelo_final_numpy.npz`) compartilham o mesmo arquivo (`modelo_final_threshold.json`).
+
+    Args:
+        caminho_modelo (str): Caminho do modelo do PyCaret (sem extensão) ou do kernel NumPy (.npz).
+
+    Returns:
+        str: Caminho do arquivo .json.
+    """
+    base = caminho_modelo[:-len(".npz")] if caminho_modelo.endswith(".npz") else caminho_modelo
+    base = base[:-len("_numpy")] if base.endswith("_numpy") else base
+    return f"{base}_threshold.json"
+
+
+def gravar_threshold(caminho_modelo, ponto):
+    """
+    Grava o ponto de operação escolhido ao lado do modelo (gravação atômica).
+
+    Args:
+        caminho_modelo (str): Caminho do modelo (ver `caminho_threshold`).
+        ponto (dict): Resultado de `escolher_threshold`.
+
+    Returns:
+        str: Caminho do arquivo gravado.
+    """
+    caminho = caminho_threshold(caminho_modelo)
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(ponto, arquivo, indent=2)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def ler_threshold(caminho_modelo, padrao=None):
+    """
+    Lê o threshold gravado com o modelo.
+
+    Args:
+        caminho_modelo (str): Caminho do modelo (ver `caminho_threshold`).
+        padrao (float, opcional): Valor retornado se o modelo não tiver threshold gravado.
+
+    Returns:
+        float: Threshold do modelo, ou `padrao`.
+    """
+    caminho = caminho_threshold(caminho_modelo)
+    if not os.path.exists(caminho):
+        return padrao
+    with open(caminho, encoding="utf-8") as arquivo:
+        return float(json.load(arquivo)["threshold"])
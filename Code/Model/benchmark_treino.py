@@ -0,0 +1,167 @@
+"""
+Benchmark do tempo até o melhor modelo: laço sequencial original x busca paralela.
+
+Cenários medidos sobre as mesmas bases de treino/teste:
+- `sequencial_original`: o laço de `treinar_modelos` (lr e dt com hiperparâmetros padrão,
+  `create_model` + `calibrate_model` + `finalize_model`, um após o outro).
+- `busca_1_processo`: a busca de `buscar_candidatos` sobre `CANDIDATOS` em um único processo.
+- `busca_paralela`: a mesma busca distribuída em N processos.
+- `dobras_compartilhadas`: os mesmos lr e dt sobre dobras materializadas uma vez, com
+  calibração out-of-fold (ver `dobras_compartilhadas.py`).
+
+Para cada cenário são registrados o tempo total, o tempo até o melhor modelo ficar pronto e
+o F1 Score desse modelo na base de teste; os cenários com lr e dt padrão registram também a
+quantidade de ajustes do estimador, contada em cada chamada a `fit` (no laço sequencial, o
+`setup` usa `n_jobs=1` para que a validação cruzada rode no processo que conta). Nenhum modelo
+é salvo e nada é registrado no MLflow.
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+
+from pycaret.classification import setup, create_model, calibrate_model, finalize_model
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from dobras_compartilhadas import ajustar_candidato, contar_ajustes, materializar_dobras
+from train_model import buscar_candidatos, _avaliar_no_teste
+from esquema_arremessos import ler_compacta_pandas
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def medir_sequencial_original(caminho_treino, df_test):
+    """
+    Reproduz o laço sequencial de `treinar_modelos` e mede o tempo até o melhor modelo.
+
+    Args:
+        caminho_treino (str): Caminho para o arquivo .parquet com a base de treino.
+        df_test (pd.DataFrame): Base de teste.
+
+    Returns:
+        dict: Tempo total, tempo até o melhor modelo, modelo escolhido, F1 Score no teste e ajustes do estimador.
+    """
+    inicio = time.perf_counter()
+    setup(data=ler_compacta_pandas(caminho_treino), target="shot_made_flag", session_id=42,
+          log_experiment=False, fold=10, html=False, verbose=False, n_jobs=1)
+
+    melhor = {"f1_teste": -1.0}
+    with contar_ajustes([LogisticRegression, DecisionTreeClassifier]) as contador:
+        for nome_modelo in ["lr", "dt"]:
+            modelo_final = finalize_model(calibrate_model(create_model(nome_modelo, verbose=False), verbose=False))
+            _, f1 = _avaliar_no_teste(modelo_final, df_test)
+            if f1 > melhor["f1_teste"]:
+                melhor = {"modelo": nome_modelo, "f1_teste": f1, "tempo_ate_melhor_s": time.perf_counter() - inicio}
+
+    return {**melhor, "tempo_total_s": time.perf_counter() - inicio, "ajustes_estimador": contador["ajustes"]}
+
+
+def medir_dobras_compartilhadas(caminho_treino, df_test):
+    """
+    Treina lr e dt sobre dobras compartilhadas e mede o tempo até o melhor modelo.
+
+    Args:
+        caminho_treino (str): Caminho para o arquivo .parquet com a base de treino.
+        df_test (pd.DataFrame): Base de teste.
+
+    Returns:
+        dict: Tempo total, tempo até o melhor modelo, modelo escolhido, F1 Score no teste e ajustes do estimador.
+    """
+    inicio = time.perf_counter()
+    setup(data=ler_compacta_pandas(caminho_treino), target="shot_made_flag", session_id=42,
+          log_experiment=False, fold=10, html=False, verbose=False)
+    compartilhado = materializar_dobras()
+
+    melhor, ajustes = {"f1_teste": -1.0}, 0
+    for nome_modelo in ["lr", "dt"]:
+        info = ajustar_candidato(compartilhado, nome_modelo)
+        ajustes += info["ajustes"]
+        _, f1 = _avaliar_no_teste(info["modelo"], df_test)
+        if f1 > melhor["f1_teste"]:
+            melhor = {"modelo": nome_modelo, "f1_teste": f1, "tempo_ate_melhor_s": time.perf_counter() - inicio}
+
+    return {**melhor, "tempo_total_s": time.perf_counter() - inicio, "ajustes_estimador": ajustes}
+
+
+def medir_busca(caminho_treino, df_test, n_workers):
+    """
+    Executa `buscar_candidatos` e mede o tempo até o melhor modelo finalizado.
+
+    Args:
+        caminho_treino (str): Caminho para o arquivo .parquet com a base de treino.
+        df_test (pd.DataFrame): Base de teste.
+        n_workers (int): Número de processos.
+
+    Returns:
+        dict: Tempo total, tempo até o melhor modelo, configurações avaliadas e F1 Score no teste.
+    """
+    inicio = time.perf_counter()
+    resultados, finalizados = buscar_candidatos(caminho_treino, n_workers=n_workers)
+
+    melhor = {"f1_teste": -1.0}
+    for estimador, info in finalizados.items():
+        _, f1 = _avaliar_no_teste(info["modelo"], df_test)
+        if f1 > melhor["f1_teste"]:
+            melhor = {"modelo": estimador, "hiperparametros": info["hiperparametros"], "f1_teste": f1}
+
+    tempo_total = time.perf_counter() - inicio
+    return {
+        **melhor,
+        "tempo_ate_melhor_s": tempo_total,
+        "tempo_total_s": tempo_total,
+        "n_workers": n_workers,
+        "configuracoes_triagem": sum(r["rodada"] == "triagem" for r in resultados),
+        "configuracoes_completas": sum(r["rodada"] == "completa" for r in resultados),
+    }
+
+
+def executar_benchmark(caminho_treino, caminho_teste, caminho_saida, n_workers=None):
+    """
+    Executa os cenários e grava o resultado em JSON.
+
+    Args:
+        caminho_treino (str): Caminho para o arquivo .parquet com a base de treino.
+        caminho_teste (str): Caminho para o arquivo .parquet com a base de teste.
+        caminho_saida (str): Arquivo .json de saída.
+        n_workers (int, opcional): Processos da busca paralela (default: número de CPUs).
+
+    Returns:
+        dict: Resultados por cenário.
+    """
+    df_test = ler_compacta_pandas(caminho_teste)
+    n_workers = n_workers or os.cpu_count()
+
+    resultados = {
+        "sequencial_original": medir_sequencial_original(caminho_treino, df_test),
+        "busca_1_processo": medir_busca(caminho_treino, df_test, n_workers=1),
+        "busca_paralela": medir_busca(caminho_treino, df_test, n_workers=n_workers),
+        "dobras_compartilhadas": medir_dobras_compartilhadas(caminho_treino, df_test),
+    }
+
+    for cenario, resultado in resultados.items():
+        logging.info(f"⏱️ {cenario:<22} | até o melhor: {resultado['tempo_ate_melhor_s']:7.2f} s | "
+                     f"total: {resultado['tempo_total_s']:7.2f} s | F1 teste: {resultado['f1_teste']:.4f}"
+                     + (f" | ajustes: {resultado['ajustes_estimador']}" if "ajustes_estimador" in resultado else ""))
+
+    os.makedirs(os.path.dirname(caminho_saida), exist_ok=True)
+    with open(caminho_saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultados, arquivo, indent=2)
+    logging.info(f"💾 Resultado salvo em {caminho_saida}")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do treinamento sequencial x busca paralela x dobras compartilhadas.")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    executar_benchmark(
+        caminho_treino="../../Data/Processed/base_train.parquet",
+        caminho_teste="../../Data/Processed/base_test.parquet",
+        caminho_saida="../../Data/Logs/benchmark_treino.json",
+        n_workers=args.workers
+    )
@@ -0,0 +1,280 @@
+"""
+Treinamento com dobras compartilhadas: base transformada e índices da validação cruzada
+materializados uma única vez por `setup` e reaproveitados por todos os candidatos e pela calibração.
+
+No fluxo de `treinar_modelos`, cada candidato passa por:
+- `create_model`: um ajuste por dobra e um na base de treino (11 com 10 dobras);
+- `calibrate_model`: um `CalibratedClassifierCV` com 5 dobras internas, validado nas 10 dobras e
+  ajustado mais uma vez (55 ajustes);
+- `finalize_model`: o `CalibratedClassifierCV` reajustado na base completa (5 ajustes).
+São 71 ajustes do estimador por candidato (ver `ajustes_fluxo_pycaret`), e o pré-processamento
+do PyCaret é reajustado a cada dobra.
+
+Aqui:
+- `materializar_dobras` lê do experimento do PyCaret a base de treino já transformada e os índices
+  das dobras do `fold_generator` (as mesmas do `create_model`), e ajusta o pré-processamento uma
+  vez na base completa, como o `finalize_model`.
+- `ajustar_candidato` ajusta o estimador em cada dobra (as predições out-of-fold dão as métricas
+  da validação cruzada) e uma vez na base completa. O calibrador (sigmoid ou isotônico) é ajustado
+  sobre as predições out-of-fold, sem novos ajustes do estimador, como no
+  `CalibratedClassifierCV(ensemble=False)` do scikit-learn. São `dobras + 1` ajustes por candidato.
+- O modelo final é um pipeline do PyCaret (pré-processamento + `ClassificadorCalibradoOOF`),
+  compatível com `save_model`, o kernel NumPy e a aplicação.
+- `contar_ajustes` conta as chamadas a `fit` das classes de estimadores no processo, para medir
+  os ajustes de qualquer fluxo (ex.: `benchmark_treino.py`).
+
+O pré-processamento das dobras é o ajustado pelo `setup` na base de treino (imputação de médias),
+e não reajustado a cada dobra como no `create_model`.
+"""
+
+import functools
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from copy import deepcopy
+
+import numpy as np
+from pycaret.classification import get_config, models
+from pycaret.internal.pipeline import add_estimator_to_pipeline
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import f1_score
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DataPrep"))
+from instrumentacao import medir
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+METODOS_CALIBRACAO = ("sigmoid", "isotonic")
+
+
+def ajustes_fluxo_pycaret(fold=10, calibrate_fold=5):
+    """
+    Ajustes do estimador por candidato no fluxo `create_model` + `calibrate_model` + `finalize_model`.
+
+    Args:
+        fold (int, opcional): Dobras da validação cruzada do `setup` (default: 10).
+        calibrate_fold (int, opcional): Dobras internas do `calibrate_model` (default: 5).
+
+    Returns:
+        int: Quantidade de chamadas a `fit` do estimador.
+    """
+    return (fold + 1) * (1 + calibrate_fold) + calibrate_fold
+
+
+@contextmanager
+def contar_ajustes(classes):
+    """
+    Conta as chamadas a `fit` das classes de estimadores informadas, no processo atual.
+
+    As chamadas feitas em outros processos (ex.: validação cruzada do PyCaret com `n_jobs != 1`)
+    não são contadas.
+
+    Args:
+        classes (iterable): Classes de estimadores (ex.: `LogisticRegression`).
+
+    Yields:
+        dict: Contador {"ajustes": int}, atualizado a cada chamada.
+    """
+    contador = {"ajustes": 0}
+    originais = {classe: classe.__dict__["fit"] for classe in set(classes)}
+
+    def contar(fit):
+        # `wraps` preserva a assinatura, inspecionada pelo pipeline do PyCaret
+        @functools.wraps(fit)
+        def fit_contado(self, *args, **kwargs):
+            contador["ajustes"] += 1
+            return fit(self, *args, **kwargs)
+        return fit_contado
+
+    for classe, fit in originais.items():
+        setattr(classe, "fit", contar(fit))
+    try:
+        yield contador
+    finally:
+        for classe, fit in originais.items():
+            setattr(classe, "fit", fit)
+
+
+def materializar_dobras():
+    """
+    Materializa, a partir do experimento do PyCaret configurado, os dados compartilhados pelos candidatos.
+
+    Returns:
+        dict: "X" e "y" (base de treino transformada, em arrays NumPy), "dobras" (lista de pares de
+        índices treino/validação), "X_final" e "y_final" (base completa transformada, usada no
+        ajuste final) e "preprocessamento" (pipeline ajustado na base completa).
+    """
+    X_treino = get_config("X_train_transformed")
+    y_treino = get_config("y_train_transformed")
+    X, y = X_treino.to_numpy(dtype=np.float64), y_treino.to_numpy()
+    dobras = list(get_config("fold_generator").split(X, y))
+
+    preprocessamento = deepcopy(get_config("pipeline")).fit(get_config("X"), get_config("y"))
+    X_final = preprocessamento.transform(get_config("X"))
+
+    logging.info(f"🗂️ Dobras materializadas: {len(dobras)} dobras sobre {len(y)} linhas | "
+                 f"ajuste final com {len(X_final)} linhas")
+    return {
+        "X": X,
+        "y": y,
+        "dobras": dobras,
+        "X_final": X_final,
+        "y_final": get_config("y").to_numpy(),
+        "preprocessamento": preprocessamento,
+    }
+
+
+def _estimador_base(nome_modelo, hiperparametros):
+    """Estimador não ajustado do PyCaret (mesma classe e argumentos padrão do `create_model`)."""
+    modelo = models(internal=True).loc[nome_modelo]
+    return modelo["Class"](**{**modelo["Args"], **hiperparametros})
+
+
+def _pontuacoes(estimador, X):
+    """Pontuações usadas pelo calibrador: `decision_function` se existir, senão a probabilidade da classe 1."""
+    if hasattr(estimador, "decision_function"):
+        return estimador.decision_function(X)
+    return estimador.predict_proba(X)[:, 1]
+
+
+class ClassificadorCalibradoOOF(ClassifierMixin, BaseEstimator):
+    """
+    Estimador ajustado na base completa, calibrado com pontuações out-of-fold.
+
+    A calibração sigmoid é uma regressão logística sobre a pontuação (Platt); a isotônica, uma
+    `IsotonicRegression` limitada a [0, 1].
+
+    Args:
+        estimador: Estimador do scikit-learn (não ajustado).
+        metodo (str, opcional): "sigmoid" ou "isotonic" (default: "sigmoid").
+    """
+
+    def __init__(self, estimador, metodo="sigmoid"):
+        self.estimador = estimador
+        self.metodo = metodo
+
+    def fit(self, X, y, pontuacoes_oof):
+        """
+        Ajusta o estimador em (X, y) e o calibrador nas pontuações out-of-fold.
+
+        Args:
+            X (pd.DataFrame): Features da base completa.
+            y (array-like): Alvo da base completa.
+            pontuacoes_oof (tuple): (pontuações out-of-fold, alvo correspondente).
+
+        Returns:
+            ClassificadorCalibradoOOF: O próprio estimador.
+
+        Raises:
+            ValueError: Se o método de calibração não for suportado.
+        """
+        if self.metodo not in METODOS_CALIBRACAO:
+            raise ValueError(f"❌ Método de calibração '{self.metodo}' não suportado. "
+                             f"Use um de {METODOS_CALIBRACAO}.")
+        pontuacoes, y_oof = pontuacoes_oof
+        self.estimador_ = clone(self.estimador).fit(X, y)
+        if self.metodo == "sigmoid":
+            self.calibrador_ = LogisticRegression(penalty=None).fit(np.reshape(pontuacoes, (-1, 1)), y_oof)
+        else:
+            self.calibrador_ = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(pontuacoes, y_oof)
+        self.classes_ = self.estimador_.classes_
+        self.n_features_in_ = self.estimador_.n_features_in_
+        if hasattr(self.estimador_, "feature_names_in_"):
+            self.feature_names_in_ = self.estimador_.feature_names_in_
+        return self
+
+    def calibrar(self, pontuacoes):
+        """
+        Probabilidade calibrada da classe 1 para pontuações do estimador.
+
+        Args:
+            pontuacoes (np.ndarray): Pontuações (ver `_pontuacoes`).
+
+        Returns:
+            np.ndarray: Probabilidades da classe 1.
+        """
+        pontuacoes = np.asarray(pontuacoes, dtype=np.float64)
+        if self.metodo == "sigmoid":
+            return self.calibrador_.predict_proba(pontuacoes.reshape(-1, 1))[:, 1]
+        return np.clip(self.calibrador_.predict(pontuacoes), 0.0, 1.0)
+
+    def predict_proba(self, X):
+        """
+        Probabilidades calibradas das classes.
+
+        Args:
+            X (pd.DataFrame): Features.
+
+        Returns:
+            np.ndarray: Matriz (n_amostras, 2) com as probabilidades das classes 0 e 1.
+        """
+        proba = self.calibrar(_pontuacoes(self.estimador_, X))
+        return np.column_stack([1.0 - proba, proba])
+
+    def predict(self, X):
+        """
+        Classe prevista de cada linha (limiar de 0.5, como o `CalibratedClassifierCV`).
+
+        Args:
+            X (pd.DataFrame): Features.
+
+        Returns:
+            np.ndarray: Classes previstas.
+        """
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+
+def ajustar_candidato(compartilhado, nome_modelo, hiperparametros=None, metodo="sigmoid"):
+    """
+    Ajusta e calibra um candidato sobre as dobras materializadas.
+
+    Args:
+        compartilhado (dict): Resultado de `materializar_dobras`.
+        nome_modelo (str): Identificador do estimador no PyCaret (ex.: "lr", "dt").
+        hiperparametros (dict, opcional): Hiperparâmetros do estimador (default: padrão do PyCaret).
+        metodo (str, opcional): "sigmoid" ou "isotonic" (default: "sigmoid", como o `calibrate_model`).
+
+    Returns:
+        dict: "modelo" (pipeline finalizado), "f1_cv" (média do F1 das dobras), "proba_oof"
+        (alvo e probabilidades calibradas das pontuações out-of-fold, usadas na escolha do
+        threshold) e "ajustes" (chamadas a `fit` do estimador feitas).
+
+    Raises:
+        ValueError: Se o método de calibração não for suportado.
+    """
+    if metodo not in METODOS_CALIBRACAO:
+        raise ValueError(f"❌ Método de calibração '{metodo}' não suportado. Use um de {METODOS_CALIBRACAO}.")
+
+    X, y = compartilhado["X"], compartilhado["y"]
+    estimador = _estimador_base(nome_modelo, hiperparametros or {})
+    pontuacoes = np.empty(len(y), dtype=np.float64)
+    f1_dobras = []
+    ajustes = 0
+
+    with medir("dobras", linhas=len(y)):
+        for treino, validacao in compartilhado["dobras"]:
+            modelo_dobra = clone(estimador).fit(X[treino], y[treino])
+            ajustes += 1
+            pontuacoes[validacao] = _pontuacoes(modelo_dobra, X[validacao])
+            f1_dobras.append(f1_score(y[validacao], modelo_dobra.predict(X[validacao])))
+
+    # Estimador da base completa e calibrador ajustado nas pontuações out-of-fold
+    with medir("ajuste_final", linhas=len(compartilhado["y_final"])):
+        calibrado = ClassificadorCalibradoOOF(estimador, metodo).fit(
+            compartilhado["X_final"], compartilhado["y_final"], pontuacoes_oof=(pontuacoes, y)
+        )
+        ajustes += 1
+
+    modelo_final = deepcopy(compartilhado["preprocessamento"])
+    add_estimator_to_pipeline(modelo_final, calibrado)
+
+    return {
+        "modelo": modelo_final,
+        "f1_cv": float(np.mean(f1_dobras)),
+        "proba_oof": (y, calibrado.calibrar(pontuacoes)),
+        "ajustes": ajustes,
+    }
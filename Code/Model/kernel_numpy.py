@@ -0,0 +1,304 @@
+"""
+Módulo para exportar o modelo final para um kernel de inferência em NumPy puro.
+
+O modelo selecionado por `treinar_modelos` é sempre uma Regressão Logística (lr) ou uma
+Árvore de Decisão (dt), calibrada pelo `CalibratedClassifierCV` do `calibrate_model` e
+precedida apenas pela imputação de médias do PyCaret. Este módulo:
+- Compila o pipeline finalizado em arrays NumPy (valores de imputação, coeficientes da
+  regressão ou nós achatados da árvore, e mapas de calibração sigmoid/isotônica).
+- Salva o artefato compacto em formato .npz.
+- Disponibiliza o `PreditorNumpy`, que carrega o artefato e prevê sem importar o PyCaret.
+- Verifica que as probabilidades do kernel coincidem com as do pipeline original dentro de
+  uma tolerância e mede a latência de predição de uma única linha.
+"""
+
+import json
+import logging
+import time
+
+import numpy as np
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def _compilar_estimador(estimador):
+    """
+    Converte o estimador base (LogisticRegression ou DecisionTreeClassifier) em arrays.
+
+    Args:
+        estimador: Estimador do scikit-learn já treinado.
+
+    Returns:
+        dict: Arrays do estimador, com a chave "tipo" igual a "lr" ou "dt".
+    """
+    if hasattr(estimador, "coef_"):
+        return {
+            "tipo": "lr",
+            "coef": np.asarray(estimador.coef_, dtype=np.float64).ravel(),
+            "intercept": float(np.ravel(estimador.intercept_)[0]),
+        }
+
+    if hasattr(estimador, "tree_"):
+        arvore = estimador.tree_
+        valores = arvore.value[:, 0, :]
+        soma = valores.sum(axis=1)
+        soma[soma == 0] = 1.0
+        return {
+            "tipo": "dt",
+            "esquerda": arvore.children_left.astype(np.int64),
+            "direita": arvore.children_right.astype(np.int64),
+            "feature": arvore.feature.astype(np.int64),
+            "limiar": arvore.threshold.astype(np.float64),
+            "proba": (valores[:, 1] / soma).astype(np.float64),
+            "profundidade": int(arvore.max_depth),
+        }
+
+    raise ValueError(f"❌ Estimador não suportado pelo kernel NumPy: {type(estimador).__name__}")
+
+
+def _compilar_calibrador(calibrador):
+    """
+    Converte um calibrador em arrays.
+
+    Args:
+        calibrador: `_SigmoidCalibration` ou `IsotonicRegression` do `CalibratedClassifierCV`, ou
+            `LogisticRegression` sobre a pontuação (`ClassificadorCalibradoOOF`), já treinado (ou None).
+
+    Returns:
+        dict: Parâmetros do mapa de calibração.
+    """
+    if calibrador is None:
+        return {"calibracao": "nenhuma"}
+    if hasattr(calibrador, "a_"):
+        return {"calibracao": "sigmoid", "a": float(calibrador.a_), "b": float(calibrador.b_)}
+    if hasattr(calibrador, "coef_"):
+        # Regressão logística sobre a pontuação: 1 / (1 + exp(-(coef * s + intercept)))
+        return {"calibracao": "sigmoid", "a": -float(np.ravel(calibrador.coef_)[0]),
+                "b": -float(np.ravel(calibrador.intercept_)[0])}
+    if hasattr(calibrador, "X_thresholds_"):
+        return {
+            "calibracao": "isotonica",
+            "x": np.asarray(calibrador.X_thresholds_, dtype=np.float64),
+            "y": np.asarray(calibrador.y_thresholds_, dtype=np.float64),
+        }
+    raise ValueError(f"❌ Calibrador não suportado pelo kernel NumPy: {type(calibrador).__name__}")
+
+
+def compilar_modelo(modelo):
+    """
+    Compila o pipeline finalizado do PyCaret em um dicionário de arrays NumPy.
+
+    Args:
+        modelo: Pipeline retornado por `finalize_model`/`load_model`.
+
+    Returns:
+        dict: Arrays e metadados prontos para serem salvos com `np.savez`.
+    """
+    etapas = getattr(modelo, "steps", [("modelo", modelo)])
+    estimador_final = etapas[-1][1]
+    features = list(estimador_final.feature_names_in_)
+
+    # Valores de imputação por feature (NaN indica ausência de imputação)
+    imputacao = np.full(len(features), np.nan)
+    for nome, etapa in etapas[:-1]:
+        transformador = getattr(etapa, "transformer", etapa)
+        if type(transformador).__name__ != "SimpleImputer":
+            raise ValueError(f"❌ Etapa '{nome}' não suportada pelo kernel NumPy.")
+        if not hasattr(transformador, "statistics_"):
+            continue  # Imputador sem colunas (ex.: categóricas inexistentes)
+        for coluna, valor in zip(transformador.feature_names_in_, transformador.statistics_):
+            imputacao[features.index(coluna)] = float(valor)
+
+    if hasattr(estimador_final, "calibrated_classifiers_"):
+        componentes = [
+            (c.estimator if hasattr(c, "estimator") else c.base_estimator, c.calibrators[0])
+            for c in estimador_final.calibrated_classifiers_
+        ]
+    elif hasattr(estimador_final, "calibrador_"):
+        # `ClassificadorCalibradoOOF` (calibração out-of-fold de `dobras_compartilhadas.py`)
+        componentes = [(estimador_final.estimador_, estimador_final.calibrador_)]
+    else:
+        componentes = [(estimador_final, None)]
+
+    arrays = {"imputacao": imputacao, "classes": np.asarray(estimador_final.classes_)}
+    metadados = {"features": features, "componentes": []}
+    for i, (estimador, calibrador) in enumerate(componentes):
+        compilado = {**_compilar_estimador(estimador), **_compilar_calibrador(calibrador)}
+        descricao = {}
+        for chave, valor in compilado.items():
+            if isinstance(valor, np.ndarray):
+                arrays[f"{chave}_{i}"] = valor
+            else:
+                descricao[chave] = valor
+        metadados["componentes"].append(descricao)
+
+    arrays["metadados"] = np.array(json.dumps(metadados))
+    return arrays
+
+
+class PreditorNumpy:
+    """
+    Preditor leve que reproduz o pipeline calibrado usando apenas NumPy.
+
+    Expõe a mesma interface usada pela aplicação e pelos dashboards (`predict_proba`,
+    `predict`, `classes_` e `feature_names_in_`), aceitando DataFrames ou matrizes
+    com as colunas na ordem de `feature_names_in_`.
+    """
+
+    def __init__(self, arrays):
+        metadados = json.loads(str(arrays["metadados"]))
+        self.feature_names_in_ = np.asarray(metadados["features"], dtype=object)
+        self.classes_ = np.asarray(arrays["classes"])
+        self._imputacao = np.asarray(arrays["imputacao"])
+        self._componentes = []
+        for i, descricao in enumerate(metadados["componentes"]):
+            componente = dict(descricao)
+            for chave in ("coef", "esquerda", "direita", "feature", "limiar", "proba", "x", "y"):
+                if f"{chave}_{i}" in arrays:
+                    componente[chave] = np.asarray(arrays[f"{chave}_{i}"])
+            self._componentes.append(componente)
+
+    def _matriz(self, X):
+        """Converte a entrada em matriz float64 na ordem das features, aplicando a imputação."""
+        if hasattr(X, "columns"):
+            X = np.column_stack([X[coluna].to_numpy(dtype=np.float64) for coluna in self.feature_names_in_])
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        faltantes = np.isnan(X)
+        if faltantes.any():
+            X = np.where(faltantes, self._imputacao, X)
+        return X
+
+    @staticmethod
+    def _resposta(componente, X):
+        """Calcula a resposta não calibrada (decision_function ou proba da árvore)."""
+        if componente["tipo"] == "lr":
+            return X @ componente["coef"] + componente["intercept"]
+
+        # A árvore do scikit-learn compara as features em float32
+        X32 = X.astype(np.float32)
+        no = np.zeros(X.shape[0], dtype=np.int64)
+        linhas = np.arange(X.shape[0])
+        for _ in range(componente["profundidade"]):
+            folha = componente["esquerda"][no] == -1
+            if folha.all():
+                break
+            feature = np.where(folha, 0, componente["feature"][no])
+            vai_esquerda = X32[linhas, feature] <= componente["limiar"][no]
+            proximo = np.where(vai_esquerda, componente["esquerda"][no], componente["direita"][no])
+            no = np.where(folha, no, proximo)
+        return componente["proba"][no]
+
+    @staticmethod
+    def _calibrar(componente, resposta):
+        """Aplica o mapa de calibração do componente."""
+        if componente["calibracao"] == "sigmoid":
+            return 1.0 / (1.0 + np.exp(componente["a"] * resposta + componente["b"]))
+        if componente["calibracao"] == "isotonica":
+            return np.interp(resposta, componente["x"], componente["y"])
+        return resposta
+
+    def predict_proba(self, X):
+        """
+        Calcula as probabilidades calibradas das classes.
+
+        Args:
+            X (pd.DataFrame ou np.ndarray): Features dos arremessos.
+
+        Returns:
+            np.ndarray: Matriz (n_amostras, 2) com as probabilidades das classes 0 e 1.
+        """
+        X = self._matriz(X)
+        proba_1 = np.zeros(X.shape[0])
+        for componente in self._componentes:
+            proba_1 += np.clip(self._calibrar(componente, self._resposta(componente, X)), 0.0, 1.0)
+        proba_1 /= len(self._componentes)
+        return np.column_stack([1.0 - proba_1, proba_1])
+
+    def predict(self, X):
+        """
+        Prevê a classe de cada arremesso (limiar de 0.5, como o pipeline original).
+
+        Args:
+            X (pd.DataFrame ou np.ndarray): Features dos arremessos.
+
+        Returns:
+            np.ndarray: Classes previstas.
+        """
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+
+def carregar_preditor_numpy(caminho_artefato):
+    """
+    Carrega um kernel exportado por `exportar_kernel_numpy`.
+
+    Args:
+        caminho_artefato (str): Caminho do arquivo .npz.
+
+    Returns:
+        PreditorNumpy: Preditor pronto para uso.
+    """
+    with np.load(caminho_artefato, allow_pickle=False) as arrays:
+        return PreditorNumpy({chave: arrays[chave] for chave in arrays.files})
+
+
+def _latencia_uma_linha_ms(preditor, X, repeticoes=200):
+    """Mede a latência média (ms) de `predict_proba` sobre uma única linha."""
+    linha = X.iloc[:1] if hasattr(X, "iloc") else X[:1]
+    preditor.predict_proba(linha)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        preditor.predict_proba(linha)
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def exportar_kernel_numpy(modelo, caminho_artefato, X_verificacao, tolerancia=1e-6):
+    """
+    Exporta o modelo para o kernel NumPy e verifica a equivalência com o pipeline original.
+
+    Args:
+        modelo: Pipeline finalizado do PyCaret.
+        caminho_artefato (str): Caminho do arquivo .npz a ser gerado.
+        X_verificacao (pd.DataFrame): Features usadas para comparar as probabilidades.
+        tolerancia (float, opcional): Diferença absoluta máxima aceita entre as probabilidades (default: 1e-6).
+
+    Returns:
+        dict: Diferença máxima observada e latências de uma linha (ms) do pipeline e do kernel.
+    """
+    np.savez(caminho_artefato, **compilar_modelo(modelo))
+    preditor = carregar_preditor_numpy(caminho_artefato)
+
+    diferenca = float(np.max(np.abs(
+        preditor.predict_proba(X_verificacao)[:, 1] - modelo.predict_proba(X_verificacao)[:, 1]
+    )))
+    if diferenca > tolerancia:
+        raise ValueError(
+            f"❌ Kernel NumPy diverge do pipeline original: diferença máxima {diferenca:.2e} > {tolerancia:.0e}."
+        )
+
+    resultado = {
+        "kernel_max_diferenca": diferenca,
+        "latencia_pipeline_ms": _latencia_uma_linha_ms(modelo, X_verificacao, repeticoes=20),
+        "latencia_kernel_ms": _latencia_uma_linha_ms(preditor, X_verificacao),
+    }
+    logging.info(
+        f"🧮 Kernel NumPy exportado em {caminho_artefato} | diferença máx.: {diferenca:.2e} | "
+        f"latência 1 linha: {resultado['latencia_pipeline_ms']:.3f} ms → {resultado['latencia_kernel_ms']:.4f} ms"
+    )
+    return resultado
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    from pycaret.classification import load_model
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DataPrep"))
+    from esquema_arremessos import ler_compacta_pandas
+
+    df_teste = ler_compacta_pandas("../../Data/Processed/base_test.parquet")
+    exportar_kernel_numpy(
+        modelo=load_model("../../Data/Modeling/modelo_final"),
+        caminho_artefato="../../Data/Modeling/modelo_final_numpy.npz",
+        X_verificacao=df_teste.drop(columns="shot_made_flag")
+    )
@@ -2,26 +2,73 @@
 Módulo para treinamento dos modelos preditivos utilizando PyCaret e MLflow.
 
 Este módulo realiza as seguintes etapas:
-- Carregamento das bases de treino e teste.
+- Carregamento das bases de treino e teste (schema compacto, via Arrow IPC memory-mapped).
 - Configuração do ambiente do PyCaret para experimentos.
 - Treinamento de dois modelos: Regressão Logística (lr) e Árvore de Decisão (dt).
 - Calibração e finalização dos modelos.
 - Avaliação dos modelos utilizando as métricas Log Loss e F1 Score.
 - Seleção do melhor modelo com base no F1 Score.
 - Salvamento do modelo final e registro dos parâmetros e métricas no MLflow.
+- Salvamento de todos os candidatos finalizados em `candidatos/`, cada um com seu threshold,
+  para a pontuação lado a lado na produção (`aplicacao.py --comparar`).
+- Exportação do modelo final para um kernel de inferência em NumPy puro (ver `kernel_numpy.py`).
+- Escolha do threshold de decisão de cada modelo nas probabilidades out-of-fold da base de treino
+  (maior F1 com ao menos 5% das linhas em cada classe prevista, varredura de
+  todos os thresholds em `analise_threshold.py`), gravado ao lado do modelo e usado pela aplicação.
+  A base de teste só informa as métricas do threshold escolhido.
+- Medição de `setup`, `create_model`, `calibrate_model`, `finalize_model`, `predict_proba`, leituras
+  e chamadas ao MLflow, registrada na rodada (ver `instrumentacao.py`).
+- Modo paralelo (`treinar_modelos_paralelo`): busca de hiperparâmetros sobre um conjunto
+  configurável de estimadores em um pool de processos, com descarte antecipado das
+  configurações dominadas (successive halving).
+- Modo de dobras compartilhadas (`treinar_modelos_dobras`): base transformada e dobras
+  materializadas uma vez e reaproveitadas por todos os candidatos, com calibração sobre as
+  predições out-of-fold (ver `dobras_compartilhadas.py`). Os ajustes do estimador são registrados
+  no MLflow: contados no modo de dobras compartilhadas (`ajustes_estimador`) e estimados pela
+  estrutura do fluxo no modo sequencial (`ajustes_estimador_estimado`, já que a validação cruzada
+  do PyCaret pode rodar em outros processos). A contagem medida dos dois fluxos está em
+  `benchmark_treino.py`.
 """
 
-import pandas as pd
 import mlflow
+import argparse
 import logging
+import math
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from pycaret.classification import setup, create_model, calibrate_model, finalize_model, save_model
+from pycaret.classification import setup, create_model, calibrate_model, finalize_model, save_model, pull
 from sklearn.metrics import log_loss, f1_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, cross_val_predict
+
+from analise_threshold import (FRACAO_MINIMA_CLASSE, escolher_threshold, gravar_threshold, ponto_operacao,
+                               varrer_thresholds)
+from dobras_compartilhadas import ajustar_candidato, ajustes_fluxo_pycaret, materializar_dobras
+from kernel_numpy import exportar_kernel_numpy
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DataPrep"))
+from esquema_arremessos import ler_compacta_pandas
+from instrumentacao import gravar_trace, medir, registrar_log, registrar_mlflow
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Estimadores candidatos do modo paralelo e suas grades de hiperparâmetros
+CANDIDATOS = {
+    "lr": {"C": [0.01, 0.1, 1.0, 10.0]},
+    "dt": {"max_depth": [3, 5, 8, 12], "min_samples_leaf": [1, 20, 100]},
+}
+
+# Escolha do threshold de decisão (ver `analise_threshold.escolher_threshold`): critério e threshold
+# usado se nenhum candidato tiver `FRACAO_MINIMA_CLASSE` das linhas em cada classe prevista
+CRITERIO_THRESHOLD = "f1"
+THRESHOLD_SEM_CANDIDATO = 0.5
+# Dobras das predições out-of-fold dos modelos do PyCaret, usadas na escolha do threshold
+DOBRAS_THRESHOLD = 5
+
+@medir("treinamento")
 def treinar_modelos(caminho_treino, caminho_teste, caminho_saida):
     """
     Executa o pipeline de treinamento dos modelos utilizando PyCaret.
@@ -34,6 +81,7 @@ def treinar_modelos(caminho_treino, caminho_teste, caminho_saida):
     - Avaliar os modelos na base de teste (cálculo de Log Loss e F1 Score).
     - Selecionar o melhor modelo com base no F1 Score.
     - Salvar o modelo final e registrar os artefatos e métricas no MLflow.
+    - Exportar o modelo final para o kernel NumPy, verificando a equivalência na base de teste.
 
     Args:
         caminho_treino (str): Caminho para o arquivo .parquet com a base de treino.
@@ -44,8 +92,10 @@ def treinar_modelos(caminho_treino, caminho_teste, caminho_saida):
         None
     """
     logging.info("📥 Carregando bases de treino e teste...")
-    df_train = pd.read_parquet(caminho_treino)
-    df_test = pd.read_parquet(caminho_teste)
+    with medir("ler_arrow") as trecho:
+        df_train = ler_compacta_pandas(caminho_treino)
+        df_test = ler_compacta_pandas(caminho_teste)
+        trecho.linhas = len(df_train) + len(df_test)
 
     # ⚠️ IMPORTANTE:
     # Embora o PyCaret permita configurar o tipo de validação cruzada via o parâmetro `fold_strategy`,
@@ -56,34 +106,33 @@ def treinar_modelos(caminho_treino, caminho_teste, caminho_saida):
     # A configuração `fold=10` abaixo define explicitamente o número de dobras da validação cruzada.
 
     logging.info("⚙️ Configurando o ambiente do PyCaret...")
-    s = setup(
-        data=df_train,
-        target="shot_made_flag",
-        session_id=42,
-        log_experiment=True,
-        experiment_name="Treinamento",
-        log_plots=False,
-        fold=10,
-        verbose=False
-    )
+    with medir("setup", linhas=len(df_train)):
+        s = setup(
+            data=df_train,
+            target="shot_made_flag",
+            session_id=42,
+            log_experiment=True,
+            experiment_name="Treinamento",
+            log_plots=False,
+            fold=10,
+            verbose=False
+        )
 
     modelos_info = {}
 
     # Loop para treinar os modelos "lr" (regressão logística) e "dt" (árvore de decisão)
     for nome_modelo in ["lr", "dt"]:
         logging.info(f"🚀 Treinando modelo: {nome_modelo.upper()}")
-        modelo = create_model(nome_modelo)
-        modelo_calibrado = calibrate_model(modelo)
-        modelo_final = finalize_model(modelo_calibrado)
-
-        # Avaliação manual na base de teste
-        X_test = df_test.drop(columns="shot_made_flag")
-        y_true = df_test["shot_made_flag"]
-        y_pred = modelo_final.predict(X_test)
-        y_proba = modelo_final.predict_proba(X_test)[:, 1]
+        with medir(nome_modelo):
+            with medir("create_model", linhas=len(df_train)):
+                modelo = create_model(nome_modelo)
+            with medir("calibrate_model", linhas=len(df_train)):
+                modelo_calibrado = calibrate_model(modelo)
+            with medir("finalize_model", linhas=len(df_train)):
+                modelo_final = finalize_model(modelo_calibrado)
 
-        loss = log_loss(y_true, y_proba, labels=[0, 1])
-        f1 = f1_score(y_true, y_pred)
+            # Avaliação manual na base de teste
+            loss, f1 = _avaliar_no_teste(modelo_final, df_test)
 
         modelos_info[nome_modelo] = {
             "modelo": modelo_final,
@@ -93,6 +142,91 @@ def treinar_modelos(caminho_treino, caminho_teste, caminho_saida):
 
         logging.info(f"📊 {nome_modelo.upper()} | Log Loss: {loss:.4f} | F1 Score: {f1:.4f}")
 
+    _salvar_melhor_modelo(modelos_info, df_train, df_test, caminho_saida)
+    mlflow.log_metric("ajustes_estimador_estimado", ajustes_fluxo_pycaret(fold=10) * len(modelos_info))
+
+    logging.info("🏁 Pipeline de treinamento finalizado.")
+
+
+def _avaliar_no_teste(modelo_final, df_test):
+    """
+    Avalia um modelo finalizado na base de teste.
+
+    Args:
+        modelo_final: Pipeline finalizado do PyCaret.
+        df_test (pd.DataFrame): Base de teste com a coluna `shot_made_flag`.
+
+    Returns:
+        tuple: (log_loss, f1_score) na base de teste.
+    """
+    X_test = df_test.drop(columns="shot_made_flag")
+    y_true = df_test["shot_made_flag"]
+    with medir("predict", linhas=len(X_test)):
+        y_pred = modelo_final.predict(X_test)
+    with medir("predict_proba", linhas=len(X_test)):
+        y_proba = modelo_final.predict_proba(X_test)[:, 1]
+    return log_loss(y_true, y_proba, labels=[0, 1]), f1_score(y_true, y_pred)
+
+
+def _probabilidades_oof(info, df_train):
+    """
+    Alvo e probabilidades out-of-fold de um modelo finalizado na base de treino.
+
+    Usa as predições out-of-fold do próprio ajuste quando existirem (`proba_oof`, modo de dobras
+    compartilhadas); caso contrário, o pipeline é reajustado em `DOBRAS_THRESHOLD` dobras estratificadas.
+
+    Args:
+        info (dict): {"modelo", ...} do modelo finalizado.
+        df_train (pd.DataFrame): Base de treino.
+
+    Returns:
+        tuple: (alvo, probabilidades da classe 1).
+    """
+    if "proba_oof" in info:
+        return info["proba_oof"]
+    y_train = df_train["shot_made_flag"]
+    dobras = StratifiedKFold(DOBRAS_THRESHOLD, shuffle=True, random_state=42)
+    proba = cross_val_predict(info["modelo"], df_train.drop(columns="shot_made_flag"), y_train,
+                              cv=dobras, method="predict_proba")[:, 1]
+    return y_train.to_numpy(), proba
+
+
+def _escolher_threshold_oof(info, df_train):
+    """
+    Escolhe o threshold de decisão de um modelo nas suas probabilidades out-of-fold da base de treino.
+
+    Se nenhum threshold atender à fração mínima de cada classe prevista, usa `THRESHOLD_SEM_CANDIDATO`.
+
+    Args:
+        info (dict): {"modelo", ...} do modelo finalizado.
+        df_train (pd.DataFrame): Base de treino.
+
+    Returns:
+        dict: Threshold escolhido e suas métricas out-of-fold (ver `escolher_threshold`).
+    """
+    varredura = varrer_thresholds(*_probabilidades_oof(info, df_train))
+    try:
+        return escolher_threshold(varredura, CRITERIO_THRESHOLD, FRACAO_MINIMA_CLASSE)
+    except ValueError as erro:
+        logging.warning(f"⚠️ {erro} Usando o threshold {THRESHOLD_SEM_CANDIDATO}.")
+        return {**ponto_operacao(varredura, THRESHOLD_SEM_CANDIDATO),
+                "threshold": THRESHOLD_SEM_CANDIDATO, "criterio": "sem_candidato"}
+
+
+def _salvar_melhor_modelo(modelos_info, df_train, df_test, caminho_saida):
+    """
+    Seleciona o melhor modelo pelo F1 Score, salva-o com o threshold de decisão, exporta o kernel NumPy,
+    salva todos os candidatos e registra no MLflow.
+
+    Args:
+        modelos_info (dict): {nome: {"modelo", "log_loss", "f1_score", ...}} dos modelos finalizados.
+        df_train (pd.DataFrame): Base de treino, usada na escolha do threshold de cada modelo.
+        df_test (pd.DataFrame): Base de teste, usada na verificação do kernel NumPy e nas métricas do threshold.
+        caminho_saida (str): Caminho do diretório para salvar o modelo final.
+
+    Returns:
+        str: Nome do modelo selecionado.
+    """
     # Selecionar o melhor modelo com base no F1 Score
     melhor_nome = max(modelos_info, key=lambda k: modelos_info[k]["f1_score"])
     melhor_modelo = modelos_info[melhor_nome]["modelo"]
@@ -101,21 +235,363 @@ def treinar_modelos(caminho_treino, caminho_teste, caminho_saida):
     # Salvar o modelo final
     os.makedirs(caminho_saida, exist_ok=True)
     caminho_modelo = os.path.join(caminho_saida, "modelo_final")
-    save_model(melhor_modelo, caminho_modelo)
+    with medir("save_model"):
+        save_model(melhor_modelo, caminho_modelo)
     logging.info(f"💾 Modelo salvo em: {caminho_modelo}.pkl")
 
+    # Exportar o kernel NumPy (falha se divergir do pipeline original na base de teste)
+    X_test = df_test.drop(columns="shot_made_flag")
+    caminho_kernel = f"{caminho_modelo}_numpy.npz"
+    with medir("exportar_kernel_numpy", linhas=len(df_test)):
+        resultado_kernel = exportar_kernel_numpy(melhor_modelo, caminho_kernel, X_verificacao=X_test)
+
+    # Threshold de decisão de cada modelo: varredura das probabilidades out-of-fold da base de treino
+    with medir("analise_threshold", linhas=len(df_train)):
+        pontos = {nome: _escolher_threshold_oof(info, df_train) for nome, info in modelos_info.items()}
+        ponto = pontos[melhor_nome]
+        caminho_ponto = gravar_threshold(caminho_modelo, ponto)
+        ponto_teste = ponto_operacao(
+            varrer_thresholds(df_test["shot_made_flag"], melhor_modelo.predict_proba(X_test)[:, 1]), ponto["threshold"]
+        )
+    logging.info(f"🎚️ Threshold escolhido ({ponto['criterio']}, out-of-fold no treino): {ponto['threshold']:.4f} | "
+                 f"F1 {ponto['f1']:.4f} | precisão {ponto['precision']:.4f} | recall {ponto['recall']:.4f}")
+    logging.info(f"🎚️ Mesmo threshold na base de teste: F1 {ponto_teste['f1']:.4f} | "
+                 f"precisão {ponto_teste['precision']:.4f} | recall {ponto_teste['recall']:.4f}")
+
+    # Candidatos finalizados, para comparação lado a lado na produção (`aplicacao.py --comparar`)
+    with medir("salvar_candidatos"):
+        _salvar_candidatos(modelos_info, pontos, os.path.join(caminho_saida, "candidatos"))
+
     # Registro dos parâmetros e métricas no MLflow
-    mlflow.set_experiment("Treinamento")
-    mlflow.log_param("modelo_selecionado", melhor_nome)
-    mlflow.log_metric("log_loss", modelos_info[melhor_nome]["log_loss"])
-    mlflow.log_metric("f1_score", modelos_info[melhor_nome]["f1_score"])
-    mlflow.log_artifact(f"{caminho_modelo}.pkl")
+    with medir("mlflow"):
+        mlflow.set_experiment("Treinamento")
+        mlflow.log_param("modelo_selecionado", melhor_nome)
+        mlflow.log_params({f"hp_{k}": v for k, v in modelos_info[melhor_nome].get("hiperparametros", {}).items()})
+        mlflow.log_metric("log_loss", modelos_info[melhor_nome]["log_loss"])
+        mlflow.log_metric("f1_score", modelos_info[melhor_nome]["f1_score"])
+        mlflow.log_artifact(f"{caminho_modelo}.pkl")
+        mlflow.log_metrics(resultado_kernel)
+        mlflow.log_artifact(caminho_kernel)
+        mlflow.log_params({"criterio_threshold": ponto["criterio"], "fracao_minima_threshold": FRACAO_MINIMA_CLASSE})
+        mlflow.log_metrics({"threshold": ponto["threshold"], "f1_threshold": ponto["f1"],
+                            "precision_threshold": ponto["precision"], "recall_threshold": ponto["recall"],
+                            "f1_threshold_teste": ponto_teste["f1"],
+                            "precision_threshold_teste": ponto_teste["precision"],
+                            "recall_threshold_teste": ponto_teste["recall"]})
+        mlflow.log_artifact(caminho_ponto)
+
+    # Tempos dos trechos medidos até aqui (o trecho raiz "treinamento" ainda está aberto)
+    registrar_log("treinamento")
+    registrar_mlflow("treinamento")
+
+    return melhor_nome
+
+
+def _salvar_candidatos(modelos_info, pontos, caminho_candidatos):
+    """
+    Salva cada modelo finalizado (`modelo_<nome>`) com o seu threshold de decisão.
+
+    Args:
+        modelos_info (dict): {nome: {"modelo", ...}} dos modelos finalizados.
+        pontos (dict): {nome: ponto de operação} escolhido para cada modelo (ver `_escolher_threshold_oof`).
+        caminho_candidatos (str): Diretório dos candidatos.
+
+    Returns:
+        list[str]: Caminhos dos modelos salvos (sem extensão).
+    """
+    os.makedirs(caminho_candidatos, exist_ok=True)
+    caminhos = []
+    for nome_modelo, info in modelos_info.items():
+        caminho_modelo = os.path.join(caminho_candidatos, f"modelo_{nome_modelo}")
+        save_model(info["modelo"], caminho_modelo, verbose=False)
+        gravar_threshold(caminho_modelo, pontos[nome_modelo])
+        caminhos.append(caminho_modelo)
+    logging.info(f"💾 Candidatos salvos em: {caminho_candidatos} ({', '.join(modelos_info)})")
+    return caminhos
+
+
+def _configurar_pycaret(caminho_treino, fold):
+    """
+    Lê a base de treino e configura o PyCaret no processo atual, sem registro no MLflow.
+
+    O PyCaret guarda o experimento em estado global do processo, então cada worker do pool
+    executa seu próprio `setup` uma única vez, na inicialização (com `n_jobs=1`, evitando
+    paralelismo aninhado nas dobras).
+
+    Args:
+        caminho_treino (str): Caminho para o arquivo .parquet com a base de treino.
+        fold (int): Número de dobras da validação cruzada completa.
+
+    Returns:
+        None
+    """
+    setup(
+        data=ler_compacta_pandas(caminho_treino),
+        target="shot_made_flag",
+        session_id=42,
+        log_experiment=False,
+        fold=fold,
+        n_jobs=1,
+        html=False,
+        verbose=False
+    )
+
+
+def _avaliar_configuracao(estimador, hiperparametros, fold):
+    """
+    Executa a validação cruzada de uma configuração no worker.
+
+    Args:
+        estimador (str): Identificador do estimador no PyCaret (ex.: "lr", "dt").
+        hiperparametros (dict): Hiperparâmetros repassados ao `create_model`.
+        fold (int): Número de dobras da validação cruzada.
+
+    Returns:
+        dict: Estimador, hiperparâmetros, dobras, F1 médio da validação cruzada e tempo (s).
+    """
+    inicio = time.perf_counter()
+    create_model(estimador, fold=fold, verbose=False, **hiperparametros)
+    return {
+        "estimador": estimador,
+        "hiperparametros": hiperparametros,
+        "fold": fold,
+        "f1_cv": float(pull().loc["Mean", "F1"]),
+        "tempo_s": time.perf_counter() - inicio,
+    }
+
+
+def _finalizar_configuracao(estimador, hiperparametros):
+    """
+    Treina, calibra e finaliza uma configuração no worker (mesmo fluxo de `treinar_modelos`).
+
+    Args:
+        estimador (str): Identificador do estimador no PyCaret.
+        hiperparametros (dict): Hiperparâmetros repassados ao `create_model`.
+
+    Returns:
+        tuple: (estimador, hiperparâmetros, pipeline finalizado).
+    """
+    modelo = create_model(estimador, verbose=False, **hiperparametros)
+    modelo_calibrado = calibrate_model(modelo, verbose=False)
+    return estimador, hiperparametros, finalize_model(modelo_calibrado)
+
+
+def _executar_rodada(executor, configuracoes, fold, inicio_busca):
+    """Avalia configurações em paralelo, registrando o instante em que cada resultado chegou."""
+    futuros = [executor.submit(_avaliar_configuracao, est, hp, fold) for est, hp in configuracoes]
+    resultados = []
+    for futuro in as_completed(futuros):
+        resultado = futuro.result()
+        resultado["concluido_em_s"] = time.perf_counter() - inicio_busca
+        resultados.append(resultado)
+    return sorted(resultados, key=lambda r: r["f1_cv"], reverse=True)
+
+
+def buscar_candidatos(caminho_treino, candidatos=None, n_workers=None, fold=10,
+                      folds_triagem=3, margem_descarte=0.02):
+    """
+    Busca paralela de hiperparâmetros com descarte antecipado (successive halving).
+
+    1. Triagem: todas as configurações são avaliadas com `folds_triagem` dobras.
+    2. Descarte: ficam apenas as configurações com F1 a até `margem_descarte` da melhor,
+       limitadas à metade superior do ranking.
+    3. Avaliação completa: as sobreviventes são avaliadas com `fold` dobras.
+    4. Finalização: a melhor configuração de cada estimador sobrevivente é calibrada e finalizada.
+
+    Args:
+        caminho_treino (str): Caminho para o arquivo .parquet com a base de treino.
+        candidatos (dict, opcional): {estimador: grade de hiperparâmetros} (default: `CANDIDATOS`).
+        n_workers (int, opcional): Número de processos (default: número de CPUs).
+        fold (int, opcional): Dobras da avaliação completa (default: 10).
+        folds_triagem (int, opcional): Dobras da triagem (default: 3).
+        margem_descarte (float, opcional): Distância máxima de F1 para a melhor configuração na triagem.
+
+    Returns:
+        tuple: (resultados da busca ordenados por rodada e F1, {estimador: informações do modelo finalizado}).
+    """
+    candidatos = candidatos or CANDIDATOS
+    configuracoes = [(est, hp) for est, grade in candidatos.items() for hp in ParameterGrid(grade)]
+    n_workers = n_workers or os.cpu_count()
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_configurar_pycaret,
+                             initargs=(caminho_treino, fold)) as executor:
+        logging.info(f"🔎 Triagem de {len(configuracoes)} configurações com {folds_triagem} dobras "
+                     f"em {n_workers} processos...")
+        triagem = _executar_rodada(executor, configuracoes, folds_triagem, inicio)
+
+        limite = triagem[0]["f1_cv"] - margem_descarte
+        sobreviventes = [r for r in triagem if r["f1_cv"] >= limite][:max(1, math.ceil(len(triagem) / 2))]
+        logging.info(f"✂️ {len(triagem) - len(sobreviventes)} configurações dominadas descartadas.")
+
+        completa = _executar_rodada(
+            executor, [(r["estimador"], r["hiperparametros"]) for r in sobreviventes], fold, inicio
+        )
+
+        melhores = {}
+        for resultado in completa:
+            melhores.setdefault(resultado["estimador"], resultado)
+
+        finalizados = {}
+        for futuro in [executor.submit(_finalizar_configuracao, r["estimador"], r["hiperparametros"])
+                       for r in melhores.values()]:
+            estimador, hiperparametros, modelo_final = futuro.result()
+            finalizados[estimador] = {
+                "modelo": modelo_final,
+                "hiperparametros": hiperparametros,
+                "f1_cv": melhores[estimador]["f1_cv"],
+            }
+
+    for resultado in triagem:
+        resultado["rodada"] = "triagem"
+    for resultado in completa:
+        resultado["rodada"] = "completa"
+    logging.info(f"⏱️ Busca paralela concluída em {time.perf_counter() - inicio:.2f} s")
+    return triagem + completa, finalizados
+
+
+@medir("treinamento")
+def treinar_modelos_paralelo(caminho_treino, caminho_teste, caminho_saida, candidatos=None,
+                             n_workers=None, folds_triagem=3, margem_descarte=0.02):
+    """
+    Variante de `treinar_modelos` com busca paralela de estimadores e hiperparâmetros.
+
+    A melhor configuração de cada estimador (F1 da validação cruzada com 10 dobras) é
+    calibrada e finalizada; entre elas, o modelo final é escolhido pelo F1 Score na base
+    de teste, como no fluxo sequencial.
+
+    Args:
+        caminho_treino (str): Caminho para o arquivo .parquet com a base de treino.
+        caminho_teste (str): Caminho para o arquivo .parquet com a base de teste.
+        caminho_saida (str): Caminho do diretório para salvar o modelo final.
+        candidatos (dict, opcional): {estimador: grade de hiperparâmetros} (default: `CANDIDATOS`).
+        n_workers (int, opcional): Número de processos (default: número de CPUs).
+        folds_triagem (int, opcional): Dobras da triagem (default: 3).
+        margem_descarte (float, opcional): Distância máxima de F1 para a melhor configuração na triagem.
+
+    Returns:
+        None
+    """
+    logging.info("📥 Carregando bases de treino e teste...")
+    with medir("ler_arrow") as trecho:
+        df_train = ler_compacta_pandas(caminho_treino)
+        df_test = ler_compacta_pandas(caminho_teste)
+        trecho.linhas = len(df_train) + len(df_test)
+
+    # O `save_model` do PyCaret exige um experimento configurado no processo principal
+    with medir("setup"):
+        _configurar_pycaret(caminho_treino, fold=10)
+
+    # Os workers do pool não são instrumentados: o trecho mede a busca inteira vista pelo processo principal
+    with medir("buscar_candidatos"):
+        resultados, modelos_info = buscar_candidatos(
+            caminho_treino, candidatos, n_workers, folds_triagem=folds_triagem, margem_descarte=margem_descarte
+        )
+
+    for nome_modelo, info in modelos_info.items():
+        with medir(nome_modelo):
+            info["log_loss"], info["f1_score"] = _avaliar_no_teste(info["modelo"], df_test)
+        logging.info(f"📊 {nome_modelo.upper()} {info['hiperparametros']} | "
+                     f"Log Loss: {info['log_loss']:.4f} | F1 Score: {info['f1_score']:.4f}")
+
+    _salvar_melhor_modelo(modelos_info, df_train, df_test, caminho_saida)
+    mlflow.log_metric("configuracoes_avaliadas", sum(r["rodada"] == "triagem" for r in resultados))
+    mlflow.log_dict({"resultados": resultados}, "busca_hiperparametros.json")
 
     logging.info("🏁 Pipeline de treinamento finalizado.")
 
+
+@medir("treinamento")
+def treinar_modelos_dobras(caminho_treino, caminho_teste, caminho_saida, candidatos=("lr", "dt"),
+                           metodo_calibracao="sigmoid"):
+    """
+    Variante de `treinar_modelos` com dobras compartilhadas e calibração out-of-fold.
+
+    A base transformada e os índices das 10 dobras são materializados uma vez após o `setup`;
+    cada candidato é ajustado nas dobras e na base completa, e calibrado sobre suas predições
+    out-of-fold (ver `dobras_compartilhadas.py`). O modelo final é escolhido pelo F1 Score na
+    base de teste, como no fluxo sequencial.
+
+    Args:
+        caminho_treino (str): Caminho para o arquivo .parquet com a base de treino.
+        caminho_teste (str): Caminho para o arquivo .parquet com a base de teste.
+        caminho_saida (str): Caminho do diretório para salvar o modelo final.
+        candidatos (tuple, opcional): Estimadores do PyCaret avaliados (default: ("lr", "dt")).
+        metodo_calibracao (str, opcional): "sigmoid" ou "isotonic" (default: "sigmoid").
+
+    Returns:
+        None
+    """
+    logging.info("📥 Carregando bases de treino e teste...")
+    with medir("ler_arrow") as trecho:
+        df_train = ler_compacta_pandas(caminho_treino)
+        df_test = ler_compacta_pandas(caminho_teste)
+        trecho.linhas = len(df_train) + len(df_test)
+
+    logging.info("⚙️ Configurando o ambiente do PyCaret...")
+    with medir("setup", linhas=len(df_train)):
+        setup(
+            data=df_train,
+            target="shot_made_flag",
+            session_id=42,
+            log_experiment=True,
+            experiment_name="Treinamento",
+            log_plots=False,
+            fold=10,
+            verbose=False
+        )
+
+    with medir("materializar_dobras", linhas=len(df_train)):
+        compartilhado = materializar_dobras()
+
+    modelos_info = {}
+    for nome_modelo in candidatos:
+        logging.info(f"🚀 Treinando modelo: {nome_modelo.upper()}")
+        with medir(nome_modelo):
+            info = ajustar_candidato(compartilhado, nome_modelo, metodo=metodo_calibracao)
+            info["log_loss"], info["f1_score"] = _avaliar_no_teste(info["modelo"], df_test)
+        modelos_info[nome_modelo] = info
+        logging.info(f"📊 {nome_modelo.upper()} | F1 CV: {info['f1_cv']:.4f} | "
+                     f"Log Loss: {info['log_loss']:.4f} | F1 Score: {info['f1_score']:.4f}")
+
+    ajustes = sum(info["ajustes"] for info in modelos_info.values())
+    ajustes_pycaret = ajustes_fluxo_pycaret(fold=10) * len(modelos_info)
+    logging.info(f"🔁 Ajustes do estimador: {ajustes} (fluxo create/calibrate/finalize, estimado: {ajustes_pycaret})")
+
+    _salvar_melhor_modelo(modelos_info, df_train, df_test, caminho_saida)
+    mlflow.log_param("metodo_calibracao", metodo_calibracao)
+    mlflow.log_metrics({"ajustes_estimador": ajustes, "ajustes_estimador_pycaret_estimado": ajustes_pycaret})
+
+    logging.info("🏁 Pipeline de treinamento finalizado.")
+
+
 if __name__ == "__main__":
-    treinar_modelos(
-        caminho_treino="../../Data/Processed/base_train.parquet",
-        caminho_teste="../../Data/Processed/base_test.parquet",
-        caminho_saida="../../Data/Modeling"
-    )
+    parser = argparse.ArgumentParser(description="Treinamento do modelo final.")
+    parser.add_argument("--paralelo", action="store_true",
+                        help="Busca paralela de estimadores e hiperparâmetros (ver CANDIDATOS).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Número de processos do modo paralelo (default: número de CPUs).")
+    parser.add_argument("--dobras-compartilhadas", action="store_true",
+                        help="Dobras materializadas uma vez e calibração out-of-fold (ver dobras_compartilhadas.py).")
+    args = parser.parse_args()
+
+    if args.paralelo:
+        treinar_modelos_paralelo(
+            caminho_treino="../../Data/Processed/base_train.parquet",
+            caminho_teste="../../Data/Processed/base_test.parquet",
+            caminho_saida="../../Data/Modeling",
+            n_workers=args.workers
+        )
+    elif args.dobras_compartilhadas:
+        treinar_modelos_dobras(
+            caminho_treino="../../Data/Processed/base_train.parquet",
+            caminho_teste="../../Data/Processed/base_test.parquet",
+            caminho_saida="../../Data/Modeling"
+        )
+    else:
+        treinar_modelos(
+            caminho_treino="../../Data/Processed/base_train.parquet",
+            caminho_teste="../../Data/Processed/base_test.parquet",
+            caminho_saida="../../Data/Modeling"
+        )
+    gravar_trace("../../Data/Logs/trace_treinamento.json", raiz="treinamento")
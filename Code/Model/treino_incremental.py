@@ -0,0 +1,294 @@
+"""
+Treinamento incremental (out-of-core) da Regressão Logística sobre bases maiores que a memória.
+
+Em vez de carregar a base de treino inteira no `setup` do PyCaret, a base é percorrida em
+lotes do parquet (ver `acesso_dados.ler_lotes`), e apenas um lote fica em memória por vez:
+1. Estatísticas: médias e desvios das features (imputação e padronização), calculados em
+   uma passada sobre as linhas de treino.
+2. Treino: `SGDClassifier` com log loss (regressão logística) ajustado com `partial_fit`,
+   lote a lote, por algumas épocas.
+3. Calibração sigmoid (Platt) sobre um fluxo separado: uma fração fixa das linhas de cada
+   lote, sorteada com semente, fica de fora do treino e é usada apenas aqui. Os dois
+   parâmetros são ajustados por Newton, com gradiente e hessiana acumulados lote a lote.
+4. Threshold de decisão: as probabilidades calibradas do mesmo fluxo reservado são acumuladas
+   em histogramas por classe e varridas com `analise_threshold.varrer_histogramas` (maior F1,
+   como no treinamento principal). O threshold é gravado ao lado do modelo
+   (`modelo_incremental_threshold.json`) e lido pela aplicação.
+5. Avaliação na base de teste, também em lotes (Log Loss e F1 Score no threshold escolhido).
+
+A padronização é incorporada aos coeficientes, e o modelo é salvo no mesmo formato do
+kernel NumPy (ver `kernel_numpy.py`): o artefato .npz é aceito por `aplicacao.aplicar_modelo`
+e pelos dashboards sem nenhuma alteração, e o PyCaret não é importado.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import mlflow
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+
+from analise_threshold import (FRACAO_MINIMA_CLASSE, escolher_threshold, gravar_threshold, ponto_operacao,
+                               varrer_histogramas)
+from kernel_numpy import carregar_preditor_numpy
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DataPrep"))
+from acesso_dados import ler_lotes
+from motor_preparacao import montar_matriz
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+FEATURES = ["lat", "lon", "minutes_remaining", "period", "playoffs", "shot_distance"]
+TARGET = "shot_made_flag"
+
+# Faixas dos histogramas de probabilidade da escolha do threshold (mesma resolução da aplicação)
+BINS_THRESHOLD = 1200
+# Threshold usado se nenhum candidato tiver `FRACAO_MINIMA_CLASSE` das linhas em cada classe prevista
+THRESHOLD_SEM_CANDIDATO = 0.5
+
+
+def _lotes(caminho, tamanho_lote):
+    """Itera sobre (features, alvo) de um parquet, em matrizes float64 de até `tamanho_lote` linhas."""
+    for tabela in ler_lotes(caminho, FEATURES + [TARGET], tamanho_lote):
+        matriz = montar_matriz([tabela], FEATURES + [TARGET])
+        yield matriz[:, :-1], matriz[:, -1]
+
+
+def _separar_calibracao(n_linhas, indice_lote, fracao_calibracao, random_state):
+    """Máscara das linhas do lote reservadas para a calibração (mesmo sorteio em todas as passadas)."""
+    rng = np.random.default_rng([random_state, indice_lote])
+    return rng.random(n_linhas) < fracao_calibracao
+
+
+def _estatisticas(caminho_treino, tamanho_lote, fracao_calibracao, random_state):
+    """
+    Calcula médias e desvios das features nas linhas de treino e conta as classes da calibração.
+
+    Returns:
+        tuple: (médias, desvios, contagem por classe nas linhas de calibração)
+    """
+    soma = np.zeros(len(FEATURES))
+    soma_quadrados = np.zeros(len(FEATURES))
+    contagem = np.zeros(len(FEATURES))
+    classes_calibracao = np.zeros(2, dtype=np.int64)
+
+    for i, (X, y) in enumerate(_lotes(caminho_treino, tamanho_lote)):
+        calibracao = _separar_calibracao(len(y), i, fracao_calibracao, random_state)
+        X_treino = X[~calibracao]
+        presentes = ~np.isnan(X_treino)
+        soma += np.where(presentes, X_treino, 0.0).sum(axis=0)
+        soma_quadrados += np.where(presentes, X_treino ** 2, 0.0).sum(axis=0)
+        contagem += presentes.sum(axis=0)
+        classes_calibracao += np.bincount(y[calibracao].astype(np.int64), minlength=2)
+
+    if not contagem.all():
+        raise ValueError("❌ Base de treino sem linhas suficientes para o treino incremental.")
+    medias = soma / contagem
+    desvios = np.sqrt(np.maximum(soma_quadrados / contagem - medias ** 2, 0.0))
+    desvios[desvios == 0] = 1.0
+    return medias, desvios, classes_calibracao
+
+
+def _padronizar(X, medias, desvios):
+    """Imputa as médias nos valores ausentes e padroniza as features."""
+    return (np.where(np.isnan(X), medias, X) - medias) / desvios
+
+
+def _ajustar_sigmoid(caminho_treino, tamanho_lote, fracao_calibracao, random_state, resposta,
+                     classes_calibracao, max_iteracoes=20, tolerancia=1e-8):
+    """
+    Ajusta a calibração sigmoid de Platt, P(y=1) = 1 / (1 + exp(a * f + b)), no fluxo de calibração.
+
+    Usa os mesmos alvos suavizados do `CalibratedClassifierCV` do scikit-learn. Cada iteração
+    de Newton percorre o fluxo uma vez, acumulando apenas o gradiente e a hessiana (2 × 2).
+
+    Args:
+        resposta (callable): Função (X) que devolve a resposta não calibrada (decision_function).
+        classes_calibracao (np.ndarray): Contagem das classes 0 e 1 no fluxo de calibração.
+
+    Returns:
+        tuple: (a, b)
+    """
+    negativos, positivos = classes_calibracao
+    alvo_positivo = (positivos + 1.0) / (positivos + 2.0)
+    alvo_negativo = 1.0 / (negativos + 2.0)
+
+    a, b = 0.0, float(np.log((negativos + 1.0) / (positivos + 1.0)))
+    for _ in range(max_iteracoes):
+        gradiente = np.zeros(2)
+        hessiana = np.zeros((2, 2))
+        for i, (X, y) in enumerate(_lotes(caminho_treino, tamanho_lote)):
+            calibracao = _separar_calibracao(len(y), i, fracao_calibracao, random_state)
+            f = resposta(X[calibracao])
+            t = np.where(y[calibracao] == 1, alvo_positivo, alvo_negativo)
+            p = 1.0 / (1.0 + np.exp(a * f + b))
+            # Derivadas da log loss em relação a (a, b), com z = a * f + b e dL/dz = t - p
+            residuo = t - p
+            peso = p * (1.0 - p)
+            gradiente += [np.dot(residuo, f), residuo.sum()]
+            hessiana += [[np.dot(peso, f * f), np.dot(peso, f)], [np.dot(peso, f), peso.sum()]]
+
+        passo = np.linalg.solve(hessiana + 1e-12 * np.eye(2), gradiente)
+        a, b = a - passo[0], b - passo[1]
+        if np.abs(passo).max() < tolerancia:
+            break
+    return float(a), float(b)
+
+
+def _escolher_threshold(preditor, caminho_treino, tamanho_lote, fracao_calibracao, random_state):
+    """
+    Escolhe o threshold de decisão no fluxo de calibração, a partir dos histogramas das probabilidades.
+
+    Se nenhum threshold tiver `FRACAO_MINIMA_CLASSE` das linhas em cada classe prevista, usa
+    `THRESHOLD_SEM_CANDIDATO`.
+
+    Args:
+        preditor (PreditorNumpy): Modelo calibrado.
+
+    Returns:
+        dict: Threshold escolhido e suas métricas no fluxo de calibração (ver `escolher_threshold`).
+    """
+    histogramas = np.zeros((2, BINS_THRESHOLD), dtype=np.int64)
+    for i, (X, y) in enumerate(_lotes(caminho_treino, tamanho_lote)):
+        calibracao = _separar_calibracao(len(y), i, fracao_calibracao, random_state)
+        proba = preditor.predict_proba(X[calibracao])[:, 1]
+        faixas = np.clip((proba * BINS_THRESHOLD).astype(np.int64), 0, BINS_THRESHOLD - 1)
+        histogramas += np.bincount(y[calibracao].astype(np.int64) * BINS_THRESHOLD + faixas,
+                                   minlength=2 * BINS_THRESHOLD).reshape(2, BINS_THRESHOLD)
+
+    varredura = varrer_histogramas(histogramas[0], histogramas[1], np.linspace(0, 1, BINS_THRESHOLD + 1))
+    try:
+        return escolher_threshold(varredura, "f1", FRACAO_MINIMA_CLASSE)
+    except ValueError as erro:
+        logging.warning(f"⚠️ {erro} Usando o threshold {THRESHOLD_SEM_CANDIDATO}.")
+        return {**ponto_operacao(varredura, THRESHOLD_SEM_CANDIDATO),
+                "threshold": THRESHOLD_SEM_CANDIDATO, "criterio": "sem_candidato"}
+
+
+def _avaliar_em_lotes(preditor, caminho_teste, tamanho_lote, threshold):
+    """
+    Avalia o preditor na base de teste, lote a lote.
+
+    Args:
+        threshold (float): Limite de decisão aplicado à probabilidade da classe 1.
+
+    Returns:
+        tuple: (log_loss, f1_score) na base de teste.
+    """
+    soma_log_loss, linhas = 0.0, 0
+    vp = fp = fn = 0
+    for X, y in _lotes(caminho_teste, tamanho_lote):
+        proba = np.clip(preditor.predict_proba(X)[:, 1], 1e-15, 1 - 1e-15)
+        predicoes = proba >= threshold
+        soma_log_loss -= np.sum(np.where(y == 1, np.log(proba), np.log(1 - proba)))
+        linhas += len(y)
+        vp += int(np.sum(predicoes & (y == 1)))
+        fp += int(np.sum(predicoes & (y == 0)))
+        fn += int(np.sum(~predicoes & (y == 1)))
+    f1 = 2 * vp / (2 * vp + fp + fn) if vp else 0.0
+    return soma_log_loss / max(linhas, 1), f1
+
+
+def treinar_incremental(caminho_treino, caminho_teste, caminho_saida, tamanho_lote=100_000, epocas=5,
+                        fracao_calibracao=0.1, alpha=1e-4, eta0=0.01, random_state=42):
+    """
+    Treina a Regressão Logística em lotes (SGD com log loss), calibra e salva o kernel NumPy.
+
+    Apenas um lote de até `tamanho_lote` linhas fica em memória por vez, independentemente do
+    tamanho das bases.
+
+    Args:
+        caminho_treino (str): Caminho para o arquivo .parquet com a base de treino.
+        caminho_teste (str): Caminho para o arquivo .parquet com a base de teste.
+        caminho_saida (str): Caminho do diretório para salvar o modelo.
+        tamanho_lote (int, opcional): Linhas por lote (default: 100_000).
+        epocas (int, opcional): Passadas de `partial_fit` sobre a base de treino (default: 5).
+        fracao_calibracao (float, opcional): Fração das linhas reservada para a calibração (default: 0.1).
+        alpha (float, opcional): Regularização L2 do `SGDClassifier` (default: 1e-4).
+        eta0 (float, opcional): Taxa de aprendizado inicial do SGD (default: 0.01).
+        random_state (int, opcional): Semente do SGD e da separação do fluxo de calibração (default: 42).
+
+    Returns:
+        dict: Caminho do modelo, threshold de decisão e métricas na base de teste.
+    """
+    inicio = time.perf_counter()
+    logging.info(f"📥 Percorrendo a base de treino em lotes de até {tamanho_lote:,} linhas...")
+    medias, desvios, classes_calibracao = _estatisticas(caminho_treino, tamanho_lote, fracao_calibracao,
+                                                        random_state)
+
+    # Taxa adaptativa: a taxa "optimal" (padrão) oscila demais com poucas passadas
+    modelo = SGDClassifier(loss="log_loss", alpha=alpha, learning_rate="adaptive", eta0=eta0,
+                           random_state=random_state)
+    rng = np.random.default_rng(random_state)
+    linhas_treino = 0
+    for epoca in range(epocas):
+        for i, (X, y) in enumerate(_lotes(caminho_treino, tamanho_lote)):
+            treino = ~_separar_calibracao(len(y), i, fracao_calibracao, random_state)
+            ordem = rng.permutation(np.flatnonzero(treino))
+            modelo.partial_fit(_padronizar(X[ordem], medias, desvios), y[ordem], classes=[0, 1])
+            linhas_treino += len(ordem) if epoca == 0 else 0
+        logging.info(f"🚀 Época {epoca + 1}/{epocas} concluída")
+
+    # Coeficientes na escala original das features (a padronização deixa de ser uma etapa)
+    coef = modelo.coef_.ravel() / desvios
+    intercept = float(modelo.intercept_[0] - np.dot(coef, medias))
+
+    logging.info("🎯 Calibrando (sigmoid) no fluxo reservado...")
+    a, b = _ajustar_sigmoid(
+        caminho_treino, tamanho_lote, fracao_calibracao, random_state,
+        lambda X: np.where(np.isnan(X), medias, X) @ coef + intercept, classes_calibracao
+    )
+
+    os.makedirs(caminho_saida, exist_ok=True)
+    caminho_modelo = os.path.join(caminho_saida, "modelo_incremental_numpy.npz")
+    metadados = {
+        "features": FEATURES,
+        "componentes": [{"tipo": "lr", "intercept": intercept, "calibracao": "sigmoid", "a": a, "b": b}],
+    }
+    np.savez(caminho_modelo, imputacao=medias, classes=np.array([0, 1]), coef_0=coef,
+             metadados=np.array(json.dumps(metadados)))
+
+    preditor = carregar_preditor_numpy(caminho_modelo)
+    ponto = _escolher_threshold(preditor, caminho_treino, tamanho_lote, fracao_calibracao, random_state)
+    caminho_ponto = gravar_threshold(caminho_modelo, ponto)
+    logging.info(f"🎚️ Threshold escolhido ({ponto['criterio']}, fluxo de calibração): {ponto['threshold']:.4f} | "
+                 f"F1 {ponto['f1']:.4f} | precisão {ponto['precision']:.4f} | recall {ponto['recall']:.4f}")
+
+    loss, f1 = _avaliar_em_lotes(preditor, caminho_teste, tamanho_lote, ponto["threshold"])
+    tempo = time.perf_counter() - inicio
+    logging.info(f"📊 LR incremental | Log Loss: {loss:.4f} | F1 Score: {f1:.4f} | "
+                 f"{linhas_treino:,} linhas de treino, {int(classes_calibracao.sum()):,} de calibração | {tempo:.2f} s")
+    logging.info(f"💾 Modelo salvo em: {caminho_modelo} (threshold em {caminho_ponto})")
+
+    mlflow.set_experiment("Treinamento")
+    with mlflow.start_run(run_name="TreinoIncremental"):
+        mlflow.log_params({"modelo_selecionado": "lr_sgd", "tamanho_lote": tamanho_lote, "epocas": epocas,
+                           "fracao_calibracao": fracao_calibracao, "alpha": alpha, "eta0": eta0,
+                           "criterio_threshold": ponto["criterio"], "fracao_minima_threshold": FRACAO_MINIMA_CLASSE})
+        mlflow.log_metrics({"log_loss": loss, "f1_score": f1, "threshold": ponto["threshold"],
+                            "f1_threshold": ponto["f1"], "linhas_treino": linhas_treino,
+                            "linhas_calibracao": int(classes_calibracao.sum()), "tempo_treino_s": tempo})
+        mlflow.log_artifact(caminho_modelo)
+        mlflow.log_artifact(caminho_ponto)
+
+    return {"caminho_modelo": caminho_modelo, "threshold": ponto["threshold"], "log_loss": loss, "f1_score": f1}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Treinamento incremental (out-of-core) da Regressão Logística.")
+    parser.add_argument("--tamanho-lote", type=int, default=100_000)
+    parser.add_argument("--epocas", type=int, default=5)
+    args = parser.parse_args()
+
+    treinar_incremental(
+        caminho_treino="../../Data/Processed/base_train.parquet",
+        caminho_teste="../../Data/Processed/base_test.parquet",
+        caminho_saida="../../Data/Modeling",
+        tamanho_lote=args.tamanho_lote,
+        epocas=args.epocas
+    )
@@ -2,25 +2,460 @@
 Módulo responsável pela aplicação do modelo treinado sobre dados de produção.
 
 Este pipeline realiza:
-- Carregamento do modelo final.
-- Leitura da base de produção.
+- Carregamento do modelo final, reaproveitado entre jobs do mesmo processo enquanto o artefato
+  não muda (ver `registro_modelos.py`).
+- Leitura do identificador `shot_id`, das features e da variável alvo da base de produção
+  (integral, em lotes no modo streaming ou em fatias paralelas), sem as demais colunas da base
+  bruta, convertidos para o schema compacto usado no treinamento (ver `esquema_arremessos.py`).
 - Realização das predições com ajuste de threshold.
-- Salvamento dos resultados com predições.
+- Salvamento dos resultados com probabilidades e predições, e dos agregados de avaliação
+  (matriz de confusão, relatório por classe e histogramas das probabilidades por classe real)
+  em `agregados_avaliacao.json`, lidos pelo dashboard analítico sem recalcular nada. Para um
+  arquivo de predições gravado sem os agregados, `agregados_de_predicoes` os reconstrói uma vez.
 - Cálculo de métricas (Log Loss e F1 Score), se disponível a variável alvo.
-- Registro das métricas e artefatos no MLflow com a rodada "PipelineAplicacao".
+- Monitoramento incremental de drift das features (PSI contra a referência da base de treino)
+  e de desempenho/calibração por janela de tempo (ver `monitoramento.py`).
+- Registro das métricas, do resumo do monitoramento e dos artefatos no MLflow com a rodada
+  "PipelineAplicacao".
+- Medição da carga do modelo, leituras, `predict_proba`, gravação, monitoramento e MLflow,
+  registrada na mesma rodada (ver `instrumentacao.py`).
+- Modo de comparação (campeão/desafiantes, `aplicar_modelos_comparacao`): N modelos pontuam os
+  mesmos lotes, lidos e validados uma única vez, com as probabilidades e predições lado a lado
+  em `predictions_comparacao.parquet` e as métricas de cada modelo na rodada "ComparacaoModelos".
+
+PyCaret e MLflow são importados apenas quando usados: com um kernel NumPy (.npz) e o
+registro no MLflow desativado, a pontuação depende somente de NumPy, pandas e PyArrow.
 """
 
+import argparse
+import json
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
-from pycaret.classification import load_model
-from sklearn.metrics import log_loss, f1_score
-import mlflow
+import pyarrow as pa
+import pyarrow.parquet as pq
 import logging
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Model"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DataPrep"))
+
+from acesso_dados import colunas_disponiveis, ler_colunas, ler_lotes
+from analise_threshold import FRACAO_MINIMA_CLASSE, escolher_threshold, ler_threshold, varrer_histogramas
+from esquema_arremessos import ESQUEMA_ARREMESSOS, esquema_para, tabela_compacta
+import instrumentacao
+from instrumentacao import medir, medir_lotes
+from monitoramento import COLUNA_TEMPO, MonitorProducao
+from registro_modelos import REGISTRO, obter_modelo
 
 # Configuração do logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def aplicar_modelo(caminho_modelo, caminho_dados_producao, caminho_saida, threshold=0.35):
+FEATURES = ["lat", "lon", "minutes_remaining", "period", "playoffs", "shot_distance"]
+TARGET = "shot_made_flag"
+COLUNAS_IDENTIFICACAO = ["shot_id"]
+THRESHOLD_PADRAO = 0.35
+ARQUIVO_AGREGADOS = "agregados_avaliacao.json"
+ARQUIVO_COMPARACAO = "predictions_comparacao.parquet"
+ARQUIVO_AGREGADOS_COMPARACAO = "agregados_comparacao.json"
+# Faixas dos histogramas de probabilidade: resolução de 1/1200 na varredura de thresholds da
+# produção, e 30 faixas de 40 no gráfico do dashboard
+BINS_HISTOGRAMA = 1200
+
+
+def relatorio_classificacao(matriz_confusao):
+    """
+    Relatório por classe a partir da matriz de confusão, no formato do `classification_report(output_dict=True)`.
+
+    Args:
+        matriz_confusao (list[list[int]]): Matriz 2x2 [[VN, FP], [FN, VP]] (linhas: classe real).
+
+    Returns:
+        dict: {"0": {...}, "1": {...}, "accuracy": ..., "macro avg": {...}, "weighted avg": {...}}.
+    """
+    matriz = np.asarray(matriz_confusao, dtype=np.int64)
+    suporte, previstos = matriz.sum(axis=1), matriz.sum(axis=0)
+    relatorio = {}
+    for classe in (0, 1):
+        # Como no sklearn, entram apenas as classes presentes no alvo ou nas predições
+        if suporte[classe] == 0 and previstos[classe] == 0:
+            continue
+        acertos = matriz[classe, classe]
+        precisao = acertos / previstos[classe] if previstos[classe] else 0.0
+        recall = acertos / suporte[classe] if suporte[classe] else 0.0
+        relatorio[str(classe)] = {
+            "precision": float(precisao),
+            "recall": float(recall),
+            "f1-score": float(2 * precisao * recall / (precisao + recall)) if precisao + recall else 0.0,
+            "support": int(suporte[classe]),
+        }
+
+    classes = list(relatorio.values())
+    total = sum(c["support"] for c in classes)
+    relatorio["accuracy"] = float(np.trace(matriz) / total) if total else 0.0
+    for nome, pesos in (("macro avg", [1] * len(classes)), ("weighted avg", [c["support"] for c in classes])):
+        soma_pesos = sum(pesos) or 1
+        relatorio[nome] = {medida: sum(p * c[medida] for p, c in zip(pesos, classes)) / soma_pesos
+                           for medida in ("precision", "recall", "f1-score")}
+        relatorio[nome]["support"] = total
+    return relatorio
+
+
+class MetricasIncrementais:
+    """
+    Acumula, lote a lote, as estatísticas necessárias para calcular F1 Score e Log Loss
+    sem manter as predições em memória.
+
+    O F1 Score é obtido a partir das contagens de verdadeiros positivos, falsos positivos e
+    falsos negativos. O Log Loss é a média da entropia cruzada, com as probabilidades limitadas
+    ao epsilon da máquina, da mesma forma que o `sklearn.metrics.log_loss`.
+
+    Também acumula os agregados de avaliação gravados ao lado das predições (`ARQUIVO_AGREGADOS`):
+    a matriz de confusão e os histogramas das probabilidades por classe real, em `BINS_HISTOGRAMA`
+    faixas de mesma largura em [0, 1].
+
+    Args:
+        threshold (float, opcional): Limite de decisão usado nas predições, registrado nos agregados.
+    """
+
+    def __init__(self, threshold=None):
+        self.threshold = threshold
+        self.verdadeiros_positivos = 0
+        self.falsos_positivos = 0
+        self.falsos_negativos = 0
+        self.verdadeiros_negativos = 0
+        self.soma_log_loss = 0.0
+        self.linhas_avaliadas = 0
+        self.linhas_com_proba = 0
+        self.contagem_predicoes = Counter()
+        # Linhas: classe real 0, classe real 1 e linhas sem alvo
+        self.histogramas = np.zeros((3, BINS_HISTOGRAMA), dtype=np.int64)
+        self.possui_proba = False
+
+    def _acumular_histogramas(self, proba, linhas):
+        """Soma as probabilidades às faixas do histograma da linha (classe real) de cada arremesso."""
+        faixas = np.clip((proba * BINS_HISTOGRAMA).astype(np.int64), 0, BINS_HISTOGRAMA - 1)
+        self.histogramas += np.bincount(linhas * BINS_HISTOGRAMA + faixas,
+                                        minlength=3 * BINS_HISTOGRAMA).reshape(3, BINS_HISTOGRAMA)
+        self.possui_proba = True
+
+    def atualizar(self, y_true, y_pred, proba=None):
+        """
+        Incorpora um lote de resultados às estatísticas acumuladas.
+
+        Args:
+            y_true (array-like): Valores reais do alvo (linhas nulas são ignoradas nas métricas).
+            y_pred (array-like): Classes previstas para o lote.
+            proba (array-like, opcional): Probabilidades previstas para a classe 1.
+
+        Returns:
+            None
+        """
+        y_pred = np.asarray(y_pred)
+        self.contagem_predicoes.update(y_pred.tolist())
+
+        if y_true is None:
+            if proba is not None:
+                self._acumular_histogramas(np.asarray(proba, dtype=float), np.full(len(y_pred), 2))
+            return
+
+        y_true = np.asarray(y_true, dtype=float)
+        validos = ~np.isnan(y_true)
+        if proba is not None:
+            self._acumular_histogramas(np.asarray(proba, dtype=float),
+                                       np.where(validos, np.nan_to_num(y_true), 2).astype(np.int64))
+        if not validos.any():
+            return
+
+        y_true = y_true[validos]
+        y_pred = y_pred[validos]
+        self.verdadeiros_positivos += int(np.sum((y_pred == 1) & (y_true == 1)))
+        self.falsos_positivos += int(np.sum((y_pred == 1) & (y_true == 0)))
+        self.falsos_negativos += int(np.sum((y_pred != 1) & (y_true == 1)))
+        self.verdadeiros_negativos += int(np.sum((y_pred != 1) & (y_true == 0)))
+        self.linhas_avaliadas += int(validos.sum())
+
+        if proba is not None:
+            eps = np.finfo(float).eps
+            p = np.clip(np.asarray(proba, dtype=float)[validos], eps, 1 - eps)
+            self.soma_log_loss += float(-np.sum(y_true * np.log(p) + (1 - y_true) * np.log(1 - p)))
+            self.linhas_com_proba += int(validos.sum())
+
+    def calcular(self):
+        """
+        Calcula as métricas finais a partir das estatísticas acumuladas.
+
+        O Log Loss só é incluído quando todas as linhas avaliadas tiveram probabilidade prevista.
+
+        Returns:
+            dict: Métricas no formato {"log_loss_prod": ..., "f1_prod": ...}.
+        """
+        metrics = {}
+        if self.linhas_com_proba and self.linhas_com_proba == self.linhas_avaliadas:
+            metrics["log_loss_prod"] = self.soma_log_loss / self.linhas_avaliadas
+
+        denominador = 2 * self.verdadeiros_positivos + self.falsos_positivos + self.falsos_negativos
+        metrics["f1_prod"] = 2 * self.verdadeiros_positivos / denominador if denominador else 0.0
+        return metrics
+
+    def distribuicao_predicoes(self):
+        """
+        Retorna a proporção de cada classe prevista sobre todas as linhas pontuadas.
+
+        Returns:
+            dict: Proporções no formato {"pred_class_<classe>": proporção}.
+        """
+        total = sum(self.contagem_predicoes.values())
+        return {f"pred_class_{int(k)}": v / total for k, v in self.contagem_predicoes.items()}
+
+    def agregados(self):
+        """
+        Agregados de avaliação, de tamanho fixo, usados pelo dashboard analítico sem reler as predições.
+
+        Returns:
+            dict: Totais de linhas e de predições por classe, matriz de confusão [[VN, FP], [FN, VP]]
+            e relatório por classe (se houver alvo), e histogramas das probabilidades por classe real
+            (se o modelo expõe `predict_proba`).
+        """
+        agregados = {
+            "threshold": self.threshold,
+            "linhas": sum(self.contagem_predicoes.values()),
+            "predicoes": {str(int(k)): v for k, v in self.contagem_predicoes.items()},
+            "linhas_avaliadas": self.linhas_avaliadas,
+        }
+        if self.linhas_avaliadas:
+            matriz = [[self.verdadeiros_negativos, self.falsos_positivos],
+                      [self.falsos_negativos, self.verdadeiros_positivos]]
+            agregados["matriz_confusao"] = matriz
+            agregados["relatorio"] = relatorio_classificacao(matriz)
+        if self.possui_proba:
+            agregados["histograma_proba"] = {
+                "limites": np.linspace(0, 1, BINS_HISTOGRAMA + 1).tolist(),
+                "0": self.histogramas[0].tolist(),
+                "1": self.histogramas[1].tolist(),
+                "sem_alvo": self.histogramas[2].tolist(),
+            }
+        return agregados
+
+
+def carregar_modelo(caminho_modelo):
+    """
+    Obtém o modelo de pontuação do registro do processo (ver `registro_modelos.py`).
+
+    O modelo é carregado do disco apenas na primeira chamada do processo ou quando o conteúdo
+    do artefato muda; o PyCaret é importado somente se o artefato for um pipeline `.pkl`.
+
+    Args:
+        caminho_modelo (str): Caminho do kernel NumPy (.npz) ou do modelo do PyCaret (sem extensão).
+
+    Returns:
+        Modelo com `predict_proba`: `PreditorNumpy` ou pipeline do PyCaret.
+    """
+    return obter_modelo(caminho_modelo)
+
+
+def _resolver_threshold(caminho_modelo, threshold):
+    """
+    Threshold de decisão da pontuação: o informado, o gravado com o modelo no treinamento ou `THRESHOLD_PADRAO`.
+
+    Args:
+        caminho_modelo (str): Caminho do kernel NumPy (.npz) ou do modelo do PyCaret (sem extensão).
+        threshold (float ou None): Threshold informado pelo chamador.
+
+    Returns:
+        float: Threshold usado na pontuação.
+    """
+    if threshold is not None:
+        return threshold
+    threshold = ler_threshold(caminho_modelo, padrao=THRESHOLD_PADRAO)
+    logging.info(f"🎚️ Threshold de decisão do modelo: {threshold:.4f}")
+    return threshold
+
+
+def _pontuar(modelo, df_features, threshold):
+    """
+    Calcula probabilidades e classes previstas para um conjunto de features.
+
+    Args:
+        modelo: Modelo treinado (pipeline do PyCaret).
+        df_features (pd.DataFrame): Features no formato esperado pelo modelo.
+        threshold (float): Limite de probabilidade para converter predições em classe.
+
+    Returns:
+        tuple: (probabilidades da classe 1 ou None, classes previstas)
+    """
+    if hasattr(modelo, "predict_proba"):
+        with medir("predict_proba", linhas=len(df_features)):
+            probabilidades = modelo.predict_proba(df_features)[:, 1]
+        # Aplica o threshold sobre a probabilidade da classe 1
+        return probabilidades, (probabilidades >= threshold).astype(int)
+    with medir("predict", linhas=len(df_features)):
+        return None, np.asarray(modelo.predict(df_features))
+
+
+def _gravar_agregados(agregados, output_path, nome_arquivo=ARQUIVO_AGREGADOS):
+    """
+    Grava os agregados de avaliação ao lado do arquivo de predições.
+
+    Args:
+        agregados (dict): Resultado de `MetricasIncrementais.agregados` (ou um por modelo, na comparação).
+        output_path (str): Caminho do arquivo de predições.
+        nome_arquivo (str, opcional): Nome do arquivo de agregados (default: `ARQUIVO_AGREGADOS`).
+
+    Returns:
+        str: Caminho do arquivo de agregados.
+    """
+    caminho = os.path.join(os.path.dirname(output_path), nome_arquivo)
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(agregados, arquivo)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def _verificar_fracao_prevista(metricas, nome="modelo"):
+    """
+    Avisa se a fração de arremessos previstos como acerto saiu do intervalo exigido na escolha do threshold.
+
+    No treinamento, o threshold só é elegível se cada classe prevista tiver ao menos
+    `FRACAO_MINIMA_CLASSE` das linhas; fora disso na produção (ex.: nenhum acerto previsto), o F1
+    de produção não reflete o ponto de operação escolhido.
+
+    Args:
+        metricas (MetricasIncrementais): Estatísticas acumuladas durante a pontuação.
+        nome (str, opcional): Nome do modelo na mensagem (default: "modelo").
+
+    Returns:
+        bool: True se a fração prevista está dentro do intervalo (ou não houve linhas pontuadas).
+    """
+    total = sum(metricas.contagem_predicoes.values())
+    if not total:
+        return True
+    fracao = metricas.contagem_predicoes.get(1, 0) / total
+    if FRACAO_MINIMA_CLASSE <= fracao <= 1 - FRACAO_MINIMA_CLASSE:
+        return True
+    logging.warning(f"⚠️ {nome}: {fracao:.2%} dos arremessos previstos como acerto com o threshold "
+                    f"{metricas.threshold} (esperado entre {FRACAO_MINIMA_CLASSE:.0%} e "
+                    f"{1 - FRACAO_MINIMA_CLASSE:.0%}); o threshold do treinamento não se ajusta à produção.")
+    return False
+
+
+def agregados_de_predicoes(caminho_predicoes, threshold=None, batch_size=50_000):
+    """
+    Reconstrói e grava os agregados de avaliação a partir de um arquivo de predições já gravado.
+
+    Usado quando o arquivo de predições existe sem `ARQUIVO_AGREGADOS` ao lado (ex.: predições
+    versionadas antes dos agregados). Lê apenas o alvo, a predição e, se existir, a probabilidade.
+
+    Args:
+        caminho_predicoes (str): Arquivo .parquet com as predições.
+        threshold (float, opcional): Limite de decisão usado nas predições, se conhecido.
+        batch_size (int, opcional): Linhas por lote de leitura (default: 50.000).
+
+    Returns:
+        dict: Agregados gravados (ver `MetricasIncrementais.agregados`).
+    """
+    with pq.ParquetFile(caminho_predicoes) as arquivo:
+        colunas = [c for c in (TARGET, "prediction", "proba") if c in arquivo.schema_arrow.names]
+        metricas = MetricasIncrementais(threshold)
+        for lote in arquivo.iter_batches(batch_size=batch_size, columns=colunas):
+            valores = {c: lote.column(c).to_numpy(zero_copy_only=False) for c in colunas}
+            metricas.atualizar(valores.get(TARGET), valores["prediction"], valores.get("proba"))
+
+    agregados = metricas.agregados()
+    caminho = _gravar_agregados(agregados, caminho_predicoes)
+    logging.info(f"🧮 Agregados de avaliação reconstruídos de {caminho_predicoes} em {caminho}")
+    return agregados
+
+
+def _metricas_producao(metricas):
+    """
+    Métricas de produção de uma pontuação com alvo: F1, Log Loss e ponto de operação ótimo.
+
+    Args:
+        metricas (MetricasIncrementais): Estatísticas acumuladas durante a pontuação.
+
+    Returns:
+        dict: Métricas de `MetricasIncrementais.calcular`, mais "threshold_otimo_prod" e
+        "f1_threshold_otimo_prod" se houver probabilidades.
+    """
+    metrics = metricas.calcular()
+    if metricas.possui_proba:
+        # Ponto de operação ótimo na produção, pela varredura dos histogramas acumulados
+        ponto = escolher_threshold(varrer_histogramas(metricas.histogramas[0], metricas.histogramas[1],
+                                                      np.linspace(0, 1, BINS_HISTOGRAMA + 1)))
+        metrics["threshold_otimo_prod"] = ponto["threshold"]
+        metrics["f1_threshold_otimo_prod"] = ponto["f1"]
+    return metrics
+
+
+def _registrar_metricas(metricas, output_path, registrar_mlflow=True, monitor=None):
+    """
+    Grava os agregados de avaliação, calcula as métricas de produção e, se habilitado, registra
+    no MLflow as métricas, os arquivos de predições e de agregados, a distribuição das classes
+    e o resumo do monitoramento.
+
+    Args:
+        metricas (MetricasIncrementais): Estatísticas acumuladas durante a pontuação.
+        output_path (str): Caminho do arquivo de predições a ser registrado como artefato.
+        registrar_mlflow (bool, opcional): Se False, as métricas são apenas exibidas no log (default: True).
+        monitor (MonitorProducao, opcional): Monitor de drift e desempenho atualizado na pontuação.
+
+    Returns:
+        None
+    """
+    caminho_agregados = _gravar_agregados(metricas.agregados(), output_path)
+    logging.info(f"🧮 Agregados de avaliação salvos em {caminho_agregados}")
+    _verificar_fracao_prevista(metricas)
+
+    resumo = None
+    if monitor is not None:
+        resumo = monitor.resumo()
+        monitor.registrar_log(resumo)
+    instrumentacao.registrar_log("aplicacao")
+
+    if metricas.linhas_avaliadas == 0:
+        logging.warning("⚠️ Nenhuma linha com 'shot_made_flag' válida para avaliação.")
+        if resumo is None:
+            return
+        metrics = {}
+    else:
+        metrics = _metricas_producao(metricas)
+        logging.info(f"📊 Métricas calculadas: {metrics}")
+
+    if not registrar_mlflow:
+        return
+
+    with medir("mlflow"):
+        import mlflow
+
+        # Definir experimento no MLflow
+        mlflow.set_experiment("PipelineAplicacao")
+
+        # Log da rodada no MLflow
+        with mlflow.start_run(run_name="PipelineAplicacao"):
+            mlflow.log_metrics(metrics)
+            mlflow.log_artifact(output_path)
+            mlflow.log_artifact(caminho_agregados)
+
+            # Log da distribuição das predições
+            mlflow.log_metrics(metricas.distribuicao_predicoes())
+
+            # Resumo do monitoramento: principais métricas na rodada, detalhes em um único JSON
+            if resumo is not None:
+                mlflow.log_metrics(MonitorProducao.metricas_mlflow(resumo))
+                mlflow.log_dict(resumo, "monitoramento.json")
+
+            # Tempos dos trechos medidos até aqui (o trecho raiz "aplicacao" ainda está aberto)
+            instrumentacao.registrar_mlflow("aplicacao")
+
+
+@medir("aplicacao")
+def aplicar_modelo(caminho_modelo, caminho_dados_producao, caminho_saida, threshold=None, registrar_mlflow=True,
+                   caminho_referencia=None):
     """
     Executa a aplicação do modelo treinado sobre dados de produção.
 
@@ -31,86 +466,519 @@ def aplicar_modelo(caminho_modelo, caminho_dados_producao, caminho_saida, thresh
         caminho_modelo (str): Caminho para o modelo salvo (sem extensão).
         caminho_dados_producao (str): Caminho para o arquivo .parquet com dados de produção.
         caminho_saida (str): Caminho do diretório para salvar os resultados com predições.
-        threshold (float, opcional): Limite de probabilidade para converter predições em classe (default: 0.35).
+        threshold (float, opcional): Limite de probabilidade para converter predições em classe
+            (default: None, threshold gravado com o modelo ou `THRESHOLD_PADRAO`).
+        registrar_mlflow (bool, opcional): Se True, registra a rodada "PipelineAplicacao" no MLflow (default: True).
+        caminho_referencia (str, opcional): Referência de monitoramento gravada pela preparação
+            (`referencia_monitoramento.json`); sem ela, o drift das features não é calculado.
 
     Returns:
         None
-        
+
     """
+    threshold = _resolver_threshold(caminho_modelo, threshold)
     logging.info("📦 Carregando modelo treinado...")
-    modelo = load_model(caminho_modelo)
-
-    logging.info("📥 Carregando dados de produção...")
-    df_prod = pd.read_parquet(caminho_dados_producao)
+    modelo = carregar_modelo(caminho_modelo)
 
-    features = ["lat", "lon", "minutes_remaining", "period", "playoffs", "shot_distance"]
-
-    if not all(col in df_prod.columns for col in features):
-        raise ValueError("❌ Dados de produção não contêm todas as features necessárias.")
+    logging.info("📥 Carregando dados de produção (apenas features e variável alvo)...")
+    colunas, _ = _colunas_producao(caminho_dados_producao)
+    coluna_tempo = _coluna_tempo(caminho_dados_producao)
+    with medir("ler_parquet") as trecho:
+        tabela_lida = ler_colunas(caminho_dados_producao, colunas + coluna_tempo, tipos="tabela")
+        trecho.linhas = tabela_lida.num_rows
+    tabela = tabela_compacta(tabela_lida)
+    df_prod = tabela.to_pandas(split_blocks=True)
 
     logging.info("🔮 Realizando predições com threshold ajustado...")
+    probabilidades, predicoes = _pontuar(modelo, df_prod[FEATURES], threshold)
+    df_prod["proba"] = probabilidades if probabilidades is not None else np.nan
+    df_prod["prediction"] = predicoes
 
-    if hasattr(modelo, "predict_proba"):
-        probabilidades = modelo.predict_proba(df_prod[features])
-        print("Shape das probabilidades:", probabilidades.shape)
-        print("Primeiras linhas das probabilidades:")
-        print(probabilidades[:5])
+    if probabilidades is not None:
+        print("Primeiras probabilidades da classe 1:", probabilidades[:5])
         print("Classes previstas pelo modelo:", modelo.classes_)
 
-        # Aplica o threshold sobre a probabilidade da classe 1
-        df_prod["prediction"] = (probabilidades[:, 1] >= threshold).astype(int)
-    else:
-        probabilidades = None
-        df_prod["prediction"] = modelo.predict(df_prod[features])
-
     # Salvar os resultados
     os.makedirs(caminho_saida, exist_ok=True)
     output_path = os.path.join(caminho_saida, "predictions_prod.parquet")
-    df_prod.to_parquet(output_path)
+    with medir("gravar_parquet", linhas=len(df_prod)):
+        pq.write_table(tabela_compacta(df_prod), output_path)
     logging.info(f"✅ Resultados salvos em {output_path}")
 
-    # Definir experimento no MLflow
-    mlflow.set_experiment("PipelineAplicacao")
+    # Drift das features e desempenho por janela (substitui o describe/value_counts no stdout)
+    monitor = MonitorProducao.de_arquivo(caminho_referencia, threshold)
+    with medir("monitoramento", linhas=tabela.num_rows):
+        monitor.atualizar(tabela, probabilidades, _tempo_do_lote(tabela_lida, coluna_tempo))
 
     # Se a variável alvo estiver disponível, calcular métricas
-    if "shot_made_flag" in df_prod.columns:
-        valid_idx = df_prod["shot_made_flag"].notna()
-        if valid_idx.sum() > 0:
-            y_true = df_prod.loc[valid_idx, "shot_made_flag"]
-            y_pred = df_prod.loc[valid_idx, "prediction"]
-
-            metrics = {}
-            if probabilidades is not None:
-                prob_valid = probabilidades[valid_idx, 1]
-                loss = log_loss(y_true, prob_valid, labels=[0, 1])
-                metrics["log_loss_prod"] = loss
-
-            f1 = f1_score(y_true, y_pred)
-            metrics["f1_prod"] = f1
-
-            logging.info(f"📊 Métricas calculadas: {metrics}")
-
-            # Log da rodada no MLflow
-            with mlflow.start_run(run_name="PipelineAplicacao"):
-                mlflow.log_metrics(metrics)
-                mlflow.log_artifact(output_path)
-            
-                # Log da distribuição das predições
-                pred_dist = df_prod["prediction"].value_counts(normalize=True).to_dict()
-                mlflow.log_metrics({f"pred_class_{int(k)}": float(v) for k, v in pred_dist.items()})
-        else:
-            logging.warning("⚠️ Nenhuma linha com 'shot_made_flag' válida para avaliação.")
+    metricas = MetricasIncrementais(threshold)
+    if TARGET in df_prod.columns:
+        metricas.atualizar(df_prod[TARGET], df_prod["prediction"], probabilidades)
     else:
         logging.warning("⚠️ Coluna 'shot_made_flag' não está presente na base de produção.")
+    _registrar_metricas(metricas, output_path, registrar_mlflow, monitor)
+
+
+def _colunas_producao(caminho_dados_producao):
+    """
+    Define as colunas lidas da base de produção: identificadores (`COLUNAS_IDENTIFICACAO`, os que
+    existirem, para ligar as predições aos arremessos), features e, se houver, a variável alvo.
+
+    Args:
+        caminho_dados_producao (str): Caminho para o arquivo .parquet com dados de produção.
+
+    Returns:
+        tuple: (lista de colunas a ler, indicador de presença da variável alvo)
+    """
+    disponiveis = colunas_disponiveis(caminho_dados_producao)
+    if not all(col in disponiveis for col in FEATURES):
+        raise ValueError("❌ Dados de produção não contêm todas as features necessárias.")
+    possui_target = TARGET in disponiveis
+    identificacao = [col for col in COLUNAS_IDENTIFICACAO if col in disponiveis]
+    return identificacao + FEATURES + ([TARGET] if possui_target else []), possui_target
+
+
+def _coluna_tempo(caminho_dados_producao):
+    """Coluna de tempo usada nas janelas do monitoramento, se existir na base (lista vazia caso contrário)."""
+    return [COLUNA_TEMPO] if COLUNA_TEMPO in colunas_disponiveis(caminho_dados_producao) else []
+
+
+def _tempo_do_lote(tabela_lida, coluna_tempo):
+    """Datas do lote lido (antes da conversão para o schema compacto), ou None se não houver."""
+    return tabela_lida.column(COLUNA_TEMPO) if coluna_tempo else None
+
+
+def _gravar_lote(writer, metricas, tabela, probabilidades, predicoes, monitor, tempo):
+    """
+    Anexa um lote pontuado ao arquivo de saída e atualiza as métricas acumuladas e o monitor.
+
+    Args:
+        writer (pq.ParquetWriter): Escritor do arquivo de predições.
+        metricas (MetricasIncrementais): Estatísticas acumuladas da pontuação.
+        tabela (pa.Table): Lote lido da base de produção, no schema compacto.
+        probabilidades (np.ndarray ou None): Probabilidades da classe 1 do lote.
+        predicoes (np.ndarray): Classes previstas para o lote.
+        monitor (MonitorProducao): Monitor de drift e desempenho.
+        tempo (pa.ChunkedArray ou None): Datas das linhas do lote.
+
+    Returns:
+        None
+    """
+    y_true = None
+    if TARGET in tabela.column_names:
+        y_true = tabela.column(TARGET).to_numpy(zero_copy_only=False)
+    metricas.atualizar(y_true, predicoes, probabilidades)
+    with medir("monitoramento", linhas=tabela.num_rows):
+        monitor.atualizar(tabela, probabilidades, tempo)
+    with medir("gravar_parquet", linhas=tabela.num_rows):
+        saida = tabela.append_column("proba", _coluna_proba(probabilidades, len(predicoes)))
+        writer.write_table(saida.append_column("prediction", pa.array(predicoes, pa.int8())))
+
+
+def _coluna_proba(probabilidades, linhas):
+    """Coluna `proba` do arquivo de predições: float32, ou nula se o modelo não expõe `predict_proba`."""
+    if probabilidades is None:
+        return pa.nulls(linhas, pa.float32())
+    return pa.array(probabilidades, pa.float32())
+
+
+def _finalizar_lotes(metricas, possui_target, output_path, registrar_mlflow, monitor):
+    """
+    Encerra a pontuação em lotes, registrando as métricas e o resumo do monitoramento.
+
+    Args:
+        metricas (MetricasIncrementais): Estatísticas acumuladas da pontuação.
+        possui_target (bool): Indica se a base de produção contém a variável alvo.
+        output_path (str): Caminho do arquivo de predições gerado.
+        registrar_mlflow (bool): Se True, registra a rodada no MLflow.
+        monitor (MonitorProducao): Monitor de drift e desempenho.
+
+    Returns:
+        None
+    """
+    logging.info(f"✅ Resultados salvos em {output_path}")
+
+    if not possui_target:
+        logging.warning("⚠️ Coluna 'shot_made_flag' não está presente na base de produção.")
+    _registrar_metricas(metricas, output_path, registrar_mlflow, monitor)
+
+
+@medir("aplicacao")
+def aplicar_modelo_streaming(caminho_modelo, caminho_dados_producao, caminho_saida,
+                             threshold=None, batch_size=50_000, registrar_mlflow=True, caminho_referencia=None):
+    """
+    Aplica o modelo sobre a base de produção em lotes, sem carregá-la inteira em memória.
+
+    Os lotes são lidos com `acesso_dados.ler_lotes` (apenas features e alvo), pontuados e anexados
+    a um `ParquetWriter` assim que ficam prontos. O pico de memória é limitado pelo tamanho
+    do lote, e as métricas de produção são acumuladas incrementalmente entre os lotes.
+
+    Args:
+        caminho_modelo (str): Caminho para o modelo salvo (sem extensão).
+        caminho_dados_producao (str): Caminho para o arquivo .parquet com dados de produção.
+        caminho_saida (str): Caminho do diretório para salvar os resultados com predições.
+        threshold (float, opcional): Limite de probabilidade para converter predições em classe
+            (default: None, threshold gravado com o modelo ou `THRESHOLD_PADRAO`).
+        batch_size (int, opcional): Quantidade máxima de linhas por lote (default: 50.000).
+        registrar_mlflow (bool, opcional): Se True, registra a rodada "PipelineAplicacao" no MLflow (default: True).
+        caminho_referencia (str, opcional): Referência de monitoramento gravada pela preparação.
+
+    Returns:
+        None
+    """
+    threshold = _resolver_threshold(caminho_modelo, threshold)
+    logging.info("📦 Carregando modelo treinado...")
+    modelo = carregar_modelo(caminho_modelo)
+
+    colunas, possui_target = _colunas_producao(caminho_dados_producao)
+
+    os.makedirs(caminho_saida, exist_ok=True)
+    output_path = os.path.join(caminho_saida, "predictions_prod.parquet")
+
+    metricas = MetricasIncrementais(threshold)
+    monitor = MonitorProducao.de_arquivo(caminho_referencia, threshold)
+    coluna_tempo = _coluna_tempo(caminho_dados_producao)
+    schema_saida = esquema_para(colunas + ["proba", "prediction"])
+    linhas_processadas = 0
+
+    logging.info(f"🔮 Realizando predições em lotes de até {batch_size} linhas...")
+    with pq.ParquetWriter(output_path, schema_saida) as writer:
+        for tabela_lida in medir_lotes("ler_parquet", ler_lotes(caminho_dados_producao, colunas + coluna_tempo,
+                                                                 batch_size)):
+            tabela = tabela_compacta(tabela_lida)
+            probabilidades, predicoes = _pontuar(modelo, tabela.select(FEATURES).to_pandas(), threshold)
+            _gravar_lote(writer, metricas, tabela, probabilidades, predicoes, monitor,
+                         _tempo_do_lote(tabela_lida, coluna_tempo))
+
+            linhas_processadas += tabela.num_rows
+            logging.info(f"   ↳ {linhas_processadas} linhas pontuadas")
+
+    _finalizar_lotes(metricas, possui_target, output_path, registrar_mlflow, monitor)
+
+
+# Modelo carregado uma única vez por processo do pool de pontuação paralela
+_modelo_worker = None
+
+
+def _inicializar_worker(caminho_modelo):
+    """
+    Inicializador dos processos do pool: carrega o modelo uma única vez por worker.
+
+    Args:
+        caminho_modelo (str): Caminho para o modelo salvo (sem extensão).
+
+    Returns:
+        None
+    """
+    global _modelo_worker
+    _modelo_worker = carregar_modelo(caminho_modelo)
+
+
+def _pontuar_fatia(df_features, threshold):
+    """
+    Pontua uma fatia da base de produção dentro de um processo do pool.
+
+    Args:
+        df_features (pd.DataFrame): Features da fatia.
+        threshold (float): Limite de probabilidade para converter predições em classe.
+
+    Returns:
+        tuple: (probabilidades da classe 1 ou None, classes previstas)
+    """
+    return _pontuar(_modelo_worker, df_features, threshold)
+
+
+@medir("aplicacao")
+def aplicar_modelo_paralelo(caminho_modelo, caminho_dados_producao, caminho_saida,
+                            threshold=None, n_workers=None, linhas_por_fatia=20_000, registrar_mlflow=True,
+                            caminho_referencia=None):
+    """
+    Aplica o modelo sobre a base de produção distribuindo a inferência entre processos.
+
+    A base é fatiada por intervalos de linhas (respeitando os row groups do parquet), e cada
+    fatia é pontuada por um worker que carrega o modelo uma única vez. O processo principal
+    lê as fatias, envia apenas as features aos workers e grava os resultados na ordem de
+    leitura, de modo que `predictions_prod.parquet` tem exatamente a mesma ordem de linhas
+    do modo sequencial. O número de fatias em voo é limitado a duas por worker, mantendo o
+    uso de memória controlado.
+
+    Args:
+        caminho_modelo (str): Caminho para o modelo salvo (sem extensão).
+        caminho_dados_producao (str): Caminho para o arquivo .parquet com dados de produção.
+        caminho_saida (str): Caminho do diretório para salvar os resultados com predições.
+        threshold (float, opcional): Limite de probabilidade para converter predições em classe
+            (default: None, threshold gravado com o modelo ou `THRESHOLD_PADRAO`).
+        n_workers (int, opcional): Quantidade de processos (default: número de CPUs).
+        linhas_por_fatia (int, opcional): Quantidade máxima de linhas por fatia (default: 20.000).
+        registrar_mlflow (bool, opcional): Se True, registra a rodada "PipelineAplicacao" no MLflow (default: True).
+        caminho_referencia (str, opcional): Referência de monitoramento gravada pela preparação.
+
+    Returns:
+        None
+    """
+    threshold = _resolver_threshold(caminho_modelo, threshold)
+    n_workers = n_workers or os.cpu_count() or 1
+    colunas, possui_target = _colunas_producao(caminho_dados_producao)
+
+    os.makedirs(caminho_saida, exist_ok=True)
+    output_path = os.path.join(caminho_saida, "predictions_prod.parquet")
+
+    metricas = MetricasIncrementais(threshold)
+    monitor = MonitorProducao.de_arquivo(caminho_referencia, threshold)
+    coluna_tempo = _coluna_tempo(caminho_dados_producao)
+    schema_saida = esquema_para(colunas + ["proba", "prediction"])
+    pendentes = deque()
+    linhas_processadas = 0
+
+    logging.info(f"🔮 Realizando predições com {n_workers} workers em fatias de até {linhas_por_fatia} linhas...")
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_inicializar_worker,
+                             initargs=(caminho_modelo,)) as executor, \
+            pq.ParquetWriter(output_path, schema_saida) as writer:
+
+        def gravar_proxima():
+            nonlocal linhas_processadas
+            tabela, tempo, futuro = pendentes.popleft()
+            # A inferência roda nos workers; no processo principal mede-se a espera pelo resultado
+            with medir("aguardar_workers", linhas=tabela.num_rows):
+                probabilidades, predicoes = futuro.result()
+            _gravar_lote(writer, metricas, tabela, probabilidades, predicoes, monitor, tempo)
+            linhas_processadas += tabela.num_rows
+            logging.info(f"   ↳ {linhas_processadas} linhas pontuadas")
+
+        for tabela_lida in medir_lotes("ler_parquet", ler_lotes(caminho_dados_producao, colunas + coluna_tempo,
+                                                                 linhas_por_fatia)):
+            tabela = tabela_compacta(tabela_lida)
+            futuro = executor.submit(_pontuar_fatia, tabela.select(FEATURES).to_pandas(), threshold)
+            pendentes.append((tabela, _tempo_do_lote(tabela_lida, coluna_tempo), futuro))
+            if len(pendentes) >= 2 * n_workers:
+                gravar_proxima()
+
+        while pendentes:
+            gravar_proxima()
+
+    _finalizar_lotes(metricas, possui_target, output_path, registrar_mlflow, monitor)
+
+
+def _registrar_comparacao(metricas, modelos, output_path, registrar_mlflow=True):
+    """
+    Grava os agregados de cada modelo da comparação e, se habilitado, registra a rodada
+    "ComparacaoModelos" no MLflow, com as métricas de cada modelo sufixadas pelo seu nome.
+
+    Args:
+        metricas (dict): {nome: MetricasIncrementais} acumuladas na pontuação.
+        modelos (dict): {nome: caminho do modelo} comparados.
+        output_path (str): Caminho do arquivo de predições lado a lado.
+        registrar_mlflow (bool, opcional): Se False, as métricas são apenas exibidas no log (default: True).
+
+    Returns:
+        dict: {nome: métricas de produção} dos modelos com linhas avaliadas.
+    """
+    caminho_agregados = _gravar_agregados({nome: m.agregados() for nome, m in metricas.items()},
+                                          output_path, ARQUIVO_AGREGADOS_COMPARACAO)
+    logging.info(f"🧮 Agregados de avaliação salvos em {caminho_agregados}")
+    for nome, m in metricas.items():
+        _verificar_fracao_prevista(m, nome)
+
+    resultados = {nome: _metricas_producao(m) for nome, m in metricas.items() if m.linhas_avaliadas}
+    for nome, metrics in resultados.items():
+        logging.info(f"📊 {nome:<12} | " + " | ".join(f"{k}: {v:.4f}" for k, v in metrics.items()))
+    instrumentacao.registrar_log("aplicacao")
+
+    if not registrar_mlflow:
+        return resultados
+
+    with medir("mlflow"):
+        import mlflow
+
+        mlflow.set_experiment("PipelineAplicacao")
+        with mlflow.start_run(run_name="ComparacaoModelos"):
+            for nome, caminho_modelo in modelos.items():
+                mlflow.log_params({f"modelo_{nome}": caminho_modelo,
+                                   f"versao_{nome}": REGISTRO.versao(caminho_modelo),
+                                   f"threshold_{nome}": metricas[nome].threshold})
+            mlflow.log_metrics({f"{k}_{nome}": v for nome, metrics in resultados.items() for k, v in metrics.items()})
+            mlflow.log_metrics({f"{k}_{nome}": v for nome, m in metricas.items()
+                                for k, v in m.distribuicao_predicoes().items()})
+            mlflow.log_artifact(output_path)
+            mlflow.log_artifact(caminho_agregados)
+            instrumentacao.registrar_mlflow("aplicacao")
+
+    return resultados
+
+
+@medir("aplicacao")
+def aplicar_modelos_comparacao(modelos, caminho_dados_producao, caminho_saida, threshold=None,
+                               batch_size=50_000, registrar_mlflow=True):
+    """
+    Aplica N modelos (campeão e desafiantes) sobre a base de produção em uma única leitura.
+
+    Cada lote é lido, validado e convertido para o schema compacto uma única vez, e suas
+    features, já em pandas, são pontuadas por todos os modelos. O arquivo de saída
+    (`ARQUIVO_COMPARACAO`) tem as colunas da base seguidas de `proba_<nome>` e
+    `prediction_<nome>` de cada modelo, e as métricas de cada modelo são acumuladas
+    separadamente. O monitoramento de drift, que depende apenas das features, continua a
+    cargo da aplicação do modelo em produção.
+
+    Args:
+        modelos (dict): {nome: caminho do modelo (sem extensão) ou do kernel NumPy (.npz)};
+            a ordem define a ordem das colunas.
+        caminho_dados_producao (str): Caminho para o arquivo .parquet com dados de produção.
+        caminho_saida (str): Caminho do diretório para salvar os resultados com predições.
+        threshold (float, opcional): Limite de decisão aplicado a todos os modelos
+            (default: None, threshold gravado com cada modelo ou `THRESHOLD_PADRAO`).
+        batch_size (int, opcional): Quantidade máxima de linhas por lote (default: 50.000).
+        registrar_mlflow (bool, opcional): Se True, registra a rodada "ComparacaoModelos" no MLflow (default: True).
+
+    Returns:
+        dict: {nome: métricas de produção} dos modelos (vazio se a base não tiver a variável alvo).
+
+    Raises:
+        ValueError: Se nenhum modelo for informado.
+    """
+    if not modelos:
+        raise ValueError("❌ Informe ao menos um modelo para a comparação.")
+
+    carregados = {}
+    for nome, caminho_modelo in modelos.items():
+        logging.info(f"📦 Carregando modelo '{nome}': {caminho_modelo}")
+        carregados[nome] = (carregar_modelo(caminho_modelo), _resolver_threshold(caminho_modelo, threshold))
+
+    colunas, possui_target = _colunas_producao(caminho_dados_producao)
+
+    os.makedirs(caminho_saida, exist_ok=True)
+    output_path = os.path.join(caminho_saida, ARQUIVO_COMPARACAO)
+
+    metricas = {nome: MetricasIncrementais(threshold_modelo) for nome, (_, threshold_modelo) in carregados.items()}
+    campos = list(esquema_para(colunas))
+    for nome in carregados:
+        campos.append(ESQUEMA_ARREMESSOS.field("proba").with_name(f"proba_{nome}"))
+        campos.append(ESQUEMA_ARREMESSOS.field("prediction").with_name(f"prediction_{nome}"))
+    schema_saida = pa.schema(campos)
+    linhas_processadas = 0
+
+    logging.info(f"🔮 Pontuando {len(carregados)} modelos em lotes de até {batch_size} linhas...")
+    with pq.ParquetWriter(output_path, schema_saida) as writer:
+        for tabela_lida in medir_lotes("ler_parquet", ler_lotes(caminho_dados_producao, colunas, batch_size)):
+            tabela = tabela_compacta(tabela_lida)
+            df_features = tabela.select(FEATURES).to_pandas()
+            y_true = tabela.column(TARGET).to_numpy(zero_copy_only=False) if possui_target else None
+
+            colunas_modelos = []
+            for nome, (modelo, threshold_modelo) in carregados.items():
+                with medir(nome):
+                    probabilidades, predicoes = _pontuar(modelo, df_features, threshold_modelo)
+                metricas[nome].atualizar(y_true, predicoes, probabilidades)
+                colunas_modelos += [_coluna_proba(probabilidades, len(predicoes)), pa.array(predicoes, pa.int8())]
+
+            with medir("gravar_parquet", linhas=tabela.num_rows):
+                writer.write_table(pa.Table.from_arrays(tabela.columns + colunas_modelos, schema=schema_saida))
+
+            linhas_processadas += tabela.num_rows
+            logging.info(f"   ↳ {linhas_processadas} linhas pontuadas por {len(carregados)} modelos")
+
+    logging.info(f"✅ Resultados salvos em {output_path}")
+    if not possui_target:
+        logging.warning("⚠️ Coluna 'shot_made_flag' não está presente na base de produção.")
+    return _registrar_comparacao(metricas, modelos, output_path, registrar_mlflow)
+
+
+def _modelos_comparacao(entradas, caminho_campeao, diretorio_candidatos):
+    """
+    Modelos da comparação a partir da linha de comando.
+
+    Args:
+        entradas (list[str]): Entradas "nome=caminho" ou apenas "caminho" (nome derivado do arquivo,
+            sem o prefixo "modelo_"). Vazia: o campeão e os candidatos salvos no treinamento.
+        caminho_campeao (str): Modelo em produção, usado quando nenhuma entrada é informada.
+        diretorio_candidatos (str): Diretório dos candidatos salvos pelo treinamento.
+
+    Returns:
+        dict: {nome: caminho do modelo}.
+
+    Raises:
+        ValueError: Se dois modelos tiverem o mesmo nome.
+    """
+    if not entradas:
+        candidatos = []
+        if os.path.isdir(diretorio_candidatos):
+            candidatos = [os.path.join(diretorio_candidatos, arquivo[:-len(".pkl")])
+                          for arquivo in sorted(os.listdir(diretorio_candidatos)) if arquivo.endswith(".pkl")]
+        entradas = [caminho_campeao] + candidatos
+
+    modelos = {}
+    for entrada in entradas:
+        nome, _, caminho_modelo = entrada.rpartition("=")
+        if not nome:
+            nome = os.path.basename(caminho_modelo)
+            nome = nome[:-len(".npz")] if nome.endswith(".npz") else nome
+            nome = nome[len("modelo_"):] if nome.startswith("modelo_") else nome
+        if nome in modelos:
+            raise ValueError(f"❌ Nome de modelo repetido na comparação: '{nome}'. Use nome=caminho.")
+        modelos[nome] = caminho_modelo
+    return modelos
 
-    # Estatísticas descritivas para debug e análise
-    print(df_prod[features].describe())
-    print("Distribuição do target:", df_prod["shot_made_flag"].value_counts())
 
 if __name__ == "__main__":
-    aplicar_modelo(
-        caminho_modelo="../../Data/Modeling/modelo_final",
-        caminho_dados_producao="../../Data/Raw/dataset_kobe_prod.parquet",
-        caminho_saida="../../Data/Processed",
-        threshold=0.35  # ajuste de limite de decisão
-    )
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Aplicação do modelo treinado sobre a base de produção.")
+    parser.add_argument("--modelo", default="../../Data/Modeling/modelo_final",
+                        help="Caminho do modelo salvo (sem extensão) ou do kernel NumPy (.npz).")
+    parser.add_argument("--dados", default="../../Data/Raw/dataset_kobe_prod.parquet",
+                        help="Arquivo .parquet com os dados de produção.")
+    parser.add_argument("--saida", default="../../Data/Processed",
+                        help="Diretório de saída do arquivo de predições.")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Limite de decisão aplicado à probabilidade da classe 1 "
+                             "(default: threshold gravado com o modelo).")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Ativa o modo streaming, pontuando lotes com até N linhas.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Ativa a pontuação paralela com N processos (usa --batch-size como tamanho da fatia).")
+    parser.add_argument("--sem-mlflow", action="store_true",
+                        help="Não registra a rodada no MLflow (evita importar o MLflow).")
+    parser.add_argument("--referencia", default="../../Data/Processed/referencia_monitoramento.json",
+                        help="Referência das features de treino usada no monitoramento de drift.")
+    parser.add_argument("--comparar", nargs="*", default=None, metavar="[NOME=]MODELO",
+                        help="Pontua vários modelos lado a lado em uma única leitura "
+                             "(sem modelos: --modelo e os candidatos salvos no treinamento).")
+    args = parser.parse_args()
+
+    if args.comparar is not None:
+        aplicar_modelos_comparacao(
+            modelos=_modelos_comparacao(args.comparar, args.modelo, "../../Data/Modeling/candidatos"),
+            caminho_dados_producao=args.dados,
+            caminho_saida=args.saida,
+            threshold=args.threshold,
+            batch_size=args.batch_size or 50_000,
+            registrar_mlflow=not args.sem_mlflow
+        )
+    elif args.workers:
+        aplicar_modelo_paralelo(
+            caminho_modelo=args.modelo,
+            caminho_dados_producao=args.dados,
+            caminho_saida=args.saida,
+            threshold=args.threshold,
+            n_workers=args.workers,
+            linhas_por_fatia=args.batch_size or 20_000,
+            registrar_mlflow=not args.sem_mlflow,
+            caminho_referencia=args.referencia
+        )
+    elif args.batch_size:
+        aplicar_modelo_streaming(
+            caminho_modelo=args.modelo,
+            caminho_dados_producao=args.dados,
+            caminho_saida=args.saida,
+            threshold=args.threshold,
+            batch_size=args.batch_size,
+            registrar_mlflow=not args.sem_mlflow,
+            caminho_referencia=args.referencia
+        )
+    else:
+        aplicar_modelo(
+            caminho_modelo=args.modelo,
+            caminho_dados_producao=args.dados,
+            caminho_saida=args.saida,
+            threshold=args.threshold,  # ajuste de limite de decisão
+            registrar_mlflow=not args.sem_mlflow,
+            caminho_referencia=args.referencia
+        )
+    instrumentacao.gravar_trace("../../Data/Logs/trace_aplicacao.json", raiz="aplicacao")
@@ -0,0 +1,99 @@
+"""
+Benchmark do tempo de inicialização (cold start) dos pontos de entrada de pontuação.
+
+Cada cenário é executado em um interpretador Python novo, medindo o tempo de parede até o
+fim das importações (e, quando indicado, do carregamento do modelo). O cenário
+"importacoes_originais" reproduz as importações feitas no topo do `aplicacao.py` antes da
+camada de importação tardia, servindo de referência para o "antes e depois".
+
+Execução:
+    python benchmark_importacao.py --repeticoes 5
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+CENARIOS = {
+    "importacoes_originais": (
+        "import pandas, mlflow\n"
+        "from pycaret.classification import load_model\n"
+        "from sklearn.metrics import log_loss, f1_score"
+    ),
+    "aplicacao": "import aplicacao",
+    "pontuacao_rapida_com_modelo": (
+        "from aplicacao import carregar_modelo\n"
+        "carregar_modelo('../../Data/Modeling/modelo_final_numpy.npz')"
+    ),
+    "pycaret_com_modelo": (
+        "from pycaret.classification import load_model\n"
+        "load_model('../../Data/Modeling/modelo_final')"
+    ),
+}
+
+
+def medir_cenario(codigo, repeticoes):
+    """
+    Mede o tempo de execução de um trecho de código em interpretadores novos.
+
+    Args:
+        codigo (str): Código Python executado com `python -c`.
+        repeticoes (int): Quantidade de execuções.
+
+    Returns:
+        dict: Tempos mínimo, mediano e máximo, em segundos.
+    """
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, "-c", codigo], cwd=diretorio, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        tempos.append(time.perf_counter() - inicio)
+    return {"min_s": min(tempos), "mediana_s": statistics.median(tempos), "max_s": max(tempos)}
+
+
+def executar_benchmark(caminho_saida, repeticoes=3):
+    """
+    Executa todos os cenários e grava os resultados em JSON.
+
+    Args:
+        caminho_saida (str): Caminho do arquivo .json de resultados.
+        repeticoes (int, opcional): Execuções por cenário (default: 3).
+
+    Returns:
+        dict: Resultados por cenário.
+    """
+    resultados = {}
+    for nome, codigo in CENARIOS.items():
+        resultados[nome] = medir_cenario(codigo, repeticoes)
+        logging.info(f"⏱️ {nome}: mediana de {resultados[nome]['mediana_s']:.2f} s")
+
+    os.makedirs(os.path.dirname(caminho_saida), exist_ok=True)
+    with open(caminho_saida, "w", encoding="utf-8") as arquivo:
+        json.dump({
+            "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "repeticoes": repeticoes,
+            "cenarios": resultados,
+        }, arquivo, indent=2)
+    logging.info(f"💾 Resultados salvos em {caminho_saida}")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de inicialização da pontuação.")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", default="../../Data/Logs/benchmark_importacao.json")
+    args = parser.parse_args()
+
+    executar_benchmark(args.saida, args.repeticoes)
@@ -0,0 +1,317 @@
+"""
+Benchmark reprodutível do pipeline em bases sintéticas de 10^5 a 10^8 linhas.
+
+Para cada escala, bases sintéticas de desenvolvimento e produção com `linhas` linhas cada são
+geradas a partir das bases reais (ver `DataPrep/dados_sinteticos.py`) e as etapas do pipeline
+são executadas e medidas:
+- `preparacao`: `preparar_dados` sem cache (em lotes acima de `MAX_LINHAS_EM_MEMORIA`);
+- `treinamento`: `treinar_modelos` (PyCaret), até `max_linhas_pycaret` linhas de treino; acima
+  disso a etapa é pulada e as escalas seguintes usam o último modelo treinado;
+- `aplicacao`: `aplicar_modelo` (streaming acima de `MAX_LINHAS_EM_MEMORIA`) sobre a base de produção;
+- `latencia`: `predict_proba` de uma única linha com o pipeline do PyCaret e com o kernel NumPy
+  (percentis 50, 95 e 99 em ms).
+
+Cada escala roda em um processo novo, de modo que o pico de RSS de uma escala não herda a
+memória da anterior. Tempo de parede, tempo de CPU, pico de RSS e o detalhamento por trecho
+vêm da instrumentação das próprias etapas (ver `DataPrep/instrumentacao.py`). As rodadas do
+MLflow vão para um diretório temporário, fora do `mlruns` do projeto.
+
+O resultado é gravado em JSON (`FORMATO_RESULTADO`), e uma execução anterior pode ser usada como
+referência: cada medida de `LIMITES_REGRESSAO` que piorar mais que o limite relativo (e mais que
+a tolerância absoluta, evitando ruído em tempos muito curtos) é apontada como regressão, e o
+script termina com código de saída 1.
+
+Execução:
+    python benchmark_pipeline.py --linhas 100000 1000000
+    python benchmark_pipeline.py --linhas 100000 1000000 --referencia ../../Data/Logs/benchmark_pipeline_base.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DataPrep"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Model"))
+
+from dados_sinteticos import gerar_base_sintetica
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+FORMATO_RESULTADO = 1
+MAX_LINHAS_EM_MEMORIA = 5_000_000
+REPETICOES_LATENCIA = 200
+
+# Piora relativa máxima e tolerância absoluta de cada medida antes de apontar uma regressão
+LIMITES_REGRESSAO = {
+    "tempo_s": {"relativo": 0.15, "absoluto": 0.05},
+    "pico_rss_mb": {"relativo": 0.15, "absoluto": 25.0},
+    "pycaret_p50_ms": {"relativo": 0.25, "absoluto": 0.5},
+    "pycaret_p95_ms": {"relativo": 0.25, "absoluto": 1.0},
+    "numpy_p50_ms": {"relativo": 0.25, "absoluto": 0.02},
+    "numpy_p95_ms": {"relativo": 0.25, "absoluto": 0.05},
+}
+
+
+def _medida_etapa(raiz, linhas, modo):
+    """Resultado de uma etapa a partir do trecho raiz medido pela instrumentação da própria etapa."""
+    from instrumentacao import RASTREADOR, resumo
+
+    detalhes = resumo(raiz)
+    total = detalhes.pop("total")
+    RASTREADOR.descartar(raiz)
+    return {
+        "modo": modo,
+        "linhas": linhas,
+        "tempo_s": total["tempo_s"],
+        "cpu_s": total["cpu_s"],
+        "pico_rss_mb": total["pico_rss_mb"],
+        "linhas_por_s": linhas / max(total["tempo_s"], 1e-9),
+        "detalhes": detalhes,
+    }
+
+
+def _percentis_latencia(preditor, linha, repeticoes):
+    """Percentis 50, 95 e 99 (ms) de `predict_proba` sobre uma linha, após uma chamada de aquecimento."""
+    preditor.predict_proba(linha)
+    tempos = np.empty(repeticoes)
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        preditor.predict_proba(linha)
+        tempos[i] = time.perf_counter() - inicio
+    return dict(zip(("p50_ms", "p95_ms", "p99_ms"), np.percentile(tempos, [50, 95, 99]) * 1000))
+
+
+def _medir_latencia(caminho_modelo, caminho_teste, repeticoes):
+    """Latência de uma única linha com o pipeline do PyCaret e com o kernel NumPy do mesmo modelo."""
+    from aplicacao import FEATURES, carregar_modelo
+    from esquema_arremessos import ler_compacta_pandas
+
+    linha = ler_compacta_pandas(caminho_teste, colunas=FEATURES).iloc[:1]
+    resultado = {"modo": "uma_linha", "repeticoes": repeticoes}
+    for nome, caminho in (("pycaret", caminho_modelo), ("numpy", f"{caminho_modelo}_numpy.npz")):
+        if nome == "numpy" and not os.path.exists(caminho):
+            continue
+        for percentil, valor in _percentis_latencia(carregar_modelo(caminho), linha, repeticoes).items():
+            resultado[f"{nome}_{percentil}"] = float(valor)
+    return resultado
+
+
+def _medir_escala(linhas, diretorio_dados, caminho_dev, caminho_prod, caminho_modelo_padrao,
+                  max_linhas_pycaret, tamanho_lote, random_state):
+    """
+    Gera as bases sintéticas de uma escala e mede as etapas do pipeline (executado em um processo novo).
+
+    Returns:
+        tuple: (resultado da escala, caminho do modelo usado na aplicação)
+    """
+    import mlflow
+    # Importado antes das medições para que o custo da importação não caia na primeira etapa que o usa
+    import pycaret.classification  # noqa: F401
+
+    diretorio_mlflow = tempfile.mkdtemp(prefix="benchmark_mlruns_")
+    mlflow.set_tracking_uri(f"file://{diretorio_mlflow}")
+    diretorio_escala = os.path.join(diretorio_dados, str(linhas))
+    processed = os.path.join(diretorio_escala, "Processed")
+    modeling = os.path.join(diretorio_escala, "Modeling")
+    dev = os.path.join(diretorio_escala, "dataset_sintetico_dev.parquet")
+    prod = os.path.join(diretorio_escala, "dataset_sintetico_prod.parquet")
+
+    try:
+        inicio = time.perf_counter()
+        gerar_base_sintetica(caminho_dev, dev, linhas, random_state, tamanho_lote)
+        gerar_base_sintetica(caminho_prod, prod, linhas, random_state + 1, tamanho_lote)
+        resultado = {"linhas": linhas, "geracao_s": time.perf_counter() - inicio, "etapas": {}}
+        etapas = resultado["etapas"]
+        em_memoria = linhas <= MAX_LINHAS_EM_MEMORIA
+
+        from data_preparation import preparar_dados
+        logging.info(f"📏 [{linhas:,}] preparacao")
+        preparar_dados(dev, prod, processed, usar_cache=False, tamanho_lote=None if em_memoria else tamanho_lote)
+        etapas["preparacao"] = _medida_etapa("preparacao", 2 * linhas, "memoria" if em_memoria else "lotes")
+
+        with open(os.path.join(processed, "manifesto_preparacao.json"), encoding="utf-8") as arquivo:
+            linhas_treino = json.load(arquivo)["metricas"]["train_size"]
+        caminho_modelo = caminho_modelo_padrao
+        if linhas_treino <= max_linhas_pycaret:
+            from train_model import treinar_modelos
+            logging.info(f"📏 [{linhas:,}] treinamento")
+            treinar_modelos(os.path.join(processed, "base_train.parquet"),
+                            os.path.join(processed, "base_test.parquet"), modeling)
+            if mlflow.active_run() is not None:
+                mlflow.end_run()
+            etapas["treinamento"] = _medida_etapa("treinamento", linhas_treino, "pycaret")
+            caminho_modelo = os.path.join(modeling, "modelo_final")
+        else:
+            logging.info(f"⏭️ [{linhas:,}] treinamento pulado ({linhas_treino:,} linhas de treino > "
+                         f"{max_linhas_pycaret:,}); aplicação com {caminho_modelo}")
+
+        from aplicacao import aplicar_modelo, aplicar_modelo_streaming
+        logging.info(f"📏 [{linhas:,}] aplicacao")
+        parametros = {"caminho_modelo": caminho_modelo, "caminho_dados_producao": prod, "caminho_saida": processed,
+                      "caminho_referencia": os.path.join(processed, "referencia_monitoramento.json")}
+        if em_memoria:
+            aplicar_modelo(**parametros)
+        else:
+            aplicar_modelo_streaming(batch_size=tamanho_lote, **parametros)
+        etapas["aplicacao"] = _medida_etapa("aplicacao", linhas, "memoria" if em_memoria else "streaming")
+
+        logging.info(f"📏 [{linhas:,}] latencia")
+        etapas["latencia"] = _medir_latencia(caminho_modelo, os.path.join(processed, "base_test.parquet"),
+                                             REPETICOES_LATENCIA)
+        resultado["modelo"] = caminho_modelo
+        return resultado, caminho_modelo
+    finally:
+        shutil.rmtree(diretorio_mlflow, ignore_errors=True)
+
+
+def comparar(resultado, referencia, limites=None):
+    """
+    Compara um resultado com uma execução de referência, medida a medida.
+
+    Só são comparadas escalas e etapas presentes nos dois resultados e executadas no mesmo modo.
+
+    Args:
+        resultado (dict): Resultado de `executar_benchmark`.
+        referencia (dict): Resultado anterior, no mesmo formato.
+        limites (dict, opcional): Limites por medida (default: `LIMITES_REGRESSAO`).
+
+    Returns:
+        list[dict]: Uma comparação por medida, com a variação relativa e o indicador de regressão.
+
+    Raises:
+        ValueError: Se a referência estiver em outro formato de resultado.
+    """
+    if referencia.get("formato") != FORMATO_RESULTADO:
+        raise ValueError(f"❌ Referência no formato {referencia.get('formato')}; esperado {FORMATO_RESULTADO}.")
+    limites = limites or LIMITES_REGRESSAO
+    comparacoes = []
+    for escala, atual in resultado["escalas"].items():
+        anterior = referencia["escalas"].get(escala)
+        if anterior is None:
+            continue
+        for etapa, medidas in atual["etapas"].items():
+            medidas_anteriores = anterior["etapas"].get(etapa)
+            if medidas_anteriores is None or medidas_anteriores.get("modo") != medidas.get("modo"):
+                continue
+            for medida, limite in limites.items():
+                if medida not in medidas or medida not in medidas_anteriores:
+                    continue
+                valor, valor_anterior = medidas[medida], medidas_anteriores[medida]
+                comparacoes.append({
+                    "escala": escala,
+                    "etapa": etapa,
+                    "medida": medida,
+                    "referencia": valor_anterior,
+                    "atual": valor,
+                    "variacao": valor / valor_anterior - 1 if valor_anterior else None,
+                    "regressao": (valor > valor_anterior * (1 + limite["relativo"])
+                                  and valor - valor_anterior > limite["absoluto"]),
+                })
+    return comparacoes
+
+
+def executar_benchmark(escalas, caminho_saida, diretorio_dados, caminho_dev, caminho_prod, caminho_modelo_padrao,
+                       caminho_referencia=None, max_linhas_pycaret=1_000_000, tamanho_lote=1_000_000,
+                       random_state=42):
+    """
+    Executa o benchmark nas escalas informadas e grava o resultado (e a comparação) em JSON.
+
+    Args:
+        escalas (list[int]): Quantidades de linhas das bases sintéticas (ex.: [10**5, 10**6]).
+        caminho_saida (str): Arquivo .json de resultado.
+        diretorio_dados (str): Diretório das bases sintéticas e das saídas de cada escala
+            (as bases são reaproveitadas entre execuções com a mesma semente).
+        caminho_dev (str): Base real de desenvolvimento, origem das bases sintéticas.
+        caminho_prod (str): Base real de produção, origem das bases sintéticas de produção.
+        caminho_modelo_padrao (str): Modelo aplicado quando nenhuma escala anterior treinou um modelo.
+        caminho_referencia (str, opcional): Resultado anterior usado na detecção de regressões.
+        max_linhas_pycaret (int, opcional): Máximo de linhas de treino do `treinar_modelos` (default: 1.000.000).
+        tamanho_lote (int, opcional): Lote da geração, da preparação em lotes e do streaming (default: 1.000.000).
+        random_state (int, opcional): Semente das bases sintéticas (default: 42).
+
+    Returns:
+        dict: Resultado, com a lista "regressoes" quando há referência.
+    """
+    resultado = {
+        "formato": FORMATO_RESULTADO,
+        "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "random_state": random_state,
+        "limites_regressao": LIMITES_REGRESSAO,
+        "escalas": {},
+    }
+
+    caminho_modelo = caminho_modelo_padrao
+    for linhas in sorted(escalas):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            resultado_escala, caminho_modelo = executor.submit(
+                _medir_escala, linhas, diretorio_dados, caminho_dev, caminho_prod, caminho_modelo,
+                max_linhas_pycaret, tamanho_lote, random_state
+            ).result()
+        resultado["escalas"][str(linhas)] = resultado_escala
+        for etapa, r in resultado_escala["etapas"].items():
+            if "tempo_s" in r:
+                logging.info(f"⏱️ {linhas:>11,} | {etapa:<11} ({r['modo']}) | {r['tempo_s']:8.2f} s | "
+                             f"{r['linhas_por_s']:>12,.0f} linhas/s | pico RSS {r['pico_rss_mb']:8.1f} MB")
+            else:
+                logging.info(f"⏱️ {linhas:>11,} | {etapa:<11} | " + " | ".join(
+                    f"{k} {v:.3f}" for k, v in r.items() if k.endswith("_ms")))
+
+    if caminho_referencia:
+        with open(caminho_referencia, encoding="utf-8") as arquivo:
+            comparacoes = comparar(resultado, json.load(arquivo))
+        resultado["referencia"] = caminho_referencia
+        resultado["comparacoes"] = comparacoes
+        resultado["regressoes"] = [c for c in comparacoes if c["regressao"]]
+        for c in resultado["regressoes"]:
+            logging.warning(f"🐢 Regressão em {c['escala']} linhas / {c['etapa']} / {c['medida']}: "
+                            f"{c['referencia']:.3f} → {c['atual']:.3f} ({c['variacao']:+.1%})")
+        if not resultado["regressoes"]:
+            logging.info(f"✅ Nenhuma regressão em relação a {caminho_referencia} ({len(comparacoes)} medidas).")
+
+    os.makedirs(os.path.dirname(os.path.abspath(caminho_saida)), exist_ok=True)
+    with open(caminho_saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, indent=2)
+    logging.info(f"💾 Resultado salvo em {caminho_saida}")
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline em bases sintéticas de várias escalas.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[100_000, 1_000_000],
+                        help="Linhas das bases sintéticas de desenvolvimento e produção (uma escala por valor).")
+    parser.add_argument("--referencia", default=None,
+                        help="Resultado anterior (.json) para a detecção de regressões.")
+    parser.add_argument("--saida", default="../../Data/Logs/benchmark_pipeline.json")
+    parser.add_argument("--dados", default="../../Data/Benchmark",
+                        help="Diretório das bases sintéticas e das saídas de cada escala.")
+    parser.add_argument("--max-linhas-pycaret", type=int, default=1_000_000,
+                        help="Máximo de linhas de treino para executar o treinamento com PyCaret.")
+    parser.add_argument("--tamanho-lote", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    resultado = executar_benchmark(
+        escalas=args.linhas,
+        caminho_saida=args.saida,
+        diretorio_dados=args.dados,
+        caminho_dev="../../Data/Raw/dataset_kobe_dev.parquet",
+        caminho_prod="../../Data/Raw/dataset_kobe_prod.parquet",
+        caminho_modelo_padrao="../../Data/Modeling/modelo_final",
+        caminho_referencia=args.referencia,
+        max_linhas_pycaret=args.max_linhas_pycaret,
+        tamanho_lote=args.tamanho_lote
+    )
+    sys.exit(1 if resultado.get("regressoes") else 0)
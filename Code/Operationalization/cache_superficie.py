@@ -0,0 +1,230 @@
+"""
+Cache de superfícies de probabilidade pré-calculadas, versionado pelo modelo final.
+
+A probabilidade de acerto é calculada uma única vez sobre uma grade discreta de
+(lat, lon, minutes_remaining, period, playoffs, shot_distance) com o motor de
+`simulacao_grade.py` e salva como array NumPy (.npy), aberto em modo memory-map.
+O diretório do cache é nomeado pelo hash xxHash de `modelo_final.pkl` (e da grade):
+quando o arquivo do modelo muda, a superfície é recalculada automaticamente e as
+versões antigas do mesmo arquivo de modelo e da mesma grade são removidas (superfícies de
+outros modelos ou grades no mesmo diretório são mantidas).
+
+As consultas interpolam multilinearmente entre os pontos vizinhos da grade, em
+microssegundos, sem carregar o modelo nem importar o PyCaret.
+"""
+
+import bisect
+import itertools
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DataPrep"))
+
+from cache_dados import calcular_chave_cache
+from simulacao_grade import FEATURES, simular_grade
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Grade padrão: passo de 0.01 em lat/lon (≈ 1 pé na quadra) e valores inteiros nas demais features
+EIXOS_PADRAO = {
+    "lat": np.round(np.arange(33.5, 34.1 + 1e-9, 0.01), 2),
+    "lon": np.round(np.arange(-118.5, -118.0 + 1e-9, 0.01), 2),
+    "minutes_remaining": np.arange(0, 12),
+    "period": np.arange(1, 8),
+    "playoffs": np.arange(0, 2),
+    "shot_distance": np.arange(0, 51),
+}
+
+
+class CacheSuperficie:
+    """
+    Superfície de probabilidade memory-mapped, invalidada quando o modelo final muda.
+
+    A cada consulta, o `stat` do arquivo do modelo é comparado ao da última verificação;
+    o hash só é recalculado (e a superfície reconstruída, se necessário) quando o arquivo
+    foi alterado.
+    """
+
+    def __init__(self, caminho_modelo="../../Data/Modeling/modelo_final",
+                 diretorio_cache="../../Data/Modeling/cache_superficie", eixos=None):
+        self.caminho_modelo = caminho_modelo
+        self.caminho_pkl = f"{caminho_modelo}.pkl"
+        self.diretorio_cache = diretorio_cache
+        self.eixos = {f: np.asarray((eixos or EIXOS_PADRAO)[f], dtype=np.float64) for f in FEATURES}
+        self._origem = {"modelo": os.path.abspath(self.caminho_pkl)}
+        self._eixos_lista = [eixo.tolist() for eixo in self.eixos.values()]
+        self.chave = None
+        self.proba = None
+        self._assinatura = None
+        self._verificar()
+
+    def _verificar(self):
+        """Recarrega (ou reconstrói) a superfície se o arquivo do modelo foi alterado."""
+        estado = os.stat(self.caminho_pkl)
+        assinatura = (estado.st_mtime_ns, estado.st_size)
+        if assinatura == self._assinatura:
+            return
+
+        chave = calcular_chave_cache(
+            [self.caminho_pkl], {"eixos": {f: eixo.tolist() for f, eixo in self.eixos.items()}}
+        )
+        if chave != self.chave:
+            diretorio = os.path.join(self.diretorio_cache, chave)
+            if not os.path.exists(os.path.join(diretorio, "proba.npy")):
+                self._construir(diretorio)
+            self.proba = np.load(os.path.join(diretorio, "proba.npy"), mmap_mode="r")
+            self.chave = chave
+            self._remover_versoes_antigas()
+        self._assinatura = assinatura
+
+    def _construir(self, diretorio):
+        """Calcula a superfície com o modelo final compilado para o kernel NumPy e a salva em disco."""
+        from aplicacao import carregar_modelo
+        from kernel_numpy import PreditorNumpy, compilar_modelo
+
+        logging.info("🧱 Modelo alterado ou cache ausente: calculando superfície de probabilidade...")
+        inicio = time.perf_counter()
+        preditor = PreditorNumpy(compilar_modelo(carregar_modelo(self.caminho_modelo)))
+        superficie = simular_grade(preditor, self.eixos)
+
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = os.path.join(diretorio, "proba.tmp.npy")
+        np.save(temporario, superficie.proba)
+        with open(os.path.join(diretorio, "eixos.json"), "w", encoding="utf-8") as arquivo:
+            json.dump({f: eixo.tolist() for f, eixo in self.eixos.items()}, arquivo)
+        with open(os.path.join(diretorio, "origem.json"), "w", encoding="utf-8") as arquivo:
+            json.dump(self._origem, arquivo)
+        os.replace(temporario, os.path.join(diretorio, "proba.npy"))
+        logging.info(f"💾 Superfície com {superficie.proba.size:,} pontos salva em {diretorio} "
+                     f"({time.perf_counter() - inicio:.1f} s)")
+
+    def _mesma_origem(self, diretorio):
+        """Indica se a superfície do diretório foi calculada para o mesmo arquivo de modelo e a mesma grade."""
+        try:
+            with open(os.path.join(diretorio, "origem.json"), encoding="utf-8") as arquivo:
+                origem = json.load(arquivo)
+            with open(os.path.join(diretorio, "eixos.json"), encoding="utf-8") as arquivo:
+                eixos = json.load(arquivo)
+        except (FileNotFoundError, NotADirectoryError, json.JSONDecodeError):
+            # Sem metadados (ex.: gerada por versão anterior do cache): não é possível atribuí-la
+            return False
+        return origem == self._origem and eixos == {f: eixo.tolist() for f, eixo in self.eixos.items()}
+
+    def _remover_versoes_antigas(self):
+        """Remove as superfícies calculadas para versões anteriores do mesmo modelo, com a mesma grade."""
+        for nome in os.listdir(self.diretorio_cache):
+            diretorio = os.path.join(self.diretorio_cache, nome)
+            if nome != self.chave and self._mesma_origem(diretorio):
+                shutil.rmtree(diretorio, ignore_errors=True)
+
+    def consultar_lote(self, colunas):
+        """
+        Interpola a probabilidade de acerto para vários arremessos.
+
+        Valores fora da grade são limitados às bordas. Eixos em que todas as consultas caem
+        exatamente sobre pontos da grade não são interpolados.
+
+        Args:
+            colunas (dict ou pd.DataFrame): Arrays com as features dos arremessos.
+
+        Returns:
+            np.ndarray: Probabilidades de acerto (classe 1).
+        """
+        self._verificar()
+
+        inferiores, fracoes, eixos_interpolados = [], [], []
+        for k, (feature, eixo) in enumerate(self.eixos.items()):
+            posicao = np.interp(np.asarray(colunas[feature], dtype=np.float64), eixo, np.arange(eixo.size))
+            inferior = np.clip(np.round(posicao), 0, eixo.size - 1)
+            fracao = posicao - inferior
+            exatos = np.abs(fracao) < 1e-9
+            inferior = np.where(exatos, inferior, np.minimum(np.floor(posicao), max(eixo.size - 2, 0)))
+            fracao = np.where(exatos, 0.0, posicao - inferior)
+            inferiores.append(inferior.astype(np.intp))
+            fracoes.append(fracao)
+            if not exatos.all():
+                eixos_interpolados.append(k)
+
+        resultado = np.zeros(inferiores[0].shape)
+        for canto in itertools.product((0, 1), repeat=len(eixos_interpolados)):
+            indices = list(inferiores)
+            peso = 1.0
+            for k, deslocamento in zip(eixos_interpolados, canto):
+                indices[k] = inferiores[k] + deslocamento
+                peso = peso * (fracoes[k] if deslocamento else 1.0 - fracoes[k])
+            resultado += peso * self.proba[tuple(indices)]
+        return resultado
+
+    def dentro_da_grade(self, colunas):
+        """
+        Indica quais arremessos estão dentro dos limites da grade (sem extrapolação).
+
+        Args:
+            colunas (dict ou pd.DataFrame): Arrays com as features dos arremessos.
+
+        Returns:
+            np.ndarray: Máscara booleana.
+        """
+        mascara = True
+        for feature, eixo in self.eixos.items():
+            valores = np.asarray(colunas[feature], dtype=np.float64)
+            mascara = mascara & (valores >= eixo[0]) & (valores <= eixo[-1])
+        return mascara
+
+    def consultar(self, **features):
+        """
+        Interpola a probabilidade de acerto para um único arremesso.
+
+        Versão escalar de `consultar_lote`, com busca binária em listas Python para evitar
+        o custo fixo das operações NumPy sobre arrays de um elemento.
+
+        Args:
+            **features: Valor de cada uma das features do modelo.
+
+        Returns:
+            float: Probabilidade de acerto (classe 1).
+        """
+        self._verificar()
+
+        inferiores, interpolados = [], []
+        for k, (feature, eixo) in enumerate(zip(FEATURES, self._eixos_lista)):
+            valor = min(max(float(features[feature]), eixo[0]), eixo[-1])
+            i = min(max(bisect.bisect_right(eixo, valor) - 1, 0), len(eixo) - 1)
+            if abs(valor - eixo[i]) < 1e-9:
+                inferiores.append(i)
+            elif i + 1 < len(eixo) and abs(valor - eixo[i + 1]) < 1e-9:
+                inferiores.append(i + 1)
+            else:
+                inferiores.append(i)
+                interpolados.append((k, (valor - eixo[i]) / (eixo[i + 1] - eixo[i])))
+
+        resultado = 0.0
+        for canto in itertools.product((0, 1), repeat=len(interpolados)):
+            indices = list(inferiores)
+            peso = 1.0
+            for (k, fracao), deslocamento in zip(interpolados, canto):
+                indices[k] += deslocamento
+                peso *= fracao if deslocamento else 1.0 - fracao
+            resultado += peso * float(self.proba[tuple(indices)])
+        return resultado
+
+
+if __name__ == "__main__":
+    cache = CacheSuperficie()
+
+    inicio = time.perf_counter()
+    for _ in range(1000):
+        cache.consultar(lat=33.93, lon=-118.05, minutes_remaining=5, period=2, playoffs=0, shot_distance=18)
+    logging.info(f"⏱️ Consulta em ponto da grade: {(time.perf_counter() - inicio) * 1000:.1f} µs")
+
+    inicio = time.perf_counter()
+    for _ in range(1000):
+        cache.consultar(lat=33.9253, lon=-118.0498, minutes_remaining=5, period=2, playoffs=0, shot_distance=18)
+    logging.info(f"⏱️ Consulta interpolada: {(time.perf_counter() - inicio) * 1000:.1f} µs")
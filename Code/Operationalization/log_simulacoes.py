@@ -0,0 +1,312 @@
+"""
+Log das simulações do dashboard em segmentos Parquet, somente por acréscimo.
+
+Cada simulação é acrescentada a um buffer em memória e a uma fila circular com as últimas
+`capacidade_recentes` linhas (usada no "Histórico de Simulações", sem ler o disco). O
+buffer é gravado como um novo segmento Parquet quando atinge `linhas_por_segmento` linhas
+ou `intervalo_flush_s` segundos após a primeira linha pendente, e na saída do processo.
+
+Segurança com várias sessões e processos:
+- Dentro do processo, todas as operações são protegidas por um lock (as sessões do
+  Streamlit compartilham a mesma instância via `st.cache_resource`).
+- Entre processos, cada segmento tem nome único (pid + uuid) e é gravado em arquivo
+  temporário e publicado com `os.replace`; nenhum arquivo é reescrito.
+- A compactação junta os segmentos pequenos em um único arquivo, que guarda nos metadados
+  os nomes dos arquivos de origem. Quando os próprios arquivos compactados chegam a
+  `segmentos_para_compactar`, entram também na compactação seguinte (com os mesmos metadados),
+  de modo que a quantidade de arquivos no diretório fica limitada. Leitores ignoram arquivos já
+  cobertos por um arquivo compactado, então não há leitura duplicada entre a publicação e a
+  remoção das origens. Apenas um processo compacta por vez (arquivo de lock criado com `O_EXCL`).
+
+O nome de cada arquivo contém o menor e o maior timestamp (ms) das suas linhas, então as
+consultas por intervalo de tempo abrem apenas os arquivos que se sobrepõem ao intervalo.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+ESQUEMA = pa.schema([
+    ("lat", pa.float64()),
+    ("lon", pa.float64()),
+    ("minutes_remaining", pa.int64()),
+    ("period", pa.int64()),
+    ("playoffs", pa.int64()),
+    ("shot_distance", pa.int64()),
+    ("prediction", pa.int64()),
+    ("proba", pa.float64()),
+    ("timestamp", pa.timestamp("ms")),
+])
+
+PREFIXO_SEGMENTO = "seg"
+PREFIXO_COMPACTADO = "cmp"
+CHAVE_ORIGENS = b"segmentos_origem"
+ARQUIVO_LOCK = ".compactacao.lock"
+MARCADOR_LEGADO = ".legado_importado"
+LOCK_EXPIRADO_S = 60
+
+
+def _para_ms(momento):
+    """Converte datetime/str/pd.Timestamp em milissegundos (mesma base do tipo timestamp[ms])."""
+    return pd.Timestamp(momento).value // 1_000_000
+
+
+def _intervalo_do_nome(nome):
+    """Extrai (tmin_ms, tmax_ms) do nome de um arquivo de segmento."""
+    _, tmin, tmax, _ = nome.split("-", 3)
+    return int(tmin), int(tmax)
+
+
+class LogSimulacoes:
+    """
+    Log de simulações com buffer, fila das últimas linhas e segmentos Parquet compactáveis.
+
+    Attributes:
+        diretorio (str): Diretório dos segmentos.
+        linhas_por_segmento (int): Linhas pendentes que disparam a gravação de um segmento.
+        intervalo_flush_s (float): Tempo máximo (s) que uma linha fica apenas em memória.
+        segmentos_para_compactar (int): Quantidade de segmentos pequenos que dispara a compactação
+            (e de arquivos compactados que passam a ser incluídos nela).
+    """
+
+    def __init__(self, diretorio="../../Data/Logs/simulacoes", capacidade_recentes=100, linhas_por_segmento=64,
+                 intervalo_flush_s=5.0, segmentos_para_compactar=16, caminho_legado=None):
+        self.diretorio = diretorio
+        self.linhas_por_segmento = linhas_por_segmento
+        self.intervalo_flush_s = intervalo_flush_s
+        self.segmentos_para_compactar = segmentos_para_compactar
+        self._lock = threading.RLock()
+        self._pendentes = []
+        self._recentes = deque(maxlen=capacidade_recentes)
+        self._timer = None
+
+        os.makedirs(diretorio, exist_ok=True)
+        if caminho_legado and os.path.exists(caminho_legado):
+            self._importar_legado(caminho_legado)
+        self._recentes.extend(self._carregar_ultimas(capacidade_recentes))
+        atexit.register(self.descarregar)
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+    def registrar(self, linha):
+        """
+        Acrescenta uma simulação ao log (gravada em disco no próximo flush).
+
+        Args:
+            linha (dict): Valores das colunas de `ESQUEMA`; `timestamp` é preenchido se ausente.
+
+        Returns:
+            None
+        """
+        linha = {coluna: linha.get(coluna) for coluna in ESQUEMA.names}
+        linha["timestamp"] = pd.Timestamp(linha["timestamp"] or datetime.now()).floor("ms").to_pydatetime()
+
+        with self._lock:
+            self._pendentes.append(linha)
+            self._recentes.append(linha)
+            if len(self._pendentes) >= self.linhas_por_segmento:
+                self.descarregar()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.intervalo_flush_s, self.descarregar)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def descarregar(self):
+        """
+        Grava as linhas pendentes como um novo segmento e compacta se houver segmentos demais.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pendentes:
+                return
+            tabela = pa.Table.from_pylist(self._pendentes, schema=ESQUEMA)
+            self._pendentes = []
+            self._publicar(tabela, PREFIXO_SEGMENTO)
+
+        if len(self._listar(PREFIXO_SEGMENTO)) >= self.segmentos_para_compactar:
+            self.compactar()
+
+    def _publicar(self, tabela, prefixo, metadados=None):
+        """Grava a tabela (ordenada por timestamp) em arquivo temporário e a publica atomicamente."""
+        tabela = tabela.sort_by("timestamp")
+        if metadados:
+            tabela = tabela.replace_schema_metadata(metadados)
+        tempos = tabela.column("timestamp").cast(pa.int64())
+        nome = (f"{prefixo}-{pc.min(tempos).as_py():013d}-{pc.max(tempos).as_py():013d}"
+                f"-{os.getpid()}_{uuid.uuid4().hex[:8]}.parquet")
+        temporario = os.path.join(self.diretorio, f".{nome}.tmp")
+        pq.write_table(tabela, temporario)
+        os.replace(temporario, os.path.join(self.diretorio, nome))
+        return nome
+
+    def compactar(self):
+        """
+        Junta os segmentos pequenos em um arquivo compactado e remove os arquivos de origem.
+
+        Os arquivos compactados existentes também são incluídos quando já são
+        `segmentos_para_compactar` ou mais. Se outro processo estiver compactando, a chamada
+        retorna sem fazer nada.
+
+        Returns:
+            None
+        """
+        caminho_lock = os.path.join(self.diretorio, ARQUIVO_LOCK)
+        try:
+            if time.time() - os.path.getmtime(caminho_lock) > LOCK_EXPIRADO_S:
+                os.remove(caminho_lock)
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(caminho_lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return
+
+        try:
+            cobertos = self._arquivos_cobertos()
+            origens = [nome for nome in self._listar(PREFIXO_SEGMENTO) if nome not in cobertos]
+            compactados = [nome for nome in self._listar(PREFIXO_COMPACTADO) if nome not in cobertos]
+            if len(compactados) >= self.segmentos_para_compactar:
+                origens += compactados
+            if len(origens) > 1:
+                tabela = pa.concat_tables([
+                    pq.read_table(os.path.join(self.diretorio, n)).replace_schema_metadata(None) for n in origens
+                ])
+                compactado = self._publicar(
+                    tabela, PREFIXO_COMPACTADO, {CHAVE_ORIGENS: json.dumps(origens).encode()}
+                )
+                logging.info(f"🗜️ {len(origens)} arquivos de simulações compactados em {compactado}")
+                cobertos.update(origens)
+            # Segmentos antes dos compactados: um segmento continua coberto enquanto o arquivo
+            # compactado que o lista existir, mesmo se a remoção for interrompida
+            for nome in sorted(cobertos, key=lambda nome: nome.startswith(f"{PREFIXO_COMPACTADO}-")):
+                try:
+                    os.remove(os.path.join(self.diretorio, nome))
+                except FileNotFoundError:
+                    pass
+        finally:
+            os.remove(caminho_lock)
+
+    def _importar_legado(self, caminho_legado):
+        """Importa uma única vez o histórico do antigo `simulacoes.csv` como um segmento."""
+        marcador = os.path.join(self.diretorio, MARCADOR_LEGADO)
+        try:
+            os.close(os.open(marcador, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return
+
+        df = pd.read_csv(caminho_legado, parse_dates=["timestamp"])
+        if not df.empty:
+            self._publicar(pa.Table.from_pandas(df[ESQUEMA.names], schema=ESQUEMA, preserve_index=False),
+                           PREFIXO_SEGMENTO)
+        logging.info(f"📥 {len(df)} simulações importadas de {caminho_legado}")
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+    def _listar(self, prefixo):
+        return sorted(n for n in os.listdir(self.diretorio) if n.startswith(f"{prefixo}-") and n.endswith(".parquet"))
+
+    def _arquivos_cobertos(self):
+        """Nomes dos segmentos e arquivos compactados já incluídos em algum arquivo compactado."""
+        cobertos = set()
+        for nome in self._listar(PREFIXO_COMPACTADO):
+            metadados = pq.read_schema(os.path.join(self.diretorio, nome)).metadata or {}
+            cobertos.update(json.loads(metadados.get(CHAVE_ORIGENS, b"[]")))
+        return cobertos
+
+    def _arquivos_visiveis(self):
+        """Arquivos que formam o log em disco, sem os cobertos por compactação."""
+        cobertos = self._arquivos_cobertos()
+        return [n for n in self._listar(PREFIXO_COMPACTADO) + self._listar(PREFIXO_SEGMENTO) if n not in cobertos]
+
+    def _ler_arquivos(self, filtro_nomes, filtro_linhas=None):
+        """Lê os arquivos visíveis selecionados; refaz a listagem se uma compactação remover algum."""
+        for tentativa in range(3):
+            try:
+                tabelas = [pq.read_table(os.path.join(self.diretorio, n))
+                           for n in filter(filtro_nomes, self._arquivos_visiveis())]
+                break
+            except FileNotFoundError:
+                if tentativa == 2:
+                    raise
+        tabela = pa.concat_tables(tabelas) if tabelas else ESQUEMA.empty_table()
+        if filtro_linhas is not None:
+            tabela = tabela.filter(filtro_linhas(tabela))
+        return tabela
+
+    def _carregar_ultimas(self, n):
+        """Lê do disco as `n` linhas mais recentes, abrindo os arquivos do mais novo para o mais antigo."""
+        nomes = sorted(self._arquivos_visiveis(), key=lambda nome: _intervalo_do_nome(nome)[1], reverse=True)
+        selecionados, total = set(), 0
+        for nome in nomes:
+            if total >= n:
+                break
+            selecionados.add(nome)
+            total += pq.ParquetFile(os.path.join(self.diretorio, nome)).metadata.num_rows
+        tabela = self._ler_arquivos(lambda nome: nome in selecionados).sort_by("timestamp")
+        return tabela.slice(max(tabela.num_rows - n, 0)).to_pylist()
+
+    def recentes(self, n=10):
+        """
+        Retorna as últimas simulações a partir da fila em memória.
+
+        Args:
+            n (int, opcional): Quantidade de linhas (limitada por `capacidade_recentes`).
+
+        Returns:
+            pd.DataFrame: Últimas simulações, da mais antiga para a mais nova.
+        """
+        with self._lock:
+            linhas = list(self._recentes)[-n:] if n > 0 else []
+        return pd.DataFrame(linhas, columns=ESQUEMA.names)
+
+    def consultar(self, inicio=None, fim=None):
+        """
+        Retorna as simulações com timestamp em [inicio, fim], incluindo as ainda não gravadas.
+
+        Args:
+            inicio (datetime ou str, opcional): Início do intervalo (inclusivo).
+            fim (datetime ou str, opcional): Fim do intervalo (inclusivo).
+
+        Returns:
+            pd.DataFrame: Simulações do intervalo, ordenadas por timestamp.
+        """
+        inicio_ms = _para_ms(inicio) if inicio is not None else None
+        fim_ms = _para_ms(fim) if fim is not None else None
+
+        def sobrepoe(nome):
+            tmin, tmax = _intervalo_do_nome(nome)
+            return (inicio_ms is None or tmax >= inicio_ms) and (fim_ms is None or tmin <= fim_ms)
+
+        def no_intervalo(tabela):
+            tempos = tabela.column("timestamp").cast(pa.int64())
+            mascara = pc.greater_equal(tempos, inicio_ms) if inicio_ms is not None else pc.is_valid(tempos)
+            if fim_ms is not None:
+                mascara = pc.and_(mascara, pc.less_equal(tempos, fim_ms))
+            return mascara
+
+        with self._lock:
+            pendentes = pa.Table.from_pylist(self._pendentes, schema=ESQUEMA)
+            tabela = self._ler_arquivos(sobrepoe, no_intervalo)
+        tabela = pa.concat_tables([tabela, pendentes.filter(no_intervalo(pendentes))])
+        return tabela.sort_by("timestamp").to_pandas()
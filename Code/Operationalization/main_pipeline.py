@@ -1,37 +1,334 @@
 """
 Script principal para execução automatizada do pipeline completo do projeto.
 
-Este pipeline executa, em sequência:
+Este pipeline executa, em um único processo:
 1. Preparação dos dados (DataPrep)
 2. Treinamento do modelo (Model)
 3. Aplicação em produção (Operationalization)
 4. Orientação para execução dos dashboards com Streamlit
 
-Cada etapa é executada via subprocesso chamando os scripts correspondentes.
+Cada etapa declara suas entradas, saídas, parâmetros e dependências, formando um DAG.
+O executor é incremental: uma etapa só roda novamente se o conteúdo (hash xxHash) das
+suas entradas, seus parâmetros ou suas saídas mudaram desde a última execução, estado
+que fica salvo em `Data/Logs/estado_pipeline.json`. O tempo de parede e o pico de memória
+(RSS) de cada etapa são registrados no mesmo arquivo de estado.
+
+O executor roda em paralelo (até `--workers`) as etapas sem dependência entre si. As três
+etapas atuais formam uma cadeia (preparação → treinamento → aplicação) e sempre rodam uma
+de cada vez; o paralelismo vale para etapas independentes adicionadas ao DAG.
+
+Os trechos medidos dentro de cada etapa (ver `DataPrep/instrumentacao.py`) são gravados em
+`Data/Logs/trace_<etapa>.json`. Com `--perfil cprofile` ou `--perfil amostragem`, as etapas
+executadas também são perfiladas, gerando `Data/Logs/perfil_<etapa>.prof` ou `.folded`.
 """
 
-import subprocess
+import argparse
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime
+
+import psutil
+
+DIRETORIO_CODIGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RAIZ = os.path.abspath(os.path.join(DIRETORIO_CODIGO, ".."))
+sys.path.append(os.path.join(DIRETORIO_CODIGO, "DataPrep"))
+sys.path.append(os.path.join(DIRETORIO_CODIGO, "Model"))
 
-def executar_pipeline():
+from cache_dados import calcular_chave_cache, calcular_hash_arquivo
+from instrumentacao import MODOS_PERFIL, RASTREADOR, gravar_trace, perfilar
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def definir_etapas(raiz=RAIZ, threshold=None):
+    """
+    Declara as etapas do pipeline com suas entradas, saídas e dependências.
+
+    A função de cada etapa é indicada como "modulo:funcao" e só é importada quando a
+    etapa precisa ser executada, evitando o custo de importar o PyCaret quando o
+    treinamento é reaproveitado.
+
+    Args:
+        raiz (str, opcional): Diretório raiz do projeto.
+        threshold (float, opcional): Limite de decisão usado na aplicação em produção
+            (default: None, threshold escolhido no treinamento e gravado com o modelo).
+
+    Returns:
+        list[dict]: Etapas com as chaves "nome", "funcao", "parametros", "entradas", "saidas" e "depende_de".
+    """
+    raw = os.path.join(raiz, "Data", "Raw")
+    processed = os.path.join(raiz, "Data", "Processed")
+    modeling = os.path.join(raiz, "Data", "Modeling")
+
+    return [
+        {
+            "nome": "preparacao",
+            "funcao": "data_preparation:preparar_dados",
+            "parametros": {
+                "caminho_base_dev": os.path.join(raw, "dataset_kobe_dev.parquet"),
+                "caminho_base_prod": os.path.join(raw, "dataset_kobe_prod.parquet"),
+                "caminho_saida": processed,
+            },
+            "entradas": [
+                os.path.join(raw, "dataset_kobe_dev.parquet"),
+                os.path.join(raw, "dataset_kobe_prod.parquet"),
+            ],
+            "saidas": [
+                os.path.join(processed, "data_filtered.parquet"),
+                os.path.join(processed, "base_train.parquet"),
+                os.path.join(processed, "base_test.parquet"),
+                os.path.join(processed, "data_filtered.arrow"),
+                os.path.join(processed, "base_train.arrow"),
+                os.path.join(processed, "base_test.arrow"),
+                os.path.join(processed, "referencia_monitoramento.json"),
+            ],
+            "depende_de": [],
+        },
+        {
+            "nome": "treinamento",
+            "funcao": "train_model:treinar_modelos",
+            "parametros": {
+                "caminho_treino": os.path.join(processed, "base_train.parquet"),
+                "caminho_teste": os.path.join(processed, "base_test.parquet"),
+                "caminho_saida": modeling,
+            },
+            "entradas": [
+                os.path.join(processed, "base_train.parquet"),
+                os.path.join(processed, "base_test.parquet"),
+            ],
+            "saidas": [
+                os.path.join(modeling, "modelo_final.pkl"),
+                os.path.join(modeling, "modelo_final_numpy.npz"),
+                os.path.join(modeling, "modelo_final_threshold.json"),
+                # Candidatos finalizados de `treinar_modelos` (lr e dt), usados em `aplicacao.py --comparar`
+                os.path.join(modeling, "candidatos", "modelo_lr.pkl"),
+                os.path.join(modeling, "candidatos", "modelo_lr_threshold.json"),
+                os.path.join(modeling, "candidatos", "modelo_dt.pkl"),
+                os.path.join(modeling, "candidatos", "modelo_dt_threshold.json"),
+            ],
+            "depende_de": ["preparacao"],
+        },
+        {
+            "nome": "aplicacao",
+            "funcao": "aplicacao:aplicar_modelo",
+            "parametros": {
+                "caminho_modelo": os.path.join(modeling, "modelo_final"),
+                "caminho_dados_producao": os.path.join(raw, "dataset_kobe_prod.parquet"),
+                "caminho_saida": processed,
+                "threshold": threshold,
+                "caminho_referencia": os.path.join(processed, "referencia_monitoramento.json"),
+            },
+            "entradas": [
+                os.path.join(modeling, "modelo_final.pkl"),
+                os.path.join(modeling, "modelo_final_threshold.json"),
+                os.path.join(raw, "dataset_kobe_prod.parquet"),
+                os.path.join(processed, "referencia_monitoramento.json"),
+            ],
+            "saidas": [
+                os.path.join(processed, "predictions_prod.parquet"),
+                os.path.join(processed, "agregados_avaliacao.json"),
+            ],
+            "depende_de": ["treinamento"],
+        },
+    ]
+
+
+class MonitorMemoria:
+    """
+    Context manager que amostra o RSS do processo em uma thread auxiliar e guarda o pico.
+
+    Como as etapas rodam no mesmo processo, o valor medido é o RSS do processo inteiro
+    enquanto a etapa executa (inclui etapas concorrentes, se houver).
+    """
+
+    def __init__(self, intervalo_s=0.02):
+        self.intervalo_s = intervalo_s
+        self.pico_rss = 0
+        self._processo = psutil.Process()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _amostrar(self):
+        while True:
+            self.pico_rss = max(self.pico_rss, self._processo.memory_info().rss)
+            if self._parar.wait(self.intervalo_s):
+                break
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+        self.pico_rss = max(self.pico_rss, self._processo.memory_info().rss)
+        return False
+
+
+def _ler_estado(caminho_estado):
+    """Lê o estado da última execução do pipeline (dicionário vazio se ausente ou inválido)."""
+    try:
+        with open(caminho_estado, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _gravar_estado(caminho_estado, estado):
+    """Grava o estado do pipeline de forma atômica (arquivo temporário + rename)."""
+    os.makedirs(os.path.dirname(caminho_estado), exist_ok=True)
+    temporario = f"{caminho_estado}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(estado, arquivo, indent=2)
+    os.replace(temporario, caminho_estado)
+
+
+def _saidas_intactas(etapa, registro):
+    """Verifica se as saídas da etapa existem e têm o mesmo conteúdo registrado na última execução."""
+    hashes = registro.get("saidas", {})
+    for caminho in etapa["saidas"]:
+        if caminho not in hashes or not os.path.exists(caminho) or calcular_hash_arquivo(caminho) != hashes[caminho]:
+            return False
+    return True
+
+
+def _executar_etapa(etapa, registro_anterior, forcar, perfil=None):
+    """
+    Executa uma etapa, ou a reaproveita se entradas, parâmetros e saídas não mudaram.
+
+    Args:
+        etapa (dict): Declaração da etapa (ver `definir_etapas`).
+        registro_anterior (dict): Registro da etapa no estado da última execução.
+        forcar (bool): Se True, executa a etapa mesmo que esteja atualizada.
+        perfil (str, opcional): Modo de `instrumentacao.perfilar` aplicado à etapa, se executada.
+
+    Returns:
+        dict: Novo registro da etapa (impressão digital, hashes das saídas, tempo e pico de RSS).
+    """
+    impressao = calcular_chave_cache(
+        etapa["entradas"], {"funcao": etapa["funcao"], "parametros": etapa["parametros"]}
+    )
+    if (not forcar and registro_anterior.get("impressao") == impressao
+            and _saidas_intactas(etapa, registro_anterior)):
+        logging.info(f"♻️ Etapa '{etapa['nome']}' atualizada: reaproveitando as saídas.")
+        return {**registro_anterior, "status": "reaproveitada", "tempo_s": 0.0, "pico_rss_mb": None}
+
+    logging.info(f"▶️ Executando etapa '{etapa['nome']}'...")
+    nome_modulo, nome_funcao = etapa["funcao"].split(":")
+    diretorio_logs = os.path.join(RAIZ, "Data", "Logs")
+    perfilador = perfilar(os.path.join(diretorio_logs, f"perfil_{etapa['nome']}"), perfil) if perfil else nullcontext()
+    inicio = time.perf_counter()
+    with MonitorMemoria() as monitor, perfilador:
+        funcao = getattr(importlib.import_module(nome_modulo), nome_funcao)
+        funcao(**etapa["parametros"])
+
+        # train_model registra no MLflow fora de um `start_run`; encerra a rodada implícita
+        # para que a próxima etapa não tente abrir uma rodada aninhada
+        mlflow = sys.modules.get("mlflow")
+        if mlflow is not None and mlflow.active_run() is not None:
+            mlflow.end_run()
+
+    # Trechos medidos pela etapa: cada função de etapa abre um trecho raiz com o nome da etapa
+    gravar_trace(os.path.join(diretorio_logs, f"trace_{etapa['nome']}.json"), raiz=etapa["nome"])
+    RASTREADOR.descartar(etapa["nome"])
+
+    return {
+        "impressao": impressao,
+        "saidas": {caminho: calcular_hash_arquivo(caminho) for caminho in etapa["saidas"]},
+        "status": "executada",
+        "tempo_s": round(time.perf_counter() - inicio, 3),
+        "pico_rss_mb": round(monitor.pico_rss / 2**20, 1),
+        "executada_em": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def executar_dag(etapas, caminho_estado, forcar=None, n_workers=2, perfil=None):
+    """
+    Executa o DAG de etapas, rodando em paralelo as etapas cujas dependências já terminaram.
+
+    Args:
+        etapas (list[dict]): Etapas declaradas por `definir_etapas`.
+        caminho_estado (str): Arquivo .json com o estado das execuções anteriores.
+        forcar (list[str], opcional): Etapas a executar mesmo que atualizadas (lista vazia força todas).
+        n_workers (int, opcional): Número máximo de etapas independentes executadas ao mesmo tempo
+            (default: 2).
+        perfil (str, opcional): Modo de perfil das etapas executadas ("cprofile" ou "amostragem").
+
+    Returns:
+        dict: Registro de cada etapa após a execução.
+    """
+    estado = _ler_estado(caminho_estado)
+    pendentes = {etapa["nome"]: etapa for etapa in etapas}
+    concluidas = set()
+    em_execucao = {}
+
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        while pendentes or em_execucao:
+            for nome, etapa in list(pendentes.items()):
+                if set(etapa["depende_de"]) <= concluidas:
+                    forcar_etapa = forcar is not None and (not forcar or nome in forcar)
+                    futuro = executor.submit(_executar_etapa, etapa, estado.get(nome, {}), forcar_etapa, perfil)
+                    em_execucao[futuro] = nome
+                    del pendentes[nome]
+
+            if not em_execucao:
+                raise ValueError(f"❌ Dependências inexistentes ou cíclicas nas etapas: {sorted(pendentes)}")
+
+            finalizadas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in finalizadas:
+                nome = em_execucao.pop(futuro)
+                estado[nome] = futuro.result()
+                concluidas.add(nome)
+                _gravar_estado(caminho_estado, estado)
+
+    return estado
+
+
+def executar_pipeline(forcar=None, n_workers=2, threshold=None, perfil=None):
     """
     Executa o pipeline completo do projeto em quatro etapas:
 
-    1. Preparação dos Dados: Executa o script de pré-processamento e divisão treino/teste.
-    2. Treinamento do Modelo: Executa o script de treinamento com PyCaret e MLflow.
+    1. Preparação dos Dados: Executa o pré-processamento e a divisão treino/teste.
+    2. Treinamento do Modelo: Executa o treinamento com PyCaret e MLflow.
     3. Aplicação em Produção: Aplica o modelo treinado à base de produção.
     4. Dashboard: Exibe instruções para iniciar os dashboards interativos com Streamlit.
 
+    As etapas 1 a 3 são executadas pelo DAG incremental (ver `executar_dag`).
+
+    Args:
+        forcar (list[str], opcional): Etapas a executar mesmo que atualizadas (lista vazia força todas).
+        n_workers (int, opcional): Número máximo de etapas independentes executadas ao mesmo tempo
+            (default: 2). As etapas atuais formam uma cadeia e rodam uma de cada vez.
+        threshold (float, opcional): Limite de decisão usado na aplicação em produção
+            (default: None, threshold escolhido no treinamento e gravado com o modelo).
+        perfil (str, opcional): Modo de perfil das etapas executadas ("cprofile" ou "amostragem").
+
     Returns:
         None
     """
-    print("\n=== Etapa 1: Preparação dos Dados ===")
-    subprocess.run(["python", "../DataPrep/data_preparation.py"], check=True)
-
-    print("\n=== Etapa 2: Treinamento do Modelo ===")
-    subprocess.run(["python", "../Model/train_model.py"], check=True)
+    inicio = time.perf_counter()
+    estado = executar_dag(
+        definir_etapas(threshold=threshold),
+        caminho_estado=os.path.join(RAIZ, "Data", "Logs", "estado_pipeline.json"),
+        forcar=forcar,
+        n_workers=n_workers,
+        perfil=perfil
+    )
 
-    print("\n=== Etapa 3: Aplicação em Produção ===")
-    subprocess.run(["python", "aplicacao.py"], check=True)
+    print("\n=== Resumo das Etapas ===")
+    for nome, registro in estado.items():
+        pico = f"{registro['pico_rss_mb']:>8.1f} MB" if registro.get("pico_rss_mb") else "-"
+        print(f"{nome:<12} | {registro['status']:<13} | {registro['tempo_s']:>8.2f} s | pico RSS {pico}")
+    print(f"Tempo total: {time.perf_counter() - inicio:.2f} s")
 
     print("\n=== Etapa 4: Dashboard ===")
     print("\nInicie o dashboard com: streamlit run streamlit_dashboard.py")
@@ -41,4 +338,17 @@ def executar_pipeline():
     print("\n✅ Pipeline executado com sucesso!")
 
 if __name__ == "__main__":
-    executar_pipeline()
+    parser = argparse.ArgumentParser(description="Execução incremental do pipeline completo do projeto.")
+    parser.add_argument("--forcar", nargs="*", default=None,
+                        help="Executa as etapas indicadas mesmo que atualizadas (sem nomes, força todas).")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="Número máximo de etapas independentes executadas ao mesmo tempo "
+                             "(as etapas atuais formam uma cadeia e rodam uma de cada vez).")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Limite de decisão aplicado à probabilidade da classe 1 "
+                             "(default: threshold gravado com o modelo).")
+    parser.add_argument("--perfil", choices=MODOS_PERFIL, default=None,
+                        help="Perfila as etapas executadas (cProfile ou amostragem da pilha), em Data/Logs.")
+    args = parser.parse_args()
+
+    executar_pipeline(forcar=args.forcar, n_workers=args.workers, threshold=args.threshold, perfil=args.perfil)
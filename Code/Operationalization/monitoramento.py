@@ -0,0 +1,266 @@
+"""
+Monitoramento de drift e desempenho calculado durante a pontuação da base de produção.
+
+O `MonitorProducao` é atualizado a cada lote pontuado (ou uma única vez, no modo integral)
+e mantém apenas resumos de tamanho fixo:
+- por feature, um `DigestoQuantis` sobre a mesma grade da referência de treino (histograma,
+  quantis, nulos, valores fora da faixa de treino) e o PSI contra as faixas da referência
+  gravada pela preparação (`referencia_monitoramento.json`, ver `perfil_features.py`);
+- por janela de tempo (mês do `game_date`, quando a coluna existe), contagens para F1 Score,
+  taxa prevista x observada e o erro de calibração esperado (ECE) em `FAIXAS_CALIBRACAO`
+  faixas de probabilidade (o Log Loss geral continua em `aplicacao.MetricasIncrementais`).
+
+Cada atualização custa alguns `bincount` por lote (e a codificação em dicionário das datas).
+No final, `resumo()` monta um dicionário compacto, registrado no MLflow como
+`monitoramento.json`, com as principais métricas também como métricas da rodada.
+"""
+
+import logging
+import os
+import sys
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DataPrep"))
+from perfil_features import QUANTIS_RESUMO, contagens_faixas, ler_referencia, psi
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+COLUNA_TEMPO = "game_date"
+FAIXAS_CALIBRACAO = 10
+LIMITE_PSI_ALERTA = 0.2
+
+# Categorias das linhas em cada janela: não avaliada (alvo nulo), VN, FP, FN e VP
+_CATEGORIAS = 5
+_NAO_AVALIADA, _VN, _FP, _FN, _VP = range(_CATEGORIAS)
+
+
+def chaves_janela(coluna_tempo):
+    """
+    Agrupa as linhas em janelas mensais ("AAAA-MM") a partir da coluna de tempo.
+
+    As datas são codificadas em dicionário primeiro, e o mês é extraído apenas das datas
+    distintas do lote.
+
+    Args:
+        coluna_tempo (pa.Array ou pa.ChunkedArray): Datas (texto ISO, date ou timestamp).
+
+    Returns:
+        tuple: (chaves das janelas presentes, índice da janela de cada linha); valores nulos
+        ficam na janela "sem_data".
+    """
+    if isinstance(coluna_tempo, pa.ChunkedArray):
+        coluna_tempo = coluna_tempo.combine_chunks()
+    codificada = pc.dictionary_encode(coluna_tempo)
+    datas = codificada.dictionary
+    if not pa.types.is_string(datas.type) and not pa.types.is_large_string(datas.type):
+        datas = pc.strftime(datas, format="%Y-%m-%d")
+    meses = np.append(pc.utf8_slice_codeunits(datas, 0, 7).to_numpy(zero_copy_only=False), "sem_data")
+    chaves, janela_da_data = np.unique(meses, return_inverse=True)
+    indices = pc.fill_null(codificada.indices, len(meses) - 1).to_numpy().astype(np.int64)
+    return chaves, janela_da_data[indices]
+
+
+class MonitorProducao:
+    """
+    Acumula drift das features e desempenho por janela durante a pontuação.
+
+    Args:
+        referencia (dict ou None): Referência de `perfil_features.ler_referencia`; sem ela,
+            apenas o desempenho é monitorado.
+        threshold (float): Limite de decisão usado na pontuação.
+    """
+
+    def __init__(self, referencia, threshold):
+        self.referencia = referencia
+        self.threshold = threshold
+        self.digestos = {}
+        if referencia is not None:
+            self.digestos = {f: perfil["digesto"].vazio() for f, perfil in referencia["features"].items()}
+        self.linhas = 0
+
+        # Acumuladores por janela: uma linha por janela, na ordem de `janelas`
+        self.janelas = {}
+        self._categorias = np.zeros((0, _CATEGORIAS), dtype=np.int64)
+        self._calibracao = np.zeros((0, 3, FAIXAS_CALIBRACAO))  # linhas, soma proba, soma alvo
+
+    @classmethod
+    def de_arquivo(cls, caminho_referencia, threshold):
+        """
+        Cria o monitor a partir do arquivo de referência, se existir.
+
+        Args:
+            caminho_referencia (str ou None): Caminho de `referencia_monitoramento.json`.
+            threshold (float): Limite de decisão usado na pontuação.
+
+        Returns:
+            MonitorProducao: Monitor (sem drift, com aviso, se a referência não existir).
+        """
+        if caminho_referencia and os.path.exists(caminho_referencia):
+            return cls(ler_referencia(caminho_referencia), threshold)
+        logging.warning(f"⚠️ Referência de monitoramento não encontrada ({caminho_referencia}): "
+                        "drift das features não será calculado.")
+        return cls(None, threshold)
+
+    def _posicoes(self, chaves):
+        """Linha dos acumuladores de cada janela, criando as janelas ainda não vistas."""
+        novas = [chave for chave in chaves if chave not in self.janelas]
+        if novas:
+            for chave in novas:
+                self.janelas[chave] = len(self.janelas)
+            self._categorias = np.vstack([self._categorias, np.zeros((len(novas), _CATEGORIAS), dtype=np.int64)])
+            self._calibracao = np.vstack([self._calibracao, np.zeros((len(novas), 3, FAIXAS_CALIBRACAO))])
+        return np.array([self.janelas[chave] for chave in chaves], dtype=np.int64)
+
+    def atualizar(self, tabela, probabilidades, coluna_tempo=None):
+        """
+        Incorpora um lote pontuado.
+
+        Args:
+            tabela (pa.Table): Lote no schema compacto (features e, se houver, `shot_made_flag`).
+            probabilidades (np.ndarray ou None): Probabilidades da classe 1 do lote.
+            coluna_tempo (pa.Array, opcional): Datas das linhas, para as janelas de tempo.
+
+        Returns:
+            None
+        """
+        self.linhas += tabela.num_rows
+        for feature, digesto in self.digestos.items():
+            digesto.atualizar(tabela.column(feature).to_numpy(zero_copy_only=False))
+
+        if probabilidades is None or not tabela.num_rows:
+            return
+
+        if coluna_tempo is None:
+            chaves, indices = np.array(["total"]), np.zeros(tabela.num_rows, dtype=np.int64)
+        else:
+            chaves, indices = chaves_janela(coluna_tempo)
+        n_janelas = len(chaves)
+
+        proba = np.asarray(probabilidades, dtype=np.float64)
+        if "shot_made_flag" in tabela.column_names:
+            y = tabela.column("shot_made_flag").to_numpy(zero_copy_only=False)
+        else:
+            y = np.full(tabela.num_rows, np.nan)
+        avaliadas = ~np.isnan(y)
+        # Estado do alvo: 0 = nulo (não avaliada), 1 = erro, 2 = acerto
+        estado = avaliadas.astype(np.int64) + (y == 1)
+
+        # Uma contagem por (janela, categoria) dá linhas, alvo, VP, FP e FN de cada janela
+        categoria = np.where(avaliadas, 2 * estado - 1 + (proba >= self.threshold), _NAO_AVALIADA)
+        categorias = np.bincount(indices * _CATEGORIAS + categoria,
+                                 minlength=n_janelas * _CATEGORIAS).reshape(n_janelas, _CATEGORIAS)
+
+        # Calibração: linhas avaliadas, soma das probabilidades e acertos por (janela, faixa)
+        proba_avaliada = proba * avaliadas
+        faixa = np.minimum((proba * FAIXAS_CALIBRACAO).astype(np.int64), FAIXAS_CALIBRACAO - 1)
+        celula = indices * FAIXAS_CALIBRACAO + faixa
+        n_celulas = n_janelas * FAIXAS_CALIBRACAO
+        por_estado = np.bincount(celula * 3 + estado, minlength=3 * n_celulas).reshape(n_celulas, 3)
+        calibracao = np.stack([
+            por_estado[:, 1] + por_estado[:, 2],
+            np.bincount(celula, weights=proba_avaliada, minlength=n_celulas),
+            por_estado[:, 2],
+        ], axis=1).reshape(n_janelas, FAIXAS_CALIBRACAO, 3).transpose(0, 2, 1)
+
+        presentes = categorias.any(axis=1)
+        posicoes = self._posicoes(chaves[presentes].tolist())
+        self._categorias[posicoes] += categorias[presentes]
+        self._calibracao[posicoes] += calibracao[presentes]
+
+    @staticmethod
+    def _desempenho(categorias, calibracao):
+        """Métricas de desempenho e calibração a partir dos acumuladores de uma ou mais janelas."""
+        avaliadas = int(categorias[_NAO_AVALIADA + 1:].sum())
+        resultado = {"linhas": int(categorias.sum()), "linhas_avaliadas": avaliadas}
+        if not avaliadas:
+            return resultado
+        vp, fp, fn = categorias[_VP], categorias[_FP], categorias[_FN]
+        n, soma_proba, soma_alvo = calibracao
+        ocupadas = n > 0
+        ece = np.sum(np.abs(soma_proba[ocupadas] - soma_alvo[ocupadas])) / avaliadas
+        resultado.update({
+            "f1": float(2 * vp / (2 * vp + fp + fn)) if (2 * vp + fp + fn) else 0.0,
+            "proba_media": float(soma_proba.sum() / avaliadas),
+            "taxa_acerto_observada": float((fn + vp) / avaliadas),
+            "ece": float(ece),
+        })
+        return resultado
+
+    def _drift(self):
+        """PSI, quantis, nulos e valores fora da faixa de treino de cada feature."""
+        drift = {}
+        for feature, digesto in self.digestos.items():
+            perfil = self.referencia["features"][feature]
+            faixas = perfil["faixas_psi"]
+            referencia = perfil["digesto"]
+            fora = 0
+            if digesto.total:
+                celulas_treino = np.flatnonzero(referencia.contagens)
+                fora = (digesto.contagens[:celulas_treino[0]].sum() + digesto.contagens[celulas_treino[-1] + 1:].sum())
+            drift[feature] = {
+                "psi": psi(contagens_faixas(referencia, faixas), contagens_faixas(digesto, faixas)),
+                "quantis": {f"p{int(q * 100):02d}": digesto.quantil(q) for q in QUANTIS_RESUMO},
+                "quantis_treino": perfil["quantis"],
+                "nulos": digesto.nulos,
+                "fracao_fora_faixa_treino": float(fora / digesto.total) if digesto.total else 0.0,
+            }
+        return drift
+
+    def resumo(self):
+        """
+        Monta o resumo compacto do monitoramento.
+
+        Returns:
+            dict: Linhas pontuadas, drift por feature (se houver referência), desempenho
+            total e por janela de tempo.
+        """
+        resumo = {"linhas": self.linhas, "threshold": self.threshold}
+        if self.referencia is not None:
+            resumo["drift"] = self._drift()
+        if self.janelas:
+            resumo["desempenho"] = self._desempenho(self._categorias.sum(axis=0), self._calibracao.sum(axis=0))
+            resumo["janelas"] = {
+                chave: self._desempenho(self._categorias[i], self._calibracao[i])
+                for chave, i in sorted(self.janelas.items())
+            }
+        return resumo
+
+    @staticmethod
+    def metricas_mlflow(resumo):
+        """
+        Seleciona as métricas do resumo registradas diretamente na rodada do MLflow.
+
+        Args:
+            resumo (dict): Resumo de `resumo()`.
+
+        Returns:
+            dict: {"psi_<feature>": ..., "psi_max": ..., "ece_prod": ..., "janelas_monitoradas": ...}
+        """
+        metricas = {}
+        psis = {f: d["psi"] for f, d in resumo.get("drift", {}).items() if not np.isnan(d["psi"])}
+        metricas.update({f"psi_{f}": v for f, v in psis.items()})
+        if psis:
+            metricas["psi_max"] = max(psis.values())
+        if "ece" in resumo.get("desempenho", {}):
+            metricas["ece_prod"] = resumo["desempenho"]["ece"]
+        if "janelas" in resumo:
+            metricas["janelas_monitoradas"] = len(resumo["janelas"])
+        return metricas
+
+    @staticmethod
+    def registrar_log(resumo):
+        """Exibe no log o PSI das features e a calibração geral."""
+        for feature, drift in resumo.get("drift", {}).items():
+            alerta = "🚨" if drift["psi"] >= LIMITE_PSI_ALERTA else "📈"
+            logging.info(f"{alerta} Drift {feature}: PSI {drift['psi']:.4f} | mediana "
+                         f"{drift['quantis']['p50']:.3f} (treino {drift['quantis_treino']['p50']:.3f}) | "
+                         f"fora da faixa de treino: {drift['fracao_fora_faixa_treino']:.1%}")
+        desempenho = resumo.get("desempenho", {})
+        if "ece" in desempenho:
+            logging.info(f"🎯 Calibração: proba média {desempenho['proba_media']:.3f} x taxa observada "
+                         f"{desempenho['taxa_acerto_observada']:.3f} | ECE {desempenho['ece']:.4f} | "
+                         f"{len(resumo['janelas'])} janelas")
@@ -0,0 +1,41 @@
+"""
+Ponto de entrada enxuto para pontuação da base de produção com inicialização rápida.
+
+Usa o kernel NumPy exportado no treinamento (`modelo_final_numpy.npz`) e o modo streaming
+de `aplicacao.py`, sem importar PyCaret, MLflow, matplotlib ou seaborn. O registro no MLflow
+é opcional (--mlflow) e, quando ativado, o MLflow só é importado ao final da pontuação.
+
+Execução:
+    python pontuacao_rapida.py --batch-size 50000
+"""
+
+import argparse
+
+from aplicacao import aplicar_modelo_streaming
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pontuação rápida com o kernel NumPy do modelo final.")
+    parser.add_argument("--modelo", default="../../Data/Modeling/modelo_final_numpy.npz",
+                        help="Kernel NumPy (.npz) exportado no treinamento.")
+    parser.add_argument("--dados", default="../../Data/Raw/dataset_kobe_prod.parquet",
+                        help="Arquivo .parquet com os dados de produção.")
+    parser.add_argument("--saida", default="../../Data/Processed",
+                        help="Diretório de saída do arquivo de predições.")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Limite de decisão aplicado à probabilidade da classe 1 "
+                             "(default: threshold gravado com o modelo).")
+    parser.add_argument("--batch-size", type=int, default=50_000,
+                        help="Quantidade máxima de linhas por lote.")
+    parser.add_argument("--mlflow", action="store_true",
+                        help="Registra a rodada \"PipelineAplicacao\" no MLflow.")
+    args = parser.parse_args()
+
+    aplicar_modelo_streaming(
+        caminho_modelo=args.modelo,
+        caminho_dados_producao=args.dados,
+        caminho_saida=args.saida,
+        threshold=args.threshold,
+        batch_size=args.batch_size,
+        registrar_mlflow=args.mlflow
+    )
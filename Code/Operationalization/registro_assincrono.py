@@ -0,0 +1,314 @@
+"""
+Registro assíncrono e em lote no MLflow, fora do caminho das interações dos dashboards.
+
+Os dashboards enfileiram parâmetros, métricas e artefatos e seguem imediatamente. Uma
+thread em segundo plano consome a fila e grava no MLflow:
+- Eventos são acumulados até `max_eventos` ou até `intervalo_flush_s` segundos e então
+  gravados; parâmetros, métricas e tags de cada rodada vão em chamadas `log_batch`.
+- Artefatos idênticos (mesmo hash xxHash do conteúdo) são enviados uma única vez por
+  processo; as rodadas seguintes recebem apenas uma tag apontando para o artefato original.
+- Séries (ex.: simulações de arremessos) são gravadas em uma única rodada por sessão, com
+  uma métrica por passo, em vez de uma rodada por evento. O registrador é compartilhado pelo
+  processo, então o chamador informa a sessão (ex.: `session_id` da sessão do Streamlit); cada
+  sessão tem sua rodada, identificada pela tag `sessao`.
+- Na saída do processo (`atexit`), a fila é esvaziada e as rodadas de série são encerradas.
+
+Falhas de gravação são registradas no log e nunca propagadas para a interface.
+"""
+
+import atexit
+import io
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+
+import xxhash
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Limites do MLflow por chamada de `log_batch`
+MAX_METRICAS_LOTE = 1000
+MAX_PARAMS_LOTE = 100
+
+
+def _serializar_artefato(nome, conteudo):
+    """
+    Converte um artefato em bytes.
+
+    Args:
+        nome (str): Caminho do artefato na rodada; a extensão define o formato de DataFrames.
+        conteudo (bytes, pd.DataFrame ou str): Conteúdo do artefato.
+
+    Returns:
+        bytes: Conteúdo serializado.
+    """
+    if isinstance(conteudo, bytes):
+        return conteudo
+    if isinstance(conteudo, str):
+        return conteudo.encode("utf-8")
+    if nome.endswith(".parquet"):
+        return conteudo.to_parquet(index=False)
+    return conteudo.to_csv(index=False).encode("utf-8")
+
+
+def figura_para_bytes(fig, formato="png"):
+    """
+    Serializa uma figura do Matplotlib em memória, sem arquivo temporário.
+
+    Args:
+        fig (matplotlib.figure.Figure): Figura.
+        formato (str, opcional): Formato da imagem (default: "png").
+
+    Returns:
+        bytes: Imagem serializada.
+    """
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=formato, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+class RegistradorAssincrono:
+    """
+    Fila de eventos de registro consumida por uma thread que grava no MLflow em lotes.
+
+    Attributes:
+        max_eventos (int): Quantidade de eventos acumulados que dispara uma gravação.
+        intervalo_flush_s (float): Tempo máximo (s) entre a chegada de um evento e sua gravação.
+    """
+
+    def __init__(self, max_eventos=50, intervalo_flush_s=2.0):
+        self.max_eventos = max_eventos
+        self.intervalo_flush_s = intervalo_flush_s
+        self._fila = queue.Queue()
+        self._cliente = None
+        self._experimentos = {}
+        self._artefatos_enviados = {}
+        self._series = {}
+        self._thread = threading.Thread(target=self._consumir, name="registro-mlflow", daemon=True)
+        self._thread.start()
+        atexit.register(self.encerrar)
+
+    # ------------------------------------------------------------------
+    # API usada pelos dashboards (não bloqueante)
+    # ------------------------------------------------------------------
+    def registrar_rodada(self, experimento, nome_rodada, params=None, metricas=None, artefatos=None, tags=None):
+        """
+        Enfileira uma rodada completa (parâmetros, métricas, tags e artefatos).
+
+        Args:
+            experimento (str): Nome do experimento no MLflow.
+            nome_rodada (str): Nome da rodada.
+            params (dict, opcional): Parâmetros.
+            metricas (dict, opcional): Métricas.
+            artefatos (dict, opcional): {"pasta/arquivo.ext": bytes, str ou pd.DataFrame}.
+            tags (dict, opcional): Tags adicionais.
+
+        Returns:
+            None
+        """
+        self._fila.put(("rodada", {
+            "experimento": experimento, "nome_rodada": nome_rodada, "params": params or {},
+            "metricas": metricas or {}, "artefatos": artefatos or {}, "tags": tags or {},
+            "timestamp": int(time.time() * 1000),
+        }))
+
+    def registrar_serie(self, experimento, nome_rodada, metricas, sessao=None):
+        """
+        Enfileira um ponto de uma série; todos os pontos da sessão vão para uma única rodada.
+
+        Args:
+            experimento (str): Nome do experimento no MLflow.
+            nome_rodada (str): Nome da rodada da série.
+            metricas (dict): Métricas do ponto, gravadas com o próximo `step` da série.
+            sessao (str, opcional): Identificador da sessão; pontos de sessões diferentes vão para
+                rodadas diferentes (default: None, uma rodada para o processo).
+
+        Returns:
+            None
+        """
+        self._fila.put(("serie", {
+            "experimento": experimento, "nome_rodada": nome_rodada, "sessao": sessao, "metricas": metricas,
+            "timestamp": int(time.time() * 1000),
+        }))
+
+    def flush(self, timeout=None):
+        """
+        Aguarda a gravação de todos os eventos enfileirados até o momento.
+
+        Args:
+            timeout (float, opcional): Tempo máximo de espera (s).
+
+        Returns:
+            bool: True se a fila foi gravada dentro do prazo.
+        """
+        concluido = threading.Event()
+        self._fila.put(("flush", concluido))
+        return concluido.wait(timeout)
+
+    def encerrar(self, timeout=10.0):
+        """Grava os eventos pendentes e encerra as rodadas de série abertas."""
+        if self._thread.is_alive():
+            concluido = threading.Event()
+            self._fila.put(("encerrar", concluido))
+            concluido.wait(timeout)
+
+    # ------------------------------------------------------------------
+    # Thread de gravação
+    # ------------------------------------------------------------------
+    def _consumir(self):
+        """Laço da thread: acumula eventos e grava por tamanho ou tempo."""
+        pendentes = []
+        prazo = None
+        while True:
+            espera = None if prazo is None else max(prazo - time.monotonic(), 0)
+            try:
+                tipo, evento = self._fila.get(timeout=espera)
+            except queue.Empty:
+                tipo, evento = None, None
+
+            if tipo in ("rodada", "serie"):
+                pendentes.append((tipo, evento))
+                prazo = prazo or time.monotonic() + self.intervalo_flush_s
+
+            if pendentes and (tipo in ("flush", "encerrar") or len(pendentes) >= self.max_eventos
+                              or time.monotonic() >= prazo):
+                self._gravar(pendentes)
+                pendentes, prazo = [], None
+
+            if tipo == "encerrar":
+                self._encerrar_series()
+                evento.set()
+                return
+            if tipo == "flush":
+                evento.set()
+
+    def _obter_cliente(self):
+        """Importa o MLflow apenas na thread de gravação, na primeira gravação."""
+        if self._cliente is None:
+            from mlflow.tracking import MlflowClient
+            self._cliente = MlflowClient()
+        return self._cliente
+
+    def _id_experimento(self, nome):
+        """Obtém (ou cria) o experimento, com cache do id."""
+        if nome not in self._experimentos:
+            cliente = self._obter_cliente()
+            experimento = cliente.get_experiment_by_name(nome)
+            self._experimentos[nome] = (
+                experimento.experiment_id if experimento else cliente.create_experiment(nome)
+            )
+        return self._experimentos[nome]
+
+    def _gravar(self, pendentes):
+        """Grava um lote de eventos, isolando falhas de cada evento."""
+        inicio = time.perf_counter()
+        pontos_series = {}
+        for tipo, evento in pendentes:
+            try:
+                if tipo == "rodada":
+                    self._gravar_rodada(evento)
+                else:
+                    chave = (evento["experimento"], evento["nome_rodada"], evento["sessao"])
+                    pontos_series.setdefault(chave, []).append(evento)
+            except Exception:
+                logging.exception(f"❌ Falha ao registrar a rodada '{evento['nome_rodada']}' no MLflow.")
+
+        for (experimento, nome_rodada, sessao), pontos in pontos_series.items():
+            try:
+                self._gravar_serie(experimento, nome_rodada, sessao, pontos)
+            except Exception:
+                logging.exception(f"❌ Falha ao registrar a série '{nome_rodada}' no MLflow.")
+
+        logging.info(f"📡 {len(pendentes)} eventos registrados no MLflow em {time.perf_counter() - inicio:.2f} s")
+
+    def _log_batch(self, run_id, metricas=(), params=(), tags=()):
+        """Envia métricas, parâmetros e tags em chamadas `log_batch` respeitando os limites do MLflow."""
+        metricas, params, tags = list(metricas), list(params), list(tags)
+        while metricas or params or tags:
+            self._obter_cliente().log_batch(
+                run_id, metrics=metricas[:MAX_METRICAS_LOTE], params=params[:MAX_PARAMS_LOTE], tags=tags[:MAX_PARAMS_LOTE]
+            )
+            metricas, params, tags = (
+                metricas[MAX_METRICAS_LOTE:], params[MAX_PARAMS_LOTE:], tags[MAX_PARAMS_LOTE:]
+            )
+
+    def _gravar_rodada(self, evento):
+        """Cria a rodada, envia parâmetros/métricas/tags em lote e os artefatos não duplicados."""
+        from mlflow.entities import Metric, Param, RunTag
+
+        cliente = self._obter_cliente()
+        rodada = cliente.create_run(self._id_experimento(evento["experimento"]), run_name=evento["nome_rodada"])
+        run_id = rodada.info.run_id
+
+        tags = [RunTag(k, str(v)) for k, v in evento["tags"].items()]
+        with tempfile.TemporaryDirectory() as diretorio:
+            for nome, conteudo in evento["artefatos"].items():
+                dados = _serializar_artefato(nome, conteudo)
+                chave = xxhash.xxh3_64_hexdigest(dados)
+                if chave in self._artefatos_enviados:
+                    tags.append(RunTag(f"artefato_reutilizado.{nome}", self._artefatos_enviados[chave]))
+                    continue
+
+                pasta, arquivo = os.path.split(nome)
+                caminho_local = os.path.join(diretorio, arquivo)
+                with open(caminho_local, "wb") as saida:
+                    saida.write(dados)
+                cliente.log_artifact(run_id, caminho_local, artifact_path=pasta or None)
+                self._artefatos_enviados[chave] = f"{rodada.info.artifact_uri}/{nome}"
+
+        self._log_batch(
+            run_id,
+            metricas=[Metric(k, float(v), evento["timestamp"], 0) for k, v in evento["metricas"].items()],
+            params=[Param(k, str(v)) for k, v in evento["params"].items()],
+            tags=tags,
+        )
+        cliente.set_terminated(run_id)
+
+    def _gravar_serie(self, experimento, nome_rodada, sessao, pontos):
+        """Anexa os pontos à rodada da série da sessão (criada no primeiro ponto da sessão)."""
+        from mlflow.entities import Metric
+
+        chave = (experimento, nome_rodada, sessao)
+        if chave not in self._series:
+            tags = {"sessao": sessao} if sessao is not None else None
+            rodada = self._obter_cliente().create_run(self._id_experimento(experimento), run_name=nome_rodada, tags=tags)
+            self._series[chave] = [rodada.info.run_id, 0]
+
+        run_id, passo = self._series[chave]
+        metricas = []
+        for ponto in pontos:
+            metricas.extend(Metric(k, float(v), ponto["timestamp"], passo) for k, v in ponto["metricas"].items())
+            passo += 1
+        self._log_batch(run_id, metricas=metricas)
+        self._series[chave][1] = passo
+
+    def _encerrar_series(self):
+        """Marca as rodadas de série como finalizadas."""
+        for run_id, _ in self._series.values():
+            try:
+                self._obter_cliente().set_terminated(run_id)
+            except Exception:
+                logging.exception("❌ Falha ao encerrar rodada de série no MLflow.")
+        self._series = {}
+
+
+_registrador = None
+_trava_registrador = threading.Lock()
+
+
+def obter_registrador():
+    """
+    Retorna o registrador compartilhado do processo, criando-o no primeiro uso.
+
+    Returns:
+        RegistradorAssincrono: Registrador com uma única thread de gravação por processo.
+    """
+    global _registrador
+    with _trava_registrador:
+        if _registrador is None:
+            _registrador = RegistradorAssincrono()
+        return _registrador
@@ -0,0 +1,168 @@
+"""
+Registro de modelos carregados no processo, versionados pelo conteúdo do artefato.
+
+Cada modelo (pipeline do PyCaret `.pkl` ou kernel NumPy `.npz`) é carregado uma única vez por
+processo e reaproveitado por todas as chamadas seguintes: jobs de aplicação, workers do pool
+de inferência, serviço de pontuação e sessões do Streamlit (o módulo é importado uma vez por
+processo, então as sessões compartilham o mesmo registro, como um `st.cache_resource`).
+
+A cada consulta, o `stat` do artefato (mtime e tamanho) é comparado ao da última verificação.
+O hash xxHash do conteúdo só é recalculado quando o `stat` muda, e o modelo só é recarregado
+quando o hash muda; a versão anterior é descartada. A consulta de um modelo já carregado custa
+um `os.stat`.
+
+Todas as operações são protegidas por um lock, então sessões concorrentes que pedem o mesmo
+modelo disparam uma única carga.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Model"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DataPrep"))
+
+from cache_dados import calcular_hash_arquivo
+from instrumentacao import medir
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def arquivo_do_modelo(caminho_modelo):
+    """
+    Arquivo em disco de um modelo: o próprio `.npz` ou o `.pkl` salvo pelo PyCaret.
+
+    Args:
+        caminho_modelo (str): Caminho do kernel NumPy (.npz) ou do modelo do PyCaret (sem extensão).
+
+    Returns:
+        str: Caminho do arquivo do artefato.
+    """
+    return caminho_modelo if caminho_modelo.endswith(".npz") else f"{caminho_modelo}.pkl"
+
+
+@medir("carregar_modelo")
+def carregar_artefato(caminho_modelo):
+    """
+    Carrega o modelo do disco, sem cache, importando o PyCaret somente quando necessário.
+
+    Args:
+        caminho_modelo (str): Caminho do kernel NumPy (.npz) ou do modelo do PyCaret (sem extensão).
+
+    Returns:
+        Modelo com `predict_proba`: `PreditorNumpy` ou pipeline do PyCaret.
+    """
+    if caminho_modelo.endswith(".npz"):
+        from kernel_numpy import carregar_preditor_numpy
+        return carregar_preditor_numpy(caminho_modelo)
+
+    from pycaret.classification import load_model
+    return load_model(caminho_modelo)
+
+
+class RegistroModelos:
+    """
+    Modelos carregados no processo, um por artefato, recarregados quando o conteúdo muda.
+
+    Args:
+        carregar (callable, opcional): Função `caminho_modelo -> modelo` (default: `carregar_artefato`).
+    """
+
+    def __init__(self, carregar=carregar_artefato):
+        self._carregar = carregar
+        self._lock = threading.Lock()
+        self._versoes = {}
+        self._modelos = {}
+
+    def _versao(self, arquivo):
+        """Hash do arquivo, recalculado apenas quando o `stat` mudou desde a última verificação."""
+        estado = os.stat(arquivo)
+        assinatura = (estado.st_mtime_ns, estado.st_size)
+        registro = self._versoes.get(arquivo)
+        if registro is None or registro[0] != assinatura:
+            registro = (assinatura, calcular_hash_arquivo(arquivo))
+            self._versoes[arquivo] = registro
+        return registro[1]
+
+    def versao(self, caminho_modelo):
+        """
+        Versão (hash do conteúdo) do artefato em disco, sem carregar o modelo.
+
+        Args:
+            caminho_modelo (str): Caminho do kernel NumPy (.npz) ou do modelo do PyCaret (sem extensão).
+
+        Returns:
+            str: Hash xxHash do arquivo do artefato.
+
+        Raises:
+            FileNotFoundError: Se o arquivo do artefato não existir.
+        """
+        with self._lock:
+            return self._versao(arquivo_do_modelo(os.path.abspath(caminho_modelo)))
+
+    def obter(self, caminho_modelo):
+        """
+        Retorna o modelo do artefato, carregando-o apenas na primeira consulta ou se o conteúdo mudou.
+
+        Args:
+            caminho_modelo (str): Caminho do kernel NumPy (.npz) ou do modelo do PyCaret (sem extensão).
+
+        Returns:
+            Modelo com `predict_proba`.
+
+        Raises:
+            FileNotFoundError: Se o arquivo do artefato não existir.
+        """
+        chave = os.path.abspath(caminho_modelo)
+        with self._lock:
+            versao = self._versao(arquivo_do_modelo(chave))
+            carregado = self._modelos.get(chave)
+            if carregado is not None and carregado[0] == versao:
+                return carregado[1]
+
+            inicio = time.perf_counter()
+            modelo = self._carregar(caminho_modelo)
+            acao = "recarregado" if carregado is not None else "carregado"
+            logging.info(f"📦 Modelo {acao}: {arquivo_do_modelo(caminho_modelo)} "
+                         f"(versão {versao}, {time.perf_counter() - inicio:.2f} s)")
+            self._modelos[chave] = (versao, modelo)
+            return modelo
+
+    def descartar(self, caminho_modelo=None):
+        """
+        Remove um modelo (ou todos) do registro; a próxima consulta o carrega novamente.
+
+        Args:
+            caminho_modelo (str, opcional): Modelo a remover (default: None, todos).
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if caminho_modelo is None:
+                self._modelos.clear()
+                self._versoes.clear()
+            else:
+                chave = os.path.abspath(caminho_modelo)
+                self._modelos.pop(chave, None)
+                self._versoes.pop(arquivo_do_modelo(chave), None)
+
+
+# Registro do processo, compartilhado por todos os módulos que pontuam
+REGISTRO = RegistroModelos()
+
+
+def obter_modelo(caminho_modelo):
+    """
+    Atalho para `REGISTRO.obter`: modelo do artefato, carregado uma vez por processo e por versão.
+
+    Args:
+        caminho_modelo (str): Caminho do kernel NumPy (.npz) ou do modelo do PyCaret (sem extensão).
+
+    Returns:
+        Modelo com `predict_proba`.
+    """
+    return REGISTRO.obter(caminho_modelo)
@@ -0,0 +1,205 @@
+"""
+Camada de renderização do mapa de arremessos com agregação em blocos e nível de detalhe.
+
+Os arremessos são lidos uma única vez e pré-agregados em um cubo de contagens por
+(resultado, distância, bloco de latitude, bloco de longitude) com `np.bincount`. O cubo é
+acumulado ao longo da distância, de modo que qualquer combinação de filtros (resultados
+selecionados × distância máxima) vira uma soma de poucas fatias 2D, sem percorrer as linhas.
+
+Na renderização, o nível de detalhe é escolhido pela quantidade de arremessos visíveis:
+até `LIMITE_PONTOS`, os pontos brutos são desenhados (selecionados por fatias contíguas de
+arrays ordenados por resultado e distância); acima disso, os blocos são desenhados com
+`imshow`, coloridos pela contagem ou pela taxa de acerto.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from matplotlib.colors import LogNorm
+from matplotlib.patches import Patch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DataPrep"))
+
+from acesso_dados import ler_colunas
+
+# Limites da imagem da quadra em (lon_min, lon_max, lat_min, lat_max)
+EXTENSAO_QUADRA = [-118.5, -118.05, 33.5, 34.1]
+
+RESULTADOS = ["Erro", "Cesta", "Desconhecido"]
+CORES = ["red", "green", "black"]
+
+LIMITE_PONTOS = 20_000
+
+
+class MapaAgregado:
+    """
+    Arremessos pré-agregados em blocos quadrados, acumulados por distância.
+
+    Attributes:
+        cubo (np.ndarray): Contagens acumuladas com shape (resultado, distância, lat, lon).
+        distancia_max (int): Maior distância representada no cubo (pés).
+    """
+
+    def __init__(self, lat, lon, shot_distance, shot_made_flag, n_blocos_lat=120, n_blocos_lon=90):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        distancia = np.nan_to_num(np.asarray(shot_distance, dtype=np.float64)).astype(np.int64)
+        flag = np.asarray(shot_made_flag, dtype=np.float64)
+        codigo = np.where(np.isnan(flag), 2, flag).astype(np.int64)
+
+        self.distancia_max = int(distancia.max()) if distancia.size else 0
+        self.n_blocos_lat = n_blocos_lat
+        self.n_blocos_lon = n_blocos_lon
+
+        # Índice do bloco de cada arremesso (fora da quadra fica de fora dos blocos)
+        lon_min, lon_max, lat_min, lat_max = EXTENSAO_QUADRA
+        bloco_lat = np.floor((lat - lat_min) / (lat_max - lat_min) * n_blocos_lat).astype(np.int64)
+        bloco_lon = np.floor((lon - lon_min) / (lon_max - lon_min) * n_blocos_lon).astype(np.int64)
+        na_quadra = (bloco_lat >= 0) & (bloco_lat < n_blocos_lat) & (bloco_lon >= 0) & (bloco_lon < n_blocos_lon)
+
+        formato = (len(RESULTADOS), self.distancia_max + 1, n_blocos_lat, n_blocos_lon)
+        indice = np.ravel_multi_index(
+            (codigo[na_quadra], distancia[na_quadra], bloco_lat[na_quadra], bloco_lon[na_quadra]), formato
+        )
+        contagens = np.bincount(indice, minlength=int(np.prod(formato))).reshape(formato)
+        self.cubo = np.cumsum(contagens, axis=1, dtype=np.int32)
+
+        # Arremessos ordenados por (resultado, distância) para seleção dos pontos brutos por fatias
+        ordem = np.lexsort((distancia, codigo))
+        self._lat = lat[ordem]
+        self._lon = lon[ordem]
+        self._distancia = distancia[ordem]
+        self._codigo = codigo[ordem]
+        chaves = codigo[ordem] * (self.distancia_max + 1) + distancia[ordem]
+        self._fim_por_chave = np.searchsorted(chaves, np.arange(len(RESULTADOS) * (self.distancia_max + 1)),
+                                              side="right")
+
+    def _indice_distancia(self, distancia_max):
+        return int(np.clip(np.floor(distancia_max), 0, self.distancia_max))
+
+    def contagens(self, resultados, distancia_max):
+        """
+        Soma as contagens por bloco para os filtros informados.
+
+        Args:
+            resultados (list[str]): Resultados selecionados ("Erro", "Cesta", "Desconhecido").
+            distancia_max (float): Distância máxima do arremesso (pés).
+
+        Returns:
+            dict: {resultado: matriz (lat, lon) de contagens} para cada resultado selecionado.
+        """
+        d = self._indice_distancia(distancia_max)
+        return {r: self.cubo[RESULTADOS.index(r), d] for r in resultados}
+
+    def _fatias(self, resultados, distancia_max):
+        """Intervalos [inicio, fim) dos arrays ordenados que atendem aos filtros."""
+        d = self._indice_distancia(distancia_max)
+        fatias = []
+        for r in resultados:
+            codigo = RESULTADOS.index(r)
+            primeira = codigo * (self.distancia_max + 1)
+            inicio = self._fim_por_chave[primeira - 1] if primeira > 0 else 0
+            fatias.append((int(inicio), int(self._fim_por_chave[primeira + d])))
+        return fatias
+
+    def quantidade(self, resultados, distancia_max):
+        """
+        Conta os arremessos que atendem aos filtros (inclusive fora da imagem da quadra).
+
+        Args:
+            resultados (list[str]): Resultados selecionados.
+            distancia_max (float): Distância máxima do arremesso (pés).
+
+        Returns:
+            int: Quantidade de arremessos visíveis.
+        """
+        return sum(fim - inicio for inicio, fim in self._fatias(resultados, distancia_max))
+
+    def pontos(self, resultados, distancia_max):
+        """
+        Seleciona os arremessos brutos que atendem aos filtros.
+
+        Args:
+            resultados (list[str]): Resultados selecionados.
+            distancia_max (float): Distância máxima do arremesso (pés).
+
+        Returns:
+            pd.DataFrame: Colunas lat, lon, shot_distance e resultado.
+        """
+        fatias = [slice(inicio, fim) for inicio, fim in self._fatias(resultados, distancia_max)]
+        selecionar = lambda array: np.concatenate([array[f] for f in fatias]) if fatias else array[:0]
+        return pd.DataFrame({
+            "lat": selecionar(self._lat),
+            "lon": selecionar(self._lon),
+            "shot_distance": selecionar(self._distancia),
+            "resultado": np.asarray(RESULTADOS, dtype=object)[selecionar(self._codigo)],
+        })
+
+    def renderizar(self, ax, resultados, distancia_max, modo_blocos="Taxa de acerto", limite_pontos=LIMITE_PONTOS):
+        """
+        Desenha os arremessos filtrados, escolhendo entre pontos brutos e blocos agregados.
+
+        Args:
+            ax (matplotlib.axes.Axes): Eixo onde desenhar (a imagem da quadra já deve estar no fundo).
+            resultados (list[str]): Resultados selecionados.
+            distancia_max (float): Distância máxima do arremesso (pés).
+            modo_blocos (str, opcional): "Taxa de acerto" ou "Contagem" (usado apenas nos blocos).
+            limite_pontos (int, opcional): Máximo de arremessos desenhados como pontos brutos.
+
+        Returns:
+            dict: Nível de detalhe usado ("pontos" ou "blocos"), quantidade visível e tempo de desenho (ms).
+        """
+        inicio = time.perf_counter()
+        quantidade = self.quantidade(resultados, distancia_max)
+
+        if quantidade <= limite_pontos:
+            pontos = self.pontos(resultados, distancia_max)
+            cores = pontos["resultado"].map(dict(zip(RESULTADOS, CORES)))
+            ax.scatter(pontos["lon"], pontos["lat"], c=cores, s=10, alpha=0.7,
+                       edgecolors='k', linewidths=0.1, zorder=1)
+            ax.legend(handles=[Patch(color=c, label=r) for r, c in zip(RESULTADOS, CORES)],
+                      loc='lower left', title='Resultado do Arremesso')
+            nivel = "pontos"
+        else:
+            contagens = self.contagens(resultados, distancia_max)
+            # Resultados não selecionados contam como grades vazias (mantém o formato da imagem)
+            vazia = np.zeros((self.n_blocos_lat, self.n_blocos_lon), dtype=np.int64)
+            total = sum(contagens.values(), vazia)
+            if modo_blocos == "Taxa de acerto":
+                cestas = contagens.get("Cesta", vazia)
+                conhecidos = cestas + contagens.get("Erro", vazia)
+                valores = np.ma.masked_where(conhecidos == 0, cestas / np.maximum(conhecidos, 1))
+                imagem = ax.imshow(valores, extent=EXTENSAO_QUADRA, origin='lower', aspect='auto',
+                                   cmap="RdYlGn", vmin=0, vmax=1, alpha=0.75, zorder=1)
+            else:
+                valores = np.ma.masked_where(total == 0, total)
+                imagem = ax.imshow(valores, extent=EXTENSAO_QUADRA, origin='lower', aspect='auto',
+                                   cmap="hot", norm=LogNorm(vmin=1, vmax=max(int(total.max()), 2)),
+                                   alpha=0.8, zorder=1)
+            ax.figure.colorbar(imagem, ax=ax, label=modo_blocos)
+            nivel = "blocos"
+
+        return {"nivel": nivel, "quantidade": quantidade, "tempo_ms": (time.perf_counter() - inicio) * 1000}
+
+
+def carregar_mapa(caminho_dados, n_blocos_lat=120, n_blocos_lon=90, distancia_max=None):
+    """
+    Lê apenas as colunas necessárias do parquet e constrói o `MapaAgregado`.
+
+    Args:
+        caminho_dados (str): Arquivo .parquet com os arremessos.
+        n_blocos_lat (int, opcional): Quantidade de blocos na latitude (default: 120).
+        n_blocos_lon (int, opcional): Quantidade de blocos na longitude (default: 90).
+        distancia_max (int, opcional): Maior distância que o mapa poderá exibir; arremessos mais
+            distantes são descartados já na leitura (default: None, sem limite).
+
+    Returns:
+        MapaAgregado: Arremessos agregados.
+    """
+    df = ler_colunas(caminho_dados, ["lat", "lon", "shot_distance", "shot_made_flag"],
+                     limites={"shot_distance": (None, distancia_max)}, tipos="compacto")
+    return MapaAgregado(df["lat"], df["lon"], df["shot_distance"], df["shot_made_flag"],
+                        n_blocos_lat=n_blocos_lat, n_blocos_lon=n_blocos_lon)
@@ -0,0 +1,239 @@
+"""
+Serviço HTTP local de pontuação de arremessos do Kobe Bryant, construído com FastAPI e Uvicorn.
+
+Funcionalidades:
+- Carregamento único do modelo final na inicialização do serviço.
+- Endpoint `/predict` para um arremesso ou para um lote de arremessos.
+- Micro-batching: requisições concorrentes são agrupadas em uma única chamada vetorizada
+  de `predict_proba`, respeitando um tempo máximo de espera configurável.
+- Endpoint `/metricas` com as latências p50/p99 e o tamanho médio dos micro-lotes.
+
+Execução:
+    python servico_api.py --porta 8000 --max-espera-ms 5 --max-lote 512
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+import uvicorn
+from fastapi import FastAPI
+from pydantic import BaseModel, Field
+
+from aplicacao import FEATURES, THRESHOLD_PADRAO, carregar_modelo
+from analise_threshold import ler_threshold
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class Arremesso(BaseModel):
+    """Features de um arremesso, no mesmo formato usado no treinamento."""
+    lat: float
+    lon: float
+    minutes_remaining: int
+    period: int
+    playoffs: int
+    shot_distance: float
+
+
+class LoteArremessos(BaseModel):
+    """Lote de arremessos enviado em uma única requisição."""
+    arremessos: List[Arremesso] = Field(..., min_length=1)
+
+
+class AgregadorMicroLotes:
+    """
+    Agrupa requisições concorrentes em micro-lotes vetorizados.
+
+    Cada requisição entra em uma fila assíncrona junto com um `Future`. Uma tarefa em segundo
+    plano retira a primeira requisição disponível e continua coletando outras até atingir
+    `max_lote` linhas ou até esgotar `max_espera_ms`. O lote é pontuado com uma única chamada
+    a `predict_proba`, executada fora do event loop, e os resultados são devolvidos a cada
+    requisição na ordem original.
+    """
+
+    def __init__(self, modelo, max_lote=512, max_espera_ms=5.0, threshold=0.35, janela_latencias=10_000):
+        self.modelo = modelo
+        self.max_lote = max_lote
+        self.max_espera = max_espera_ms / 1000
+        self.threshold = threshold
+        self.fila = asyncio.Queue()
+        self.latencias_ms = deque(maxlen=janela_latencias)
+        self.tamanhos_lote = deque(maxlen=janela_latencias)
+        self._tarefa = None
+
+    def iniciar(self):
+        """Inicia a tarefa de consumo da fila no event loop corrente."""
+        self._tarefa = asyncio.create_task(self._consumir())
+
+    async def parar(self):
+        """Cancela a tarefa de consumo da fila."""
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+
+    async def pontuar(self, linhas):
+        """
+        Enfileira arremessos para pontuação e aguarda o resultado do micro-lote.
+
+        Args:
+            linhas (list[dict]): Arremessos no formato {feature: valor}.
+
+        Returns:
+            np.ndarray: Probabilidades de acerto (classe 1), na ordem das linhas.
+        """
+        inicio = time.perf_counter()
+        futuro = asyncio.get_running_loop().create_future()
+        await self.fila.put((linhas, futuro))
+        probabilidades = await futuro
+        self.latencias_ms.append((time.perf_counter() - inicio) * 1000)
+        return probabilidades
+
+    async def _coletar_lote(self):
+        """Coleta requisições da fila até o limite de linhas ou o tempo máximo de espera."""
+        loop = asyncio.get_running_loop()
+        itens = [await self.fila.get()]
+        total_linhas = len(itens[0][0])
+        prazo = loop.time() + self.max_espera
+
+        while total_linhas < self.max_lote:
+            try:
+                item = self.fila.get_nowait()
+            except asyncio.QueueEmpty:
+                restante = prazo - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.fila.get(), restante)
+                except asyncio.TimeoutError:
+                    break
+            itens.append(item)
+            total_linhas += len(item[0])
+
+        return itens, total_linhas
+
+    async def _consumir(self):
+        """Laço principal: forma micro-lotes e distribui os resultados entre as requisições."""
+        loop = asyncio.get_running_loop()
+        while True:
+            itens, total_linhas = await self._coletar_lote()
+            df = pd.DataFrame.from_records(
+                [linha for linhas, _ in itens for linha in linhas], columns=FEATURES
+            )
+
+            try:
+                probabilidades = await loop.run_in_executor(
+                    None, lambda: self.modelo.predict_proba(df)[:, 1]
+                )
+            except Exception as erro:
+                for _, futuro in itens:
+                    if not futuro.done():
+                        futuro.set_exception(erro)
+                continue
+
+            self.tamanhos_lote.append(total_linhas)
+            inicio = 0
+            for linhas, futuro in itens:
+                fim = inicio + len(linhas)
+                if not futuro.done():
+                    futuro.set_result(probabilidades[inicio:fim])
+                inicio = fim
+
+    def resumo_latencias(self):
+        """
+        Resume as latências observadas nas últimas requisições.
+
+        Returns:
+            dict: Quantidade de requisições, latências p50/p99 (ms) e tamanho médio dos micro-lotes.
+        """
+        if not self.latencias_ms:
+            return {"requisicoes": 0}
+
+        latencias = np.fromiter(self.latencias_ms, dtype=float)
+        return {
+            "requisicoes": int(latencias.size),
+            "latencia_p50_ms": float(np.percentile(latencias, 50)),
+            "latencia_p99_ms": float(np.percentile(latencias, 99)),
+            "tamanho_medio_lote": float(np.mean(self.tamanhos_lote)) if self.tamanhos_lote else 0.0,
+        }
+
+
+def criar_app(caminho_modelo="../../Data/Modeling/modelo_final", max_lote=512, max_espera_ms=5.0, threshold=None):
+    """
+    Cria a aplicação FastAPI de pontuação.
+
+    Args:
+        caminho_modelo (str, opcional): Caminho para o modelo salvo (sem extensão) ou do kernel NumPy (.npz).
+        max_lote (int, opcional): Quantidade máxima de linhas por micro-lote (default: 512).
+        max_espera_ms (float, opcional): Tempo máximo de espera para completar um micro-lote (default: 5 ms).
+        threshold (float, opcional): Limite de probabilidade para converter predições em classe
+            (default: None, threshold gravado com o modelo ou `THRESHOLD_PADRAO`).
+
+    Returns:
+        FastAPI: Aplicação pronta para ser servida pelo Uvicorn.
+    """
+
+    @asynccontextmanager
+    async def ciclo_de_vida(app):
+        logging.info("📦 Carregando modelo treinado...")
+        modelo = carregar_modelo(caminho_modelo)
+        threshold_modelo = threshold if threshold is not None else ler_threshold(caminho_modelo, THRESHOLD_PADRAO)
+        app.state.agregador = AgregadorMicroLotes(modelo, max_lote, max_espera_ms, threshold_modelo)
+        app.state.agregador.iniciar()
+        logging.info("🚀 Serviço de pontuação pronto.")
+        yield
+        await app.state.agregador.parar()
+
+    app = FastAPI(title="Serviço de Pontuação - Modelo Kobe Bryant", lifespan=ciclo_de_vida)
+
+    @app.post("/predict")
+    async def predict(requisicao: Union[LoteArremessos, Arremesso]):
+        agregador = app.state.agregador
+        arremessos = requisicao.arremessos if isinstance(requisicao, LoteArremessos) else [requisicao]
+        probabilidades = await agregador.pontuar([a.model_dump() for a in arremessos])
+
+        resultados = [
+            {"proba": float(p), "prediction": int(p >= agregador.threshold)} for p in probabilidades
+        ]
+        if isinstance(requisicao, LoteArremessos):
+            return {"predicoes": resultados}
+        return resultados[0]
+
+    @app.get("/metricas")
+    async def metricas():
+        return app.state.agregador.resumo_latencias()
+
+    @app.get("/saude")
+    async def saude():
+        return {"status": "ok"}
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de pontuação do modelo final.")
+    parser.add_argument("--modelo", default="../../Data/Modeling/modelo_final",
+                        help="Caminho do modelo salvo (sem extensão) ou do kernel NumPy (.npz).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--max-lote", type=int, default=512,
+                        help="Quantidade máxima de linhas agrupadas em um micro-lote.")
+    parser.add_argument("--max-espera-ms", type=float, default=5.0,
+                        help="Tempo máximo (ms) de espera para completar um micro-lote.")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Limite de decisão aplicado à probabilidade da classe 1 "
+                             "(default: threshold gravado com o modelo).")
+    args = parser.parse_args()
+
+    app = criar_app(args.modelo, args.max_lote, args.max_espera_ms, args.threshold)
+    uvicorn.run(app, host=args.host, port=args.porta)
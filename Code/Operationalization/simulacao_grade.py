@@ -0,0 +1,171 @@
+"""
+Motor vetorizado de simulação "e se" sobre grades de arremessos.
+
+Em vez de pontuar uma única combinação de features por vez, o motor recebe faixas de
+valores para `lat`, `lon`, `minutes_remaining`, `period`, `playoffs` e `shot_distance`,
+monta o produto cartesiano como arrays NumPy (em lotes, sem materializar a grade inteira)
+e pontua cada lote com uma única chamada a `predict_proba`. O resultado é um tensor denso
+de probabilidades, com um eixo por feature, que pode ser fatiado por valor de feature.
+
+Features podem também ser derivadas das demais (ex.: `shot_distance` calculada a partir da
+posição na quadra), reduzindo a dimensão do tensor.
+"""
+
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Model"))
+
+from kernel_numpy import PreditorNumpy
+
+# Configuração do logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+FEATURES = ["lat", "lon", "minutes_remaining", "period", "playoffs", "shot_distance"]
+
+# Posição da cesta em lat/lon (loc_x = loc_y = 0 na base original)
+CESTA_LAT = 34.0443
+CESTA_LON = -118.2698
+
+
+def distancia_da_cesta(colunas):
+    """
+    Calcula a distância do arremesso (pés) a partir de lat/lon, como na base original.
+
+    Na base, `lat = CESTA_LAT - loc_y / 1000` e `lon = CESTA_LON + loc_x / 1000`, com
+    `loc_x`/`loc_y` em décimos de pé e `shot_distance` truncada para pés inteiros.
+
+    Args:
+        colunas (dict): Arrays das features do lote, com as chaves "lat" e "lon".
+
+    Returns:
+        np.ndarray: Distância do arremesso em pés.
+    """
+    return np.floor(np.hypot(colunas["lat"] - CESTA_LAT, colunas["lon"] - CESTA_LON) * 100)
+
+
+class SuperficieProbabilidade:
+    """
+    Tensor denso de probabilidades de acerto com os valores de cada eixo.
+
+    Attributes:
+        eixos (dict): {feature: valores do eixo}, na ordem dos eixos do tensor.
+        proba (np.ndarray): Probabilidades da classe 1, com shape `(len(eixo) for eixo in eixos)`.
+    """
+
+    def __init__(self, eixos, proba):
+        self.eixos = eixos
+        self.proba = proba
+
+    def fatiar(self, **fixos):
+        """
+        Fixa features no valor de grade mais próximo, removendo os eixos correspondentes.
+
+        Args:
+            **fixos: {feature: valor} a fixar.
+
+        Returns:
+            SuperficieProbabilidade: Superfície com os eixos restantes.
+        """
+        proba = self.proba
+        eixos = dict(self.eixos)
+        for feature, valor in fixos.items():
+            if feature not in eixos:
+                raise ValueError(f"❌ Feature '{feature}' não é um eixo da superfície: {list(eixos)}")
+            posicao = list(eixos).index(feature)
+            indice = int(np.abs(eixos[feature] - valor).argmin())
+            proba = np.take(proba, indice, axis=posicao)
+            del eixos[feature]
+        return SuperficieProbabilidade(eixos, proba)
+
+
+def _pontuar_matriz(modelo, matriz):
+    """Pontua uma matriz de features; o kernel NumPy dispensa a conversão para DataFrame."""
+    if isinstance(modelo, PreditorNumpy):
+        return modelo.predict_proba(matriz)[:, 1]
+    return modelo.predict_proba(pd.DataFrame(matriz, columns=FEATURES))[:, 1]
+
+
+def simular_grade(modelo, faixas, derivadas=None, tamanho_lote=262_144):
+    """
+    Pontua o produto cartesiano das faixas de features em lotes vetorizados.
+
+    Args:
+        modelo: Modelo com `predict_proba` (pipeline do PyCaret ou `PreditorNumpy`).
+        faixas (dict): {feature: valor ou array de valores} para as features não derivadas.
+        derivadas (dict, opcional): {feature: função(colunas) -> array} calculadas a partir das
+            demais features do lote (ex.: {"shot_distance": distancia_da_cesta}).
+        tamanho_lote (int, opcional): Pontos da grade pontuados por chamada (default: 262.144).
+
+    Returns:
+        SuperficieProbabilidade: Tensor de probabilidades com um eixo por feature de `faixas`.
+    """
+    derivadas = derivadas or {}
+    faltantes = set(FEATURES) - set(faixas) - set(derivadas)
+    if faltantes:
+        raise ValueError(f"❌ Faixas ausentes para as features: {sorted(faltantes)}")
+
+    eixos = {f: np.atleast_1d(np.asarray(faixas[f], dtype=np.float64)) for f in FEATURES if f in faixas}
+    formato = tuple(eixo.size for eixo in eixos.values())
+    total = int(np.prod(formato))
+    proba = np.empty(total, dtype=np.float32)
+
+    inicio = time.perf_counter()
+    for comeco in range(0, total, tamanho_lote):
+        indices = np.unravel_index(np.arange(comeco, min(comeco + tamanho_lote, total)), formato)
+        colunas = {f: eixo[i] for (f, eixo), i in zip(eixos.items(), indices)}
+        for feature, funcao in derivadas.items():
+            colunas[feature] = funcao(colunas)
+        matriz = np.column_stack([colunas[f] for f in FEATURES])
+        proba[comeco:comeco + matriz.shape[0]] = _pontuar_matriz(modelo, matriz)
+
+    logging.info(f"🧮 Grade de {total:,} pontos pontuada em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    return SuperficieProbabilidade(eixos, proba.reshape(formato))
+
+
+def superficie_quadra(modelo, period, minutes_remaining, playoffs, resolucao=400,
+                      limites_lat=(33.5, 34.1), limites_lon=(-118.5, -118.05)):
+    """
+    Calcula a superfície de probabilidade sobre a quadra para um período e relógio fixos.
+
+    A distância do arremesso é derivada da posição (ver `distancia_da_cesta`).
+
+    Args:
+        modelo: Modelo com `predict_proba`.
+        period (int): Período da partida.
+        minutes_remaining (int): Minutos restantes no período.
+        playoffs (int): 1 para playoffs, 0 caso contrário.
+        resolucao (int, opcional): Pontos por eixo de lat/lon (default: 400).
+        limites_lat (tuple, opcional): Faixa de latitude da quadra.
+        limites_lon (tuple, opcional): Faixa de longitude da quadra.
+
+    Returns:
+        np.ndarray: Matriz (resolucao, resolucao) de probabilidades, indexada por [lat, lon].
+    """
+    superficie = simular_grade(
+        modelo,
+        faixas={
+            "lat": np.linspace(*limites_lat, resolucao),
+            "lon": np.linspace(*limites_lon, resolucao),
+            "minutes_remaining": minutes_remaining,
+            "period": period,
+            "playoffs": playoffs,
+        },
+        derivadas={"shot_distance": distancia_da_cesta}
+    )
+    return superficie.fatiar(minutes_remaining=minutes_remaining, period=period, playoffs=playoffs).proba
+
+
+if __name__ == "__main__":
+    from aplicacao import carregar_modelo
+
+    modelo = carregar_modelo("../../Data/Modeling/modelo_final_numpy.npz")
+    for resolucao in (300, 500, 700):
+        inicio = time.perf_counter()
+        superficie_quadra(modelo, period=4, minutes_remaining=2, playoffs=1, resolucao=resolucao)
+        logging.info(f"⏱️ Superfície {resolucao}x{resolucao}: {(time.perf_counter() - inicio) * 1000:.1f} ms")
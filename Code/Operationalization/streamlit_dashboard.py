@@ -6,19 +6,33 @@ Funcionalidades:
 - Avaliação de métricas: Accuracy, F1 Score, Recall, Precision.
 - Matriz de confusão.
 - Distribuição das probabilidades previstas.
-- Registro completo no MLflow com gráficos, métricas e artefatos.
+- Registro completo no MLflow com gráficos, métricas e artefatos, em segundo plano (ver `registro_assincrono.py`).
+- Métricas, matriz de confusão e histogramas vêm dos agregados gravados pela aplicação do modelo
+  (`agregados_avaliacao.json`): o dashboard não carrega o modelo nem relê as predições, e cada
+  execução custa o mesmo para qualquer quantidade de predições. Se houver predições sem agregados
+  (ex.: arquivo versionado antes deles), os agregados são reconstruídos e gravados uma única vez.
+- Análise de threshold: precisão, recall, F1 e custo esperado para o threshold escolhido em um
+  slider, com as curvas de todos os thresholds, calculadas a partir dos histogramas das
+  probabilidades (ver `analise_threshold.py`).
+- Tempos de leitura, cálculo das probabilidades e gráficos de cada execução do script, registrados
+  como métricas "perf/..." na mesma rodada (ver `instrumentacao.py`).
 """
 
 import streamlit as st
 import pandas as pd
+import pyarrow.parquet as pq
 import os
+import json
 import matplotlib.pyplot as plt
 import seaborn as sns
-from pycaret.classification import load_model
-from sklearn.metrics import classification_report, confusion_matrix
 import numpy as np
-import mlflow
-import tempfile
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DataPrep"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Model"))
+from analise_threshold import escolher_threshold, ponto_operacao, varrer_histogramas
+from instrumentacao import RASTREADOR, medir, metricas_mlflow, resumo
+from registro_assincrono import figura_para_bytes, obter_registrador
 
 # Estilo visual
 sns.set_style("whitegrid")
@@ -29,10 +43,72 @@ st.title("📊 Dashboard Analítico - Modelo Kobe Bryant")
 
 # Caminhos dos arquivos
 caminho_predicoes = "../../Data/Processed/predictions_prod.parquet"
-caminho_modelo = "../../Data/Modeling/modelo_final"
+caminho_agregados = "../../Data/Processed/agregados_avaliacao.json"
+BINS_GRAFICO = 30
+
+
+def ler_amostra(caminho_predicoes, linhas=10):
+    """
+    Lê apenas as primeiras linhas do arquivo de predições (primeiro lote do primeiro row group).
+
+    Args:
+        caminho_predicoes (str): Arquivo .parquet com as predições da produção.
+        linhas (int, opcional): Quantidade de linhas da amostra (default: 10).
+
+    Returns:
+        pd.DataFrame: Amostra das predições.
+    """
+    with pq.ParquetFile(caminho_predicoes) as arquivo:
+        return next(arquivo.iter_batches(batch_size=linhas)).to_pandas()
+
+
+@st.fragment
+def analise_threshold(contagens, limites, threshold_modelo):
+    """
+    Seção de análise do threshold; ao mover o slider, apenas esta seção é reexecutada.
+
+    Args:
+        contagens (dict): Histogramas das probabilidades por classe real ("0" e "1").
+        limites (np.ndarray): Limites das faixas dos histogramas.
+        threshold_modelo (float): Threshold usado na pontuação da produção.
+
+    Returns:
+        None
+    """
+    st.subheader("🎚️ Análise de Threshold")
+    col_threshold, col_fp, col_fn = st.columns([3, 1, 1])
+    threshold = col_threshold.slider("Threshold de decisão", min_value=0.0, max_value=1.0,
+                                     value=float(round(threshold_modelo, 3)), step=0.005, format="%.3f")
+    custo_fp = col_fp.number_input("Custo de um falso positivo", min_value=0.0, value=1.0, step=0.5)
+    custo_fn = col_fn.number_input("Custo de um falso negativo", min_value=0.0, value=1.0, step=0.5)
+
+    with medir("dashboard_analitico/analise_threshold"):
+        varredura = varrer_histogramas(contagens["0"], contagens["1"], limites, custo_fp, custo_fn)
+        ponto = ponto_operacao(varredura, threshold)
+        melhor_f1 = escolher_threshold(varredura, "f1")
+        menor_custo = escolher_threshold(varredura, "custo")
+
+    colunas = st.columns(5)
+    colunas[0].metric("Precisão", f"{ponto['precision']:.3f}")
+    colunas[1].metric("Recall", f"{ponto['recall']:.3f}")
+    colunas[2].metric("F1 Score", f"{ponto['f1']:.3f}")
+    colunas[3].metric("Custo esperado", f"{ponto['custo']:.3f}")
+    colunas[4].metric("Acertos previstos", f"{ponto['vp'] + ponto['fp']:,}")
+    def rotulo(t):
+        return f"{t:.3f}" if np.isfinite(t) else "nenhum acerto previsto"
+
+    st.caption(f"Threshold da pontuação: {threshold_modelo:.3f} | "
+               f"Maior F1 na produção: {rotulo(melhor_f1['threshold'])} (F1 {melhor_f1['f1']:.3f}) | "
+               f"Menor custo na produção: {rotulo(menor_custo['threshold'])} (custo {menor_custo['custo']:.3f}) | "
+               f"VP {ponto['vp']:,} · FP {ponto['fp']:,} · FN {ponto['fn']:,} · VN {ponto['vn']:,}")
+
+    # Curvas de todas as faixas (sem a primeira linha da varredura, threshold inf)
+    curvas = pd.DataFrame(
+        {medida: varredura[medida][1:] for medida in ("precision", "recall", "f1")},
+        index=pd.Index(varredura["threshold"][1:], name="threshold"),
+    )
+    st.line_chart(curvas)
 
-# Carrega o modelo
-model = load_model(caminho_modelo)
 
 # Layout com duas colunas
 col1, col2 = st.columns([1, 2])
@@ -64,16 +140,26 @@ with col2:
     """)
 
     if os.path.exists(caminho_predicoes):
-        df = pd.read_parquet(caminho_predicoes)
+        # Trechos da execução atual do script (o Streamlit reexecuta o script a cada interação)
+        RASTREADOR.descartar("dashboard_analitico")
+        if not os.path.exists(caminho_agregados):
+            from aplicacao import agregados_de_predicoes
+
+            with medir("dashboard_analitico/reconstruir_agregados"):
+                agregados_de_predicoes(caminho_predicoes)
+        with medir("dashboard_analitico/ler_agregados"):
+            with open(caminho_agregados, encoding="utf-8") as arquivo:
+                agregados = json.load(arquivo)
+            amostra = ler_amostra(caminho_predicoes)
 
         st.subheader("▶️ Amostra das predições da produção")
-        st.dataframe(df.head(10))
+        st.dataframe(amostra)
 
         # Comparativo de acertos e erros
         st.subheader("📈 Comparativo de Arremessos do Kobe")
 
-        total_arremessos = len(df)
-        acertos_previstos = int(df["prediction"].sum())
+        total_arremessos = agregados["linhas"]
+        acertos_previstos = agregados["predicoes"].get("1", 0)
         erros_previstos = total_arremessos - acertos_previstos
         taxa_acerto = (acertos_previstos / total_arremessos) * 100
 
@@ -86,7 +172,7 @@ with col2:
             st.markdown("<h5 style='color:white;'>Taxa de Acerto (%)</h5>", unsafe_allow_html=True)
             st.markdown(f"<h2 style='color:white;'>{taxa_acerto:.2f}%</h2>", unsafe_allow_html=True)
 
-        with col_dir:
+        with col_dir, medir("dashboard_analitico/grafico_acertos_vs_erros"):
             fig_bar, ax_bar = plt.subplots(figsize=(5, 4))
             sns.barplot(
                 x=["Acertos Previstos", "Erros Previstos"],
@@ -101,75 +187,59 @@ with col2:
             st.pyplot(fig_bar)
 
         # Avaliação com variável real
-        if "shot_made_flag" in df.columns:
+        if agregados["linhas_avaliadas"]:
             st.subheader("📊 Avaliação do Modelo")
-            y_true = df["shot_made_flag"].dropna()
-            y_pred = df.loc[y_true.index, "prediction"]
-
-            report = classification_report(y_true, y_pred, output_dict=True)
+            report = agregados["relatorio"]
             report_df = pd.DataFrame(report).transpose()
             st.dataframe(report_df.style.format("{:.2f}"))
 
             st.subheader("🔢 Matriz de Confusão")
-            cm = confusion_matrix(y_true, y_pred)
-            fig_cm, ax_cm = plt.subplots()
-            sns.heatmap(cm, annot=True, fmt="d", cmap="Blues",
-                        xticklabels=["Erro", "Acerto"],
-                        yticklabels=["Erro", "Acerto"], ax=ax_cm)
-            plt.xlabel("Predito")
-            plt.ylabel("Real")
-            st.pyplot(fig_cm)
-
-            # Log no MLflow
-            mlflow.set_experiment("PipelineAplicacao")
-            with mlflow.start_run(run_name="Streamlit_Dashboard_Analitico"):
-                acuracia = (y_true == y_pred).mean()
-                f1_val = report["1"]["f1-score"] if "1" in report else 0.0
-                recall_val = report["1"]["recall"] if "1" in report else 0.0
-                precision_val = report["1"]["precision"] if "1" in report else 0.0
-
-                mlflow.log_metric("accuracy", acuracia)
-                mlflow.log_metric("f1_score", f1_val)
-                mlflow.log_metric("recall", recall_val)
-                mlflow.log_metric("precision", precision_val)
-                mlflow.log_metric("acertos_previstos", acertos_previstos)
-                mlflow.log_metric("taxa_acerto_percentual", taxa_acerto)
-
-                # Salva gráfico de barras
-                grafico_path = os.path.join(tempfile.gettempdir(), "grafico_acertos_vs_erros.png")
-                fig_bar.savefig(grafico_path, bbox_inches="tight")
-                mlflow.log_artifact(grafico_path, artifact_path="figuras")
-                plt.close(fig_bar)
-
-                # Salva matriz de confusão
-                cm_path = os.path.join(tempfile.gettempdir(), "confusion_matrix.png")
-                fig_cm.savefig(cm_path, bbox_inches="tight")
-                mlflow.log_artifact(cm_path, artifact_path="figuras")
-                plt.close(fig_cm)
-
-                # Salva base com predições
-                df_path = os.path.join(tempfile.gettempdir(), "df_predicoes.parquet")
-                df.to_parquet(df_path, index=False)
-                mlflow.log_artifact(df_path, artifact_path="dados")
-
-                # Distribuição de probabilidades
-                if hasattr(model, "predict_proba"):
-                    st.subheader("Distribuição de Probabilidades de Acerto por Classe Real")
-
-                    feature_cols = list(model.feature_names_in_)
-                    if "shot_made_flag" in feature_cols:
-                        feature_cols.remove("shot_made_flag")
-
-                    df_features = df[feature_cols].copy()
-                    probas = model.predict_proba(df_features)[:, 1]
-                    df["proba"] = probas
-
+            with medir("dashboard_analitico/matriz_confusao"):
+                cm = np.array(agregados["matriz_confusao"])
+                fig_cm, ax_cm = plt.subplots()
+                sns.heatmap(cm, annot=True, fmt="d", cmap="Blues",
+                            xticklabels=["Erro", "Acerto"],
+                            yticklabels=["Erro", "Acerto"], ax=ax_cm)
+                plt.xlabel("Predito")
+                plt.ylabel("Real")
+                st.pyplot(fig_cm)
+
+            artefatos = {
+                "figuras/grafico_acertos_vs_erros.png": figura_para_bytes(fig_bar),
+                "figuras/confusion_matrix.png": figura_para_bytes(fig_cm),
+                "dados/agregados_avaliacao.json": json.dumps(agregados),
+            }
+            plt.close(fig_bar)
+            plt.close(fig_cm)
+
+            # Distribuição de probabilidades: histogramas por classe real pré-calculados na aplicação
+            if "histograma_proba" in agregados:
+                st.subheader("Distribuição de Probabilidades de Acerto por Classe Real")
+                histograma = agregados["histograma_proba"]
+                limites = np.array(histograma["limites"])
+                contagens = {classe: np.array(histograma[classe]) for classe in ("0", "1")}
+
+                # Gráfico com BINS_GRAFICO faixas, somando as faixas finas dos histogramas
+                passo = max((len(limites) - 1) // BINS_GRAFICO, 1)
+                limites_grafico = limites[::passo]
+                centros = (limites_grafico[:-1] + limites_grafico[1:]) / 2
+                df_hist = pd.DataFrame({
+                    "proba": np.tile(centros, 2),
+                    "shot_made_flag": np.repeat([0, 1], len(centros)),
+                    "contagem": np.concatenate([contagens[c].reshape(len(centros), -1).sum(axis=1)
+                                                for c in ("0", "1")]),
+                })
+                threshold = agregados["threshold"] if agregados["threshold"] is not None else 0.5
+
+                with medir("dashboard_analitico/distribuicao_probas"):
                     fig2, ax2 = plt.subplots(figsize=(10, 5))
                     sns.histplot(
-                        data=df,
+                        data=df_hist,
                         x="proba",
+                        weights="contagem",
                         hue="shot_made_flag",
-                        bins=30,
+                        bins=len(centros),
+                        binrange=(limites_grafico[0], limites_grafico[-1]),
                         kde=True,
                         palette={0: "salmon", 1: "skyblue"},
                         stat="count",
@@ -178,7 +248,7 @@ with col2:
                         common_norm=False,
                         ax=ax2
                     )
-                    ax2.axvline(x=0.5, color='red', linestyle='--', linewidth=2, label='Limiar 0.5')
+                    ax2.axvline(x=threshold, color='red', linestyle='--', linewidth=2, label=f'Limiar {threshold}')
                     ax2.set_xlim([0, 1])
                     ax2.set_title("Distribuição de Probabilidades de Acerto por Classe Real", fontsize=14)
                     ax2.set_xlabel("Probabilidade de Acerto Prevista")
@@ -189,14 +259,28 @@ with col2:
                     ax2.legend(handles=handles[1:], labels=new_labels[1:], title="Classe Real", loc="upper right")
 
                     st.pyplot(fig2)
-
-                    # Salva gráfico no MLflow
-                    probas_path = os.path.join(tempfile.gettempdir(), "distribuicao_probas.png")
-                    fig2.savefig(probas_path, bbox_inches="tight")
-                    mlflow.log_artifact(probas_path, artifact_path="figuras")
+                    artefatos["figuras/distribuicao_probas.png"] = figura_para_bytes(fig2)
                     plt.close(fig2)
 
-                st.success("📡 Execução registrada no MLflow com sucesso ✅")
+                analise_threshold(contagens, limites, threshold)
+
+            # Log no MLflow (assíncrono: gravado em segundo plano, artefatos repetidos não são reenviados)
+            obter_registrador().registrar_rodada(
+                "PipelineAplicacao",
+                "Streamlit_Dashboard_Analitico",
+                metricas={
+                    **metricas_mlflow(resumo("dashboard_analitico")),
+                    "accuracy": report["accuracy"],
+                    "f1_score": report["1"]["f1-score"] if "1" in report else 0.0,
+                    "recall": report["1"]["recall"] if "1" in report else 0.0,
+                    "precision": report["1"]["precision"] if "1" in report else 0.0,
+                    "acertos_previstos": acertos_previstos,
+                    "taxa_acerto_percentual": taxa_acerto,
+                },
+                artefatos=artefatos
+            )
+            st.success("📡 Execução enviada para registro no MLflow ✅")
 
     else:
-        st.warning("⚠️ Arquivo de predições não encontrado. Execute o pipeline primeiro para visualizar os dados.")
+        st.warning("⚠️ Arquivo de predições não encontrado. "
+                   "Execute o pipeline primeiro para visualizar os dados.")
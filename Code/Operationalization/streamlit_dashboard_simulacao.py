@@ -1,27 +1,27 @@
 """
 Dashboard Streamlit para:
 1. Simulação de arremessos do Kobe Bryant com entrada manual de dados;
-2. Visualização espacial dos arremessos históricos com heatmap e pontos coloridos.
+2. Superfície de probabilidade de acerto sobre a quadra, calculada em grade vetorizada;
+3. Visualização espacial dos arremessos históricos com heatmap e pontos coloridos.
 
 Funcionalidades:
 - Entrada de dados interativa para prever acerto ou erro de arremesso;
+- Superfície de probabilidade para um período e relógio fixos (ver `simulacao_grade.py`);
 - Visualização de mapa com base em latitude/longitude;
 - Histórico de simulações salvas localmente;
-- Registro de simulações e gráficos no MLflow.
+- Registro de simulações e gráficos no MLflow, em segundo plano (ver `registro_assincrono.py`).
 """
 
 import numpy as np
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
-from matplotlib.patches import Patch
 from PIL import Image
-from datetime import datetime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import os
-import mlflow
-import tempfile
-from pycaret.classification import load_model
-from sklearn.metrics import log_loss, f1_score
+import time
+
+from registro_assincrono import obter_registrador
 
 # Configuração da página
 st.set_page_config(page_title="📊 Dashboard - Simulação de Arremessos - Modelo Kobe Bryant", layout="wide")
@@ -29,7 +29,7 @@ st.set_page_config(page_title="📊 Dashboard - Simulação de Arremessos - Mode
 # Navegação por abas
 aba = st.sidebar.selectbox(
     "Selecione a visualização:",
-    ["Simulação", "Mapa de Arremessos"]
+    ["Simulação", "Superfície de Probabilidade", "Mapa de Arremessos"]
 )
 
 # -----------------------------
@@ -38,8 +38,23 @@ aba = st.sidebar.selectbox(
 if aba == "Simulação":
     st.title("🏀 Simulador de Arremessos - Kobe Bryant")
 
-    # Carrega modelo treinado
-    model = load_model("../../Data/Modeling/modelo_final")
+    # Superfície de probabilidade pré-calculada para o modelo final (recalculada se o modelo mudar)
+    from aplicacao import THRESHOLD_PADRAO
+    from analise_threshold import ler_threshold
+    from cache_superficie import CacheSuperficie
+    from log_simulacoes import LogSimulacoes
+
+    @st.cache_resource
+    def carregar_cache_superficie():
+        return CacheSuperficie("../../Data/Modeling/modelo_final")
+
+    with st.spinner("Carregando superfície de probabilidade do modelo..."):
+        cache_superficie = carregar_cache_superficie()
+
+    @st.cache_resource
+    def carregar_log_simulacoes():
+        # Instância única por processo, compartilhada pelas sessões do dashboard
+        return LogSimulacoes("../../Data/Logs/simulacoes", caminho_legado="../../Data/Logs/simulacoes.csv")
 
     st.sidebar.header("🎛️ Simule uma Jogada")
 
@@ -61,59 +76,82 @@ if aba == "Simulação":
     })
 
     if st.sidebar.button("🏹 Avaliar Arremesso"):
-        pred = model.predict(input_data)[0]
-        proba = model.predict_proba(input_data)[0][1]
+        proba = cache_superficie.consultar(**input_data.iloc[0].to_dict())
+        # Threshold de decisão escolhido no treinamento, como na aplicação
+        threshold = ler_threshold("../../Data/Modeling/modelo_final", padrao=THRESHOLD_PADRAO)
+        pred = int(proba >= threshold)
 
         st.subheader("🎯 Resultado da Jogada")
         resultado = "✅ Acerto" if pred == 1 else "❌ Erro"
         cor = "green" if pred == 1 else "red"
         st.markdown(f"**Classificação:** <span style='color:{cor}'>{resultado}</span>", unsafe_allow_html=True)
         st.metric("Probabilidade de Acerto", f"{proba*100:.2f}%")
+        st.caption(f"Threshold de decisão do modelo: {threshold:.3f}")
 
         st.markdown("---")
         st.markdown("**Variáveis usadas na simulação:**")
         st.dataframe(input_data)
 
-        # Salva localmente simulação
-        log_path = "../../Data/Logs"
-        os.makedirs(log_path, exist_ok=True)
-        log_file = os.path.join(log_path, "simulacoes.csv")
-
-        log_data = input_data.copy()
-        log_data["prediction"] = pred
-        log_data["proba"] = proba
-        log_data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        if os.path.exists(log_file):
-            log_data.to_csv(log_file, mode="a", header=False, index=False)
-        else:
-            log_data.to_csv(log_file, index=False)
+        # Salva localmente simulação (buffer em memória + segmentos Parquet, ver `log_simulacoes.py`)
+        log_simulacoes = carregar_log_simulacoes()
+        log_simulacoes.registrar({**input_data.iloc[0].to_dict(), "prediction": pred, "proba": proba})
 
         st.markdown("---")
         st.subheader("📜 Histórico de Simulações")
-        historico = pd.read_csv(log_file)
-        st.dataframe(historico.tail(10))
-
-        # Registro no MLflow
-        mlflow.set_experiment("PipelineAplicacao")
-        with mlflow.start_run(run_name="StreamlitSimulacao"):
-            mlflow.log_param("lat", lat)
-            mlflow.log_param("lon", lon)
-            mlflow.log_param("minutes_remaining", minutes)
-            mlflow.log_param("period", period)
-            mlflow.log_param("playoffs", playoffs)
-            mlflow.log_param("shot_distance", distance)
-
-            mlflow.log_metric("proba", proba)
-            mlflow.log_metric("prediction", int(pred))
-
-            # Salva simulação como artefato temporário
-            with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tmp:
-                temp_path = tmp.name
-                log_data.to_csv(temp_path, index=False)
-
-            mlflow.log_artifact(temp_path, artifact_path="simulacoes")
-            os.remove(temp_path)
+        st.dataframe(log_simulacoes.recentes(10))
+
+        # Registro no MLflow: cada simulação é um passo da rodada da sessão, gravada em segundo plano
+        # (o registrador é do processo; o id da sessão do Streamlit separa as rodadas)
+        contexto = get_script_run_ctx()
+        obter_registrador().registrar_serie("PipelineAplicacao", "StreamlitSimulacao", {
+            "lat": lat,
+            "lon": lon,
+            "minutes_remaining": minutes,
+            "period": period,
+            "playoffs": playoffs,
+            "shot_distance": distance,
+            "proba": proba,
+            "prediction": int(pred),
+        }, sessao=contexto.session_id if contexto else None)
+
+# -----------------------------
+# ABA: SUPERFÍCIE DE PROBABILIDADE
+# -----------------------------
+elif aba == "Superfície de Probabilidade":
+    st.title("🗺️ Superfície de Probabilidade de Acerto - Kobe Bryant")
+
+    from aplicacao import carregar_modelo
+    from simulacao_grade import superficie_quadra
+
+    # Kernel NumPy quando disponível (sem PyCaret); caso contrário, o pipeline salvo. O modelo vem
+    # do registro do processo: carregado uma vez para todas as sessões e recarregado se o arquivo mudar
+    caminho_kernel = "../../Data/Modeling/modelo_final_numpy.npz"
+    model = carregar_modelo(caminho_kernel if os.path.exists(caminho_kernel) else "../../Data/Modeling/modelo_final")
+
+    st.sidebar.header("🎛️ Cenário da Jogada")
+    period = st.sidebar.slider("Período", min_value=1, max_value=7, step=1, value=4)
+    minutes = st.sidebar.slider("Minutos Restantes", min_value=0, max_value=11, step=1, value=2)
+    playoffs = st.sidebar.selectbox("É Playoffs?", options=[0, 1])
+    resolucao = st.sidebar.slider("Resolução da grade (pontos por eixo)", min_value=100, max_value=700,
+                                  step=50, value=500)
+
+    inicio = time.perf_counter()
+    proba = superficie_quadra(model, period, minutes, playoffs, resolucao=resolucao)
+    tempo_ms = (time.perf_counter() - inicio) * 1000
+
+    fig, ax = plt.subplots(figsize=(10, 8))
+    ax.imshow(Image.open('../../Docs/Imagens/charlotte_key_zone.jpeg'),
+              extent=[-118.5, -118.05, 33.5, 34.1], aspect='auto', zorder=0)
+    superficie = ax.imshow(proba, extent=[-118.5, -118.05, 33.5, 34.1], origin='lower', aspect='auto',
+                           cmap="RdYlGn", alpha=0.6, zorder=1)
+    fig.colorbar(superficie, ax=ax, label="Probabilidade de Acerto")
+    ax.set_title(f"Período {period} | {minutes} min restantes | {'Playoffs' if playoffs else 'Temporada regular'}")
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    st.pyplot(fig)
+
+    st.caption(f"{proba.size:,} pontos de grade pontuados em {tempo_ms:.0f} ms "
+               "(distância do arremesso derivada da posição na quadra).")
 
 # -----------------------------
 # ABA: MAPA DE ARREMESSOS
@@ -121,82 +159,69 @@ if aba == "Simulação":
 elif aba == "Mapa de Arremessos":
     st.title("📍 Localização dos Arremessos - Kobe Bryant")
 
+    from renderizacao_mapa import EXTENSAO_QUADRA, LIMITE_PONTOS, RESULTADOS, carregar_mapa
+
     # Caminhos dos arquivos
     quadra_path = '../../Docs/Imagens/charlotte_key_zone.jpeg'
     dados_path = '../../Data/Raw/dataset_kobe_dev.parquet'
 
+    DISTANCIA_MAX_MAPA = 50
+
+    @st.cache_resource
+    def carregar_recursos_mapa(quadra_path, dados_path, modificado_em):
+        # Lidos e agregados em blocos uma única vez por versão do arquivo de dados; arremessos
+        # além da distância máxima do filtro nunca são exibidos e ficam de fora já na leitura
+        return Image.open(quadra_path), carregar_mapa(dados_path, distancia_max=DISTANCIA_MAX_MAPA)
+
     try:
-        img = Image.open(quadra_path)
-        df = pd.read_parquet(dados_path)
+        img, mapa = carregar_recursos_mapa(quadra_path, dados_path, os.path.getmtime(dados_path))
     except FileNotFoundError as e:
         st.error(str(e))
         st.stop()
 
-    # Mapeamento para visualização
-    mapa_valores = {1: 'Cesta', 0: 'Erro', None: 'Desconhecido'}
-    df['resultado'] = df['shot_made_flag'].map(mapa_valores)
-    df['cor'] = df['shot_made_flag'].map({1: 'green', 0: 'red'}).fillna('black')
-
     # Filtros laterais
     st.sidebar.header("Filtros de Visualização")
 
     resultado = st.sidebar.multiselect(
         'Resultado do arremesso:',
-        options=['Cesta', 'Erro', 'Desconhecido'],
-        default=['Cesta', 'Erro', 'Desconhecido']
+        options=RESULTADOS,
+        default=RESULTADOS
     )
 
     distancia_max = st.sidebar.slider(
         "Distância máxima do arremesso (ft):",
-        min_value=0, max_value=50, value=50, step=1
+        min_value=0, max_value=DISTANCIA_MAX_MAPA, value=DISTANCIA_MAX_MAPA, step=1
     )
 
     tipo_visu = st.sidebar.radio(
         "Tipo de visualização:",
-        ["Pontos coloridos", "Heatmap"]
+        ["Automático", "Pontos coloridos", "Heatmap", "Taxa de acerto"]
     )
 
-    # Aplica filtros
-    df_filtrado = df[
-        (df['resultado'].isin(resultado)) &
-        (df['shot_distance'] <= distancia_max)
-    ]
-
-    if df_filtrado.empty:
+    if mapa.quantidade(resultado, distancia_max) == 0:
         st.warning("Nenhum dado disponível com os filtros selecionados.")
         st.stop()
 
+    # Nível de detalhe: pontos brutos até LIMITE_PONTOS (ou sempre/nunca, se escolhido)
+    limite_pontos, modo_blocos, titulo = {
+        "Automático": (LIMITE_PONTOS, "Taxa de acerto", "Localização dos Arremessos - Kobe Bryant"),
+        "Pontos coloridos": (float("inf"), "Taxa de acerto", "Localização dos Arremessos - Kobe Bryant"),
+        "Heatmap": (-1, "Contagem", "Zonas Quentes de Arremesso"),
+        "Taxa de acerto": (-1, "Taxa de acerto", "Taxa de Acerto por Região"),
+    }[tipo_visu]
+
     # Criação do gráfico
     fig, ax = plt.subplots(figsize=(10, 8))
-    ax.set_xlim(-118.5, -118.05)
-    ax.set_ylim(33.5, 34.1)
-    ax.imshow(img, extent=[-118.5, -118.05, 33.5, 34.1], aspect='auto', zorder=0)
-
-    if tipo_visu == "Pontos coloridos":
-        ax.scatter(df_filtrado['lon'], df_filtrado['lat'], c=df_filtrado['cor'],
-                   s=10, alpha=0.7, edgecolors='k', linewidths=0.1, zorder=1)
-        ax.set_title("Localização dos Arremessos - Kobe Bryant")
-        legenda = [
-            Patch(color='green', label='Cesta'),
-            Patch(color='red', label='Erro'),
-            Patch(color='black', label='Desconhecido')
-        ]
-        ax.legend(handles=legenda, loc='lower left', title='Resultado do Arremesso')
-    else:
-        import seaborn as sns
-        ax.set_title("Zonas Quentes de Arremesso")
-        sns.kdeplot(
-            x=df_filtrado['lon'],
-            y=df_filtrado['lat'],
-            fill=True,
-            cmap="hot",
-            bw_adjust=0.5,
-            thresh=0.05,
-            levels=100,
-            alpha=0.8,
-            ax=ax
-        )
+    ax.set_xlim(EXTENSAO_QUADRA[0], EXTENSAO_QUADRA[1])
+    ax.set_ylim(EXTENSAO_QUADRA[2], EXTENSAO_QUADRA[3])
+    ax.imshow(img, extent=EXTENSAO_QUADRA, aspect='auto', zorder=0)
+
+    renderizacao = mapa.renderizar(ax, resultado, distancia_max, modo_blocos=modo_blocos,
+                                   limite_pontos=limite_pontos)
+    ax.set_title(titulo)
 
     ax.set_xlabel("Longitude")
     ax.set_ylabel("Latitude")
     st.pyplot(fig)
+    st.caption(f"{renderizacao['quantidade']:,} arremessos desenhados como {renderizacao['nivel']} "
+               f"em {renderizacao['tempo_ms']:.0f} ms.")